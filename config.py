@@ -10,6 +10,8 @@ BASE_DIR = Path(__file__).parent
 REPORTS_DIR = BASE_DIR / "reports"
 TEMPLATES_DIR = BASE_DIR / "templates"
 ASSETS_DIR = BASE_DIR / "assets"
+CHECKPOINTS_DIR = BASE_DIR / "checkpoints"
+CACHE_DIR = BASE_DIR / "cache"
 
 # Crea le directory se non esistono
 REPORTS_DIR.mkdir(exist_ok=True)
@@ -20,10 +22,99 @@ ASSETS_DIR.mkdir(exist_ok=True)
 CRAWL_CONFIG = {
     'max_pages': 50,  # Numero massimo di pagine da analizzare
     'timeout': 30,    # Timeout per le richieste HTTP
-    'delay': 1,       # Delay tra le richieste (in secondi)
-    'max_depth': 3,   # Profondità massima di crawling
+    'delay': 1,       # Intervallo medio tra richieste allo stesso host (in secondi)
+    'host_burst': 1,  # Richieste consecutive consentite verso un host prima di applicare il delay
+    'max_retry_after': 300,  # Pausa massima (secondi) accettata da Retry-After su 429/503
+    'max_retries': 2,          # Nuovi tentativi per URL dopo timeout, errori di connessione e 5xx
+    'retry_backoff': 1.0,      # Attesa base (secondi) prima di un nuovo tentativo, raddoppiata ogni volta (con jitter)
+    'retry_backoff_max': 60,   # Attesa massima tra due tentativi
+    'circuit_failure_threshold': 5,  # Fallimenti consecutivi dopo i quali un host viene sospeso
+    'circuit_reset_timeout': 30,     # Secondi di sospensione prima di una richiesta di prova (raddoppiati a ogni riapertura)
+    'circuit_max_trips': 3,          # Sospensioni senza successi dopo le quali l'host viene abbandonato
+    'max_depth': 3,   # Profondità massima di crawling (la pagina iniziale ha profondità 0)
     'follow_external': False,  # Se seguire link esterni
     'respect_robots': True,    # Se rispettare robots.txt
+    'async_mode': False,       # Se usare il motore di fetch asincrono (aiohttp)
+    'concurrency': 10,         # Richieste contemporanee massime in modalità asincrona
+    'adaptive_concurrency': True,   # Richieste per host adattate (AIMD) a latenza, 429/503 e timeout
+    'initial_host_concurrency': 2,  # Richieste contemporanee iniziali verso ogni host
+    'latency_threshold': 2.0,       # Latenza media oltre N volte la minima osservata = host sovraccarico
+    'url_cache_size': 100000,  # href risolti e classificati tenuti in cache (LRU)
+    'compact_records': True,   # Pagine in memoria come record compatti (URL condivisi, testo compresso)
+    'extraction_engine': 'lxml',  # 'lxml' (single-pass) oppure 'bs4' (un estrattore BeautifulSoup per campo)
+    'max_body_bytes': 5 * 1024 * 1024,  # Oltre questa dimensione il corpo viene troncato (pagina segnata 'truncated')
+    # Content-Type accettati: le altre risposte vengono scartate prima di scaricare il corpo
+    'html_content_types': ['text/html', 'application/xhtml+xml'],
+    # Parametri di tracciamento ignorati nel confronto tra URL ('utm_*' = prefisso)
+    'tracking_params': ['utm_*', 'gclid', 'fbclid', 'msclkid', 'dclid', 'yclid', 'mc_cid', 'mc_eid', '_ga', 'igshid'],
+    # Ordine di visita: profondità (penalità) contro priorità, lastmod recente in sitemap e link in ingresso (bonus)
+    'priority_weights': {'depth': 1.0, 'sitemap': 1.0, 'freshness': 0.5, 'inlinks': 0.5},
+    'checkpoints': True,       # Salva frontiera e pagine su disco per poter riprendere il crawling
+    'checkpoint_interval': 25, # Pagine tra un commit del checkpoint e il successivo
+}
+
+# Cache HTTP su disco (richieste condizionali con ETag / Last-Modified)
+HTTP_CACHE_CONFIG = {
+    'enabled': True,
+    'path': CACHE_DIR / "http_cache.sqlite",
+}
+
+# Pagine raccolte: oltre il budget i contenuti voluminosi dei record vengono spostati su disco
+PAGE_STORE_CONFIG = {
+    'memory_budget_mb': 512,  # Memoria massima stimata per link, immagini e testo delle pagine
+    'spill_dir': CACHE_DIR / "pages",  # File di segmento temporanei (rimossi a fine processo)
+}
+
+# Parsing in processi separati: i fetcher scaricano l'HTML, un pool di processi ne estrae i campi
+PARSE_CONFIG = {
+    'enabled': True,          # Solo con extraction_engine 'lxml' (l'estrattore BeautifulSoup resta nel crawler)
+    'workers': 0,             # Processi di parsing (0 = uno per core)
+    'max_pending': 0,         # Pagine in coda o in lavorazione al massimo, poi i fetcher attendono (0 = 2 per processo)
+}
+
+# Verifica dei link: ogni destinazione unica viene controllata una volta (HEAD, poi GET parziale)
+LINK_CHECK_CONFIG = {
+    'enabled': True,
+    'check_external': True,  # Verifica anche i link verso altri domini
+    'max_links': 5000,       # Destinazioni verificate al massimo per crawling
+    'concurrency': 20,       # Richieste contemporanee in tutto
+    'per_host': 2,           # Richieste contemporanee verso lo stesso host
+    'timeout': 10,
+    'sample_pages': 5,       # Pagine di esempio riportate per ogni link interrotto
+    'cache_ttl_hours': 24,   # Validità degli esiti salvati tra un crawling e l'altro
+    'cache_path': CACHE_DIR / "link_cache.sqlite",
+}
+
+# Crawling di più siti nello stesso processo (python main.py --batch siti.txt)
+BATCH_CONFIG = {
+    'max_sites': 10,        # Siti in corso contemporaneamente
+    'max_requests': 100,    # Richieste in volo in totale, tra tutti i siti (pool di connessioni condiviso)
+    'dns_cache_ttl': 300,   # Secondi di validità della cache DNS condivisa
+    'generate_pdf': True,   # Un report PDF per sito in REPORTS_DIR
+}
+
+# Crawling ripartito su più processi: frontiera divisa per hash dell'URL in una coda condivisa
+SHARD_CONFIG = {
+    'enabled': False,
+    'shards': 0,              # Processi worker (0 = uno per core)
+    'backend': 'sqlite',      # Backend della coda condivisa (vedi utils/shard_queue.py)
+    'queue_dir': CACHE_DIR / "shards",  # Code temporanee dei crawling in corso
+    'poll_interval': 0.2,     # Secondi tra un controllo della coda e il successivo
+    'local_shards': None,     # Shard avviati dal coordinatore (None = tutti; gli altri con --shard-worker)
+}
+
+# Sitemap XML (da robots.txt, altrimenti /sitemap.xml): semi della frontiera e copertura
+SITEMAP_CONFIG = {
+    'seed_frontier': True,  # Accoda gli URL della sitemap con la loro priorità e lastmod
+    'max_sitemaps': 100,    # File letti al massimo, seguendo gli indici di sitemap
+    'max_seed_urls': 10000, # URL della sitemap accodati al massimo (la copertura li conta comunque tutti)
+    'sample_size': 1000,    # URL della sitemap conservati in chiaro per il report
+}
+
+# Analisi incrementale: le pagine con lo stesso content_hash riusano i risultati precedenti
+ANALYSIS_CONFIG = {
+    'incremental': True,
+    'state_dir': CACHE_DIR / "analysis",
 }
 
 # User agents per il crawling
@@ -91,6 +182,14 @@ SELENIUM_CONFIG = {
     'window_size': (1920, 1080),
     'page_load_timeout': 30,
     'implicit_wait': 10,
+    'pool_size': 3,  # Browser in parallelo per il rendering
+    'max_pages_per_driver': 50,  # Il browser viene riavviato dopo N pagine (memoria)
+    'render_mode': 'auto',  # 'always', 'auto' (solo pagine che richiedono JavaScript) o 'never'
+    'timing_sample_rate': 0.1,  # Quota di pagine statiche renderizzate comunque per i tempi di caricamento
+    'render_min_words': 20,  # Sotto questa soglia (con script presenti) la pagina è considerata vuota
+    'driver_path': None,  # Percorso di chromedriver preinstallato (evita il download)
+    'offline': False,  # Non scaricare mai chromedriver: usa driver_path o quello in cache
+    'driver_cache': CACHE_DIR / "chromedriver.json",
     'chrome_options': [
         '--no-sandbox',
         '--disable-dev-shm-usage',
@@ -120,12 +219,16 @@ PDF_CONFIG = {
     },
     'colors': {
         'primary': '#336699',
+        'primary_light': '#D6E4F0',
+        'primary_dark': '#1F4466',
         'secondary': '#6699CC',
+        'secondary_dark': '#3D6D99',
         'success': '#2fa827',
         'warning': '#ff9500',
         'error': '#d32f2f',
         'light_gray': '#f0f0f0',
-        'dark_gray': '#333333'
+        'dark_gray': '#333333',
+        'border': '#CCCCCC'
     }
 }
 
@@ -15,8 +15,11 @@ import copy # Import aggiunto per deepcopy
 
 from config import *
 from utils.crawler import WebCrawler
-from utils.analyzer import SEOAnalyzer
+from utils.checkpoint import checkpoint_status, remove_checkpoint
+from utils.analyzer import SEOAnalyzer, load_analysis_state, save_analysis_state
 from utils.pdf_generator import PDFGenerator
+from utils.batch import site_key
+from utils.sharding import ShardedCrawler
 
 # Configura CustomTkinter
 ctk.set_appearance_mode(GUI_CONFIG['theme']) # 'System', 'Dark', 'Light'
@@ -494,12 +497,39 @@ class MainWindow:
         # Aggiorna configurazioni
         CRAWL_CONFIG['max_pages'] = self.max_pages_var.get()
         
+        # Checkpoint: propone di riprendere un crawling interrotto sullo stesso sito
+        # (non nel crawling ripartito, la cui coda condivisa non è riprendibile)
+        checkpoint_path = None
+        resume = False
+        if CRAWL_CONFIG['checkpoints'] and not SHARD_CONFIG['enabled']:
+            checkpoint_path = self._checkpoint_path(url)
+            status = checkpoint_status(checkpoint_path)
+            if status in ('running', 'interrupted'):
+                resume = messagebox.askyesno(
+                    "Crawling interrotto",
+                    "È stato trovato un crawling interrotto per questo sito.\n\nVuoi riprenderlo dal punto in cui si era fermato?"
+                )
+            if not resume:
+                remove_checkpoint(checkpoint_path)
+        
         # Avvia thread di analisi
-        thread = threading.Thread(target=self._run_analysis, args=(url,))
+        thread = threading.Thread(target=self._run_analysis, args=(url, checkpoint_path, resume))
         thread.daemon = True
         thread.start()
         
-    def _run_analysis(self, url: str):
+    def _site_key(self, url: str) -> str:
+        """Nome di file che identifica un sito (host e porta)"""
+        return site_key(url)
+    
+    def _checkpoint_path(self, url: str):
+        """Percorso del checkpoint di crawling associato a un sito"""
+        return CHECKPOINTS_DIR / f"{self._site_key(url)}.sqlite"
+    
+    def _analysis_state_path(self, url: str):
+        """Percorso dello stato per l'analisi incrementale di un sito"""
+        return ANALYSIS_CONFIG['state_dir'] / f"{self._site_key(url)}.json"
+    
+    def _run_analysis(self, url: str, checkpoint_path=None, resume: bool = False):
         """Esegue l'analisi in un thread separato"""
         try:
             # Reset progress bar
@@ -510,12 +540,29 @@ class MainWindow:
             self._update_status("Inizializzazione crawler...")
             self._update_progress(0.1, "Inizializzazione - 10%")
             
-            self.crawler = WebCrawler(url, callback=self._update_crawling_status)
+            if resume:
+                self.crawler = WebCrawler.resume(checkpoint_path, callback=self._update_crawling_status)
+            elif SHARD_CONFIG['enabled']:
+                self.crawler = ShardedCrawler(url, callback=self._update_crawling_status)
+            else:
+                self.crawler = WebCrawler(url, callback=self._update_crawling_status, checkpoint_path=checkpoint_path)
             
             self._update_status(MESSAGES['crawling_started'].format(url))
             self._update_progress(0.2, "Avvio crawling - 20%")
             
-            self.crawl_data = self.crawler.crawl()
+            domain = url.replace('https://', '').replace('http://', '').replace('www.', '').split('/')[0]
+            
+            # Analisi incrementale: le pagine invariate riusano i risultati precedenti
+            previous_state = None
+            if ANALYSIS_CONFIG['incremental']:
+                previous_state = load_analysis_state(self._analysis_state_path(url))
+            
+            # Le pagine vengono valutate man mano che il crawler le registra
+            analyzer = SEOAnalyzer(domain=domain, previous_state=previous_state, sitemap=self.crawler.sitemap,
+                                   links=self.crawler.links)
+            for page in self.crawler.iter_pages():
+                analyzer.add_page(page)
+            self.crawl_data = self.crawler.pages_data
             
             if not self.crawl_data:
                 raise Exception("Nessun dato raccolto durante il crawling")
@@ -529,10 +576,11 @@ class MainWindow:
                 self._update_status(MESSAGES['analysis_started'])
                 self._update_progress(0.8, "Analisi SEO in corso - 80%")
                 
-                domain = url.replace('https://', '').replace('http://', '').replace('www.', '').split('/')[0]
-                analyzer = SEOAnalyzer(self.crawl_data, domain)
                 self.analysis_results = analyzer.analyze_all()
                 
+                if ANALYSIS_CONFIG['incremental']:
+                    save_analysis_state(self._analysis_state_path(url), analyzer.get_incremental_state())
+                
                 self._update_status(MESSAGES['analysis_completed'])
                 self._update_progress(1.0, "Analisi completata - 100%")
                 
@@ -872,13 +920,13 @@ class MainWindow:
         links_analysis = self.analysis_results.get('links_analysis', {})
         details_text += f"""
 🔗 LINK
-• Link interni interrotti: {len(detailed_issues.get('broken_links', []))}
+• Link interrotti: {len(detailed_issues.get('broken_links', []))}
 • Loop e catene di reindirizzamenti: {len(detailed_issues.get('redirect_chains', []))}
 • Pagine con link canonico interrotto: {len(detailed_issues.get('broken_canonical_links', []))}
 • Pagine con più URL canonici: {len(detailed_issues.get('multiple_canonical_urls', []))}
 • Punteggio: {links_analysis.get('score', 'N/A')}/100
 """
-        details_text += create_url_table_string("Link Interni Interrotti", detailed_issues.get('broken_links', []))
+        details_text += create_url_table_string("Link Interrotti", detailed_issues.get('broken_links', []))
         details_text += create_url_table_string("Loop e Catene di Reindirizzamenti", detailed_issues.get('redirect_chains', []))
         details_text += create_url_table_string("Pagine con Link Canonico Interrotto", detailed_issues.get('broken_canonical_links', []))
         details_text += create_url_table_string("Pagine con Più URL Canonici", detailed_issues.get('multiple_canonical_urls', []))
@@ -902,6 +950,7 @@ class MainWindow:
 
         # Tecnico (nuove aggiunte)
         technical_analysis = self.analysis_results.get('technical_analysis', {})
+        sitemap_analysis = self.analysis_results.get('sitemap_analysis', {})
         details_text += f"""
 ⚙️ TECNICO
 • Pagine non raggiungibili dal crawler: {len(detailed_issues.get('unreachable_pages', []))}
@@ -919,6 +968,9 @@ class MainWindow:
 • Pagine con meta refresh tag: {len(detailed_issues.get('meta_refresh_tags', []))}
 • CSS/JS interni inaccessibili: {len(detailed_issues.get('inaccessible_css_js', []))}
 • Sitemap.xml troppo pesanti: {len(detailed_issues.get('large_sitemap_files', []))}
+• URL in sitemap: {sitemap_analysis.get('sitemap_urls', 'N/A')} (copertura crawling: {sitemap_analysis.get('coverage_percentage', 'N/A')}%)
+• URL in sitemap non raggiunti: {sitemap_analysis.get('sitemap_not_crawled', 'N/A')}
+• Pagine raggiunte non in sitemap: {sitemap_analysis.get('crawled_not_in_sitemap', 'N/A')}
 • Elementi dati strutturati non validi: {len(detailed_issues.get('invalid_structured_data', []))}
 • Pagine senza valore larghezza viewport: {len(detailed_issues.get('pages_without_viewport_width', []))}
 • Punteggio: {technical_analysis.get('score', 'N/A')}/100
@@ -1323,6 +1375,17 @@ class SettingsWindow:
         self.respect_robots_var = tk.BooleanVar(value=CRAWL_CONFIG['respect_robots'])
         ctk.CTkCheckBox(scroll_frame, text="Rispetta robots.txt", variable=self.respect_robots_var, corner_radius=5).pack(anchor="w", padx=10, pady=5)
         
+        # Modalità asincrona
+        concurrency_frame = ctk.CTkFrame(scroll_frame, fg_color="transparent")
+        concurrency_frame.pack(fill="x", pady=5)
+        
+        ctk.CTkLabel(concurrency_frame, text="Richieste contemporanee:").pack(side="left", padx=10)
+        self.concurrency_var = tk.IntVar(value=CRAWL_CONFIG['concurrency'])
+        ctk.CTkEntry(concurrency_frame, textvariable=self.concurrency_var, width=100, corner_radius=8).pack(side="right", padx=10)
+        
+        self.async_mode_var = tk.BooleanVar(value=CRAWL_CONFIG['async_mode'])
+        ctk.CTkCheckBox(scroll_frame, text="Crawling asincrono (richieste parallele)", variable=self.async_mode_var, corner_radius=5).pack(anchor="w", padx=10, pady=5)
+        
     def _create_seo_settings(self, parent):
         """Crea le impostazioni SEO"""
         scroll_frame = ctk.CTkScrollableFrame(parent, corner_radius=0)
@@ -1390,6 +1453,8 @@ class SettingsWindow:
             CRAWL_CONFIG['delay'] = self.delay_var.get()
             CRAWL_CONFIG['follow_external'] = self.follow_external_var.get()
             CRAWL_CONFIG['respect_robots'] = self.respect_robots_var.get()
+            CRAWL_CONFIG['async_mode'] = self.async_mode_var.get()
+            CRAWL_CONFIG['concurrency'] = self.concurrency_var.get()
             
             SEO_CONFIG['title_min_length'] = self.title_min_var.get()
             SEO_CONFIG['title_max_length'] = self.title_max_var.get()
@@ -30,6 +30,8 @@ try:
     from utils.crawler import WebCrawler
     from utils.analyzer import SEOAnalyzer
     from utils.pdf_generator import PDFGenerator
+    from utils.batch import BatchCrawler, load_site_list
+    from utils.sharding import run_shard_worker
     
 except ImportError as e:
     print(f"Errore nell'importazione dei moduli: {e}")
@@ -382,6 +384,46 @@ def main():
         
         sys.exit(1)
 
+def run_batch(sites_file: str):
+    """
+    Analizza senza interfaccia grafica tutti i siti elencati in un file
+    (un URL per riga) e genera un report PDF per ciascuno
+    """
+    logger = setup_logging()
+    
+    try:
+        urls = load_site_list(sites_file)
+    except OSError as e:
+        print(f"Impossibile leggere l'elenco dei siti: {e}")
+        sys.exit(1)
+    
+    if not urls:
+        print(f"Nessun URL in {sites_file}")
+        sys.exit(1)
+    
+    def site_completed(result):
+        if result.ok:
+            logger.info(f"✓ {result.url}: {result.pages} pagine, punteggio {result.analysis.get('overall_score', 0)}/100")
+        else:
+            logger.error(f"✗ {result.url}: {result.error}")
+    
+    logger.info(f"Analisi batch di {len(urls)} siti ({BATCH_CONFIG['max_sites']} alla volta)")
+    batch = BatchCrawler(urls, callback=site_completed)
+    try:
+        results = batch.run()
+    except KeyboardInterrupt:
+        logger.info("Analisi batch interrotta dall'utente (Ctrl+C)")
+        batch.stop()
+        sys.exit(1)
+    
+    failed = [result for result in results if not result.ok]
+    logger.info(f"Analisi batch completata: {len(results) - len(failed)} siti analizzati, {len(failed)} con errori")
+    for result in results:
+        if result.report_path:
+            logger.info(f"Report {result.domain}: {result.report_path}")
+    
+    sys.exit(1 if failed else 0)
+
 def show_help():
     """
     Mostra informazioni di aiuto
@@ -392,6 +434,12 @@ SEO Analyzer Pro - Aiuto
 UTILIZZO:
     python main.py              Avvia l'applicazione con interfaccia grafica
     python main.py --help       Mostra questo aiuto
+    python main.py --batch FILE Analizza senza interfaccia grafica i siti elencati in FILE
+                                (un URL per riga) con un report PDF per sito
+    python main.py --shard-worker CODA SHARD
+                                Esegue uno shard di un crawling ripartito escluso da
+                                SHARD_CONFIG['local_shards'] (CODA: file della coda
+                                condivisa, sulla stessa macchina del coordinatore)
 
 REQUISITI:
     • Python 3.7+
@@ -434,6 +482,19 @@ if __name__ == "__main__":
         elif sys.argv[1] in ['--version', '-v']:
             print("SEO Analyzer Pro v1.0.0")
             sys.exit(0)
+        elif sys.argv[1] == '--batch':
+            if len(sys.argv) < 3:
+                print("Uso: python main.py --batch FILE")
+                sys.exit(1)
+            run_batch(sys.argv[2])
+        elif sys.argv[1] == '--shard-worker':
+            if len(sys.argv) < 4 or not sys.argv[3].isdigit():
+                print("Uso: python main.py --shard-worker CODA SHARD")
+                sys.exit(1)
+            setup_logging()
+            pages = run_shard_worker(SHARD_CONFIG['backend'], sys.argv[2], int(sys.argv[3]))
+            print(f"Shard {sys.argv[3]} completato: {pages} pagine")
+            sys.exit(0)
         else:
             print(f"Argomento sconosciuto: {sys.argv[1]}")
             print("Usa --help per vedere le opzioni disponibili")
@@ -5,29 +5,82 @@ Analizzatore SEO per i dati raccolti dal crawler
 import re
 import ssl
 import socket
+import json
+import hashlib
+from pathlib import Path
 from urllib.parse import urlparse
-from typing import Dict, List, Tuple, Any
+from typing import Dict, List, Tuple, Any, Optional, Union
 import statistics
 from datetime import datetime
 import logging
 
 from config import *
+from utils.sitemap import SitemapInventory, URLHashSet
+from utils.link_checker import LinkInventory
+from utils.html_extractor import EXTRACTION_VERSION
+from utils.page_aggregates import PageAggregates
+
+# Versione del formato dei risultati per pagina salvati tra un'analisi e l'altra
+PAGE_RESULT_VERSION = 4
+
+# Valori raggruppati per URL da cui si ricavano i duplicati (sezione, chiave)
+DUPLICATE_KEYS = (('titles', 'titles'), ('metas', 'metas'), ('technical', 'canonicals'))
 
 class SEOAnalyzer:
     """
     Classe principale per l'analisi SEO dei dati crawlati
+    
+    Ogni pagina viene valutata una sola volta (contatori e liste parziali per
+    sezione) e il risultato entra nei totali del sito (PageAggregates), da
+    cui le analisi ricavano sezioni, duplicati e stato di salute. Con
+    previous_state (vedi get_incremental_state) si riparte dai totali
+    dell'analisi precedente: le pagine con lo stesso content_hash non
+    richiedono alcun lavoro, quelle cambiate vengono tolte dai totali e
+    rivalutate, quelle scomparse tolte; solo i tempi di risposta, misurati a
+    ogni crawling, si ricalcolano per tutte. I totali di previous_state
+    vengono aggiornati sul posto (lo stato va usato per una sola analisi).
+    
+    Con sitemap (l'inventario raccolto dal crawler) l'analisi riporta anche
+    la copertura sitemap/crawling in 'sitemap_analysis'; con links (le
+    destinazioni verificate dal crawler) riporta i link interrotti.
+    
+    In streaming le pagine si aggiungono con add_page mentre il crawling è
+    in corso (vedi WebCrawler.iter_pages): ognuna viene valutata subito e i
+    suoi risultati sommati ai totali delle sezioni, così analyze_all deve
+    solo comporre le analisi del sito.
     """
     
-    def __init__(self, pages_data: List[Dict], domain: str):
-        self.pages_data = pages_data
+    def __init__(self, pages_data: Optional[List[Dict]] = None, domain: str = '',
+                 previous_state: Optional[Dict] = None, sitemap: Optional[SitemapInventory] = None,
+                 links: Optional[LinkInventory] = None):
+        self.pages_data: List[Dict] = list(pages_data) if pages_data else []
         self.domain = domain
+        self.previous_state = previous_state
+        self.sitemap = sitemap
+        self.links = links
         self.analysis_results = {}
+        self.reused_pages = 0
+        self.changed_pages = 0
         self.logger = logging.getLogger(__name__)
         
+        # Totali per sezione aggiornati a ogni pagina (vedi _merge_page_results), con il contributo di ogni URL
+        self._aggregates = PageAggregates(DUPLICATE_KEYS)
+        self._pages: Dict[str, Dict] = {}
+        # Tempi di risposta, ricalcolati a ogni analisi
+        self._timing = PageAggregates()
+        # Occorrenze di ogni URL in questa analisi e chiavi dei record, in ordine di pagina (vedi _page_key)
+        self._occurrences: Dict[str, int] = {}
+        self._seen: Dict[str, None] = {}
+        self._evaluated = 0
+        self._restore_state()
+    
     def analyze_all(self) -> Dict:
         """Esegue tutte le analisi SEO"""
         self.logger.info("Inizio analisi SEO completa")
         
+        # Valutazione delle singole pagine (riusata se invariata)
+        self._evaluate_pages()
+        
         # Analisi individuali
         self.analysis_results = {
             'title_analysis': self._analyze_titles(),
@@ -37,6 +90,7 @@ class SEOAnalyzer:
             'content_analysis': self._analyze_content(),
             'links_analysis': self._analyze_links(),
             'technical_analysis': self._analyze_technical(),
+            'sitemap_analysis': self._analyze_sitemap_coverage(),
             'performance_analysis': self._analyze_performance(),
             'mobile_analysis': self._analyze_mobile_friendly(),
             'ssl_analysis': self._analyze_ssl(),
@@ -59,69 +113,388 @@ class SEOAnalyzer:
         self.logger.info("Analisi SEO completata")
         return self.analysis_results
     
-    def _analyze_titles(self) -> Dict:
-        """Analizza i title tag"""
-        analysis = {
-            'total_pages': len(self.pages_data),
+    def add_page(self, page: Dict):
+        """Valuta una pagina appena raccolta e la aggiunge ai totali dell'analisi"""
+        self.pages_data.append(page)
+        self._add_page_result(page)
+    
+    def _add_page_result(self, page: Dict):
+        """Aggiorna i totali per sezione con una pagina (nessun lavoro se invariata rispetto all'analisi precedente)"""
+        url = page.get('url', '')
+        key = self._page_key(url)
+        self._evaluated += 1
+        self._seen[key] = None
+        self._timing.add(key, url, self._evaluate_page_timing(page))
+        
+        previous = self._pages.get(key)
+        if (previous and page.get('content_hash') and
+                previous['content_hash'] == page['content_hash'] and
+                previous['status_code'] == page.get('status_code', 200)):
+            # Il contributo della pagina è già nei totali ripresi dall'analisi precedente
+            self.reused_pages += 1
+            return
+        
+        if previous:
+            self._aggregates.remove(key, previous)
+        record = self._aggregates.add(key, url, self._evaluate_page(page))
+        record['content_hash'] = page.get('content_hash', '')
+        record['status_code'] = page.get('status_code', 200)
+        self._pages[key] = record
+        self.changed_pages += 1
+    
+    def _page_key(self, url: str) -> str:
+        """
+        Chiave del record di una pagina: l'URL, oppure 'URL (n)' per l'n-esima
+        occorrenza dello stesso URL, che conta come pagina a sé come in
+        un'analisi completa (gli spazi non compaiono negli URL)
+        """
+        occurrence = self._occurrences[url] = self._occurrences.get(url, 0) + 1
+        return url if occurrence == 1 else f'{url} ({occurrence})'
+    
+    def _evaluate_pages(self):
+        """Valuta le pagine non ancora valutate e toglie dai totali quelle non più presenti"""
+        for page in self.pages_data[self._evaluated:]:
+            self._add_page_result(page)
+        
+        # Pagine dell'analisi precedente non raggiunte da questo crawling
+        removed = [key for key in self._pages if key not in self._seen]
+        for key in removed:
+            self._aggregates.remove(key, self._pages.pop(key))
+        
+        if self.previous_state is not None:
+            self.logger.info(
+                f"Analisi incrementale: {self.changed_pages} pagine nuove o cambiate, "
+                f"{self.reused_pages} invariate, {len(removed)} rimosse"
+            )
+    
+    def _restore_state(self):
+        """Totali e pagine dell'analisi precedente, se compatibili con la configurazione attuale"""
+        if not self.previous_state:
+            return
+        if self.previous_state.get('fingerprint') != self._state_fingerprint():
+            self.logger.info("Configurazione SEO cambiata: analisi completa di tutte le pagine")
+            return
+        self._pages = dict(self.previous_state.get('pages', {}))
+        self._aggregates = PageAggregates(DUPLICATE_KEYS, self.previous_state.get('aggregates'))
+    
+    @staticmethod
+    def _state_fingerprint() -> str:
+        """Impronta delle soglie usate dalla valutazione delle pagine (e della versione dei campi estratti)"""
+        settings = json.dumps({'version': PAGE_RESULT_VERSION, 'extraction': EXTRACTION_VERSION, 'seo': SEO_CONFIG},
+                              sort_keys=True, default=str)
+        return hashlib.sha1(settings.encode('utf-8')).hexdigest()
+    
+    def get_incremental_state(self) -> Dict:
+        """Stato da passare come previous_state alla prossima analisi dello stesso sito"""
+        return {
+            'fingerprint': self._state_fingerprint(),
+            'pages': self._pages,
+            'aggregates': self._aggregates.to_state(),
+        }
+    
+    def _evaluate_page(self, page: Dict) -> Dict:
+        """
+        Valuta una pagina: per ogni sezione restituisce contatori (sommati)
+        e liste (concatenate) da aggregare. Dipende solo dal contenuto della
+        pagina, quindi è riutilizzabile finché il content_hash non cambia.
+        """
+        url = page.get('url', '')
+        
+        # Errori e redirect sono record senza contenuto: conta solo lo status
+        if page.get('status_code', 200) >= 300:
+            result = {
+                'detailed': self._evaluate_status_issues(page, url),
+                'site_health': self._evaluate_site_health(page),
+            }
+            return {
+                section: {key: value for key, value in partial.items() if value}
+                for section, partial in result.items()
+            }
+        
+        result = {
+            'pages': {'html_pages': 1},
+            'titles': self._evaluate_title(page, url),
+            'metas': self._evaluate_meta_description(page, url),
+            'headings': self._evaluate_headings(page, url),
+            'images': self._evaluate_images(page, url),
+            'content': self._evaluate_content(page, url),
+            'links': self._evaluate_links(page),
+            'technical': self._evaluate_technical(page),
+            'performance': self._evaluate_page_size(page),
+            'detailed': self._evaluate_detailed_issues(page, url),
+            'site_health': self._evaluate_site_health(page),
+        }
+        
+        # Contatori a zero e liste vuote non servono all'aggregazione
+        return {
+            section: {key: value for key, value in partial.items() if value}
+            for section, partial in result.items()
+        }
+    
+    def _evaluate_page_timing(self, page: Dict) -> Dict:
+        """Parte della valutazione legata al tempo di risposta (ricalcolata a ogni analisi)"""
+        url = page.get('url', '')
+        response_time = page.get('response_time', 0)
+        
+        # Le risposte di errore non entrano nei tempi delle pagine
+        if page.get('status_code', 200) >= 300:
+            return {}
+        
+        performance = {'response_times': [response_time]}
+        detailed = {}
+        
+        if response_time <= PERFORMANCE_CONFIG['max_response_time']:
+            performance['fast_pages'] = 1
+        else:
+            performance['slow_pages'] = 1
+            detailed['slow_pages'] = [{
+                'url': url,
+                'response_time': response_time,
+                'issue': f'Pagina lenta ({response_time:.2f}s)'
+            }]
+            detailed['warnings'] = [{
+                'type': 'slow_page',
+                'url': url,
+                'message': f'Tempo di caricamento elevato ({response_time:.2f}s)'
+            }]
+        
+        return {'performance': performance, 'detailed': detailed}
+    
+    def _evaluate_title(self, page: Dict, url: str) -> Dict:
+        """Title tag di una pagina"""
+        result = {
             'pages_with_title': 0,
             'pages_without_title': 0,
-            'duplicate_titles': [],
             'too_short_titles': [],
             'too_long_titles': [],
             'optimal_titles': [],
             'title_lengths': [],
-            'score': 0,
+            'issues': [],
+            'titles': []  # raggruppati per i duplicati (DUPLICATE_KEYS)
+        }
+        
+        title = page.get('title', '').strip()
+        if title:
+            result['pages_with_title'] = 1
+            title_length = len(title)
+            result['title_lengths'].append(title_length)
+            result['titles'].append(title)
+            
+            # Controlla lunghezza
+            entry = {'url': url, 'title': title, 'length': title_length}
+            if title_length < SEO_CONFIG['title_min_length']:
+                result['too_short_titles'].append(entry)
+            elif title_length > SEO_CONFIG['title_max_length']:
+                result['too_long_titles'].append(entry)
+            else:
+                result['optimal_titles'].append(entry)
+        else:
+            result['pages_without_title'] = 1
+            result['issues'].append(f"Pagina senza title: {url}")
+        
+        return result
+    
+    def _evaluate_meta_description(self, page: Dict, url: str) -> Dict:
+        """Meta description di una pagina"""
+        result = {
+            'pages_with_meta': 0,
+            'pages_without_meta': 0,
+            'too_short_metas': [],
+            'too_long_metas': [],
+            'optimal_metas': [],
+            'meta_lengths': [],
+            'issues': [],
+            'metas': []  # raggruppate per i duplicati (DUPLICATE_KEYS)
+        }
+        
+        meta_desc = page.get('meta_description', '').strip()
+        if meta_desc:
+            result['pages_with_meta'] = 1
+            meta_length = len(meta_desc)
+            result['meta_lengths'].append(meta_length)
+            result['metas'].append(meta_desc)
+            
+            # Controlla lunghezza
+            entry = {'url': url, 'meta': meta_desc, 'length': meta_length}
+            if meta_length < SEO_CONFIG['meta_description_min_length']:
+                result['too_short_metas'].append(entry)
+            elif meta_length > SEO_CONFIG['meta_description_max_length']:
+                result['too_long_metas'].append(entry)
+            else:
+                result['optimal_metas'].append(entry)
+        else:
+            result['pages_without_meta'] = 1
+            result['issues'].append(f"Pagina senza meta description: {url}")
+        
+        return result
+    
+    def _evaluate_headings(self, page: Dict, url: str) -> Dict:
+        """Struttura dei heading di una pagina"""
+        headings = page.get('headings', {})
+        result = {
+            'pages_with_h1': 0,
+            'pages_without_h1': 0,
+            'pages_multiple_h1': 0,
+            'issues': [],
+            # Numero di heading per livello (h1-h6)
+            'heading_counts': [[len(headings.get(f'h{level}', [])) for level in range(1, 7)]]
+        }
+        
+        h1_count = len(headings.get('h1', []))
+        if h1_count == 0:
+            result['pages_without_h1'] = 1
+            result['issues'].append(f"Pagina senza H1: {url}")
+        elif h1_count == 1:
+            result['pages_with_h1'] = 1
+        else:
+            result['pages_multiple_h1'] = 1
+            result['issues'].append(f"Pagina con {h1_count} H1: {url}")
+        
+        return result
+    
+    def _evaluate_images(self, page: Dict, url: str) -> Dict:
+        """Immagini e alt text di una pagina"""
+        result = {
+            'total_images': 0,
+            'images_with_alt': 0,
+            'images_without_alt': 0,
+            'images_with_empty_alt': 0,
+            'images_with_title': 0,
+            'alt_text_lengths': [],
+            'issues': []
+        }
+        
+        for img in page.get('images', []):
+            result['total_images'] += 1
+            alt_text = img.get('alt', '').strip()
+            title_text = img.get('title', '').strip()
+            
+            if alt_text:
+                result['images_with_alt'] += 1
+                result['alt_text_lengths'].append(len(alt_text))
+            elif alt_text == '':
+                result['images_with_empty_alt'] += 1
+            else:
+                result['images_without_alt'] += 1
+                result['issues'].append(f"Immagine senza alt: {img.get('src', '')} in {url}")
+            
+            if title_text:
+                result['images_with_title'] += 1
+        
+        return result
+    
+    def _evaluate_content(self, page: Dict, url: str) -> Dict:
+        """Quantità di contenuto di una pagina"""
+        content = page.get('content', {})
+        word_count = content.get('word_count', 0)
+        text_ratio = content.get('text_html_ratio', 0)
+        
+        result = {
+            'pages_low_word_count': 0,
+            'pages_good_word_count': 0,
+            'pages_low_text_ratio': 0,
+            'word_counts': [word_count],
+            'text_html_ratios': [text_ratio],
             'issues': []
         }
         
-        title_counts = {}
+        if word_count < SEO_CONFIG['min_word_count']:
+            result['pages_low_word_count'] = 1
+            result['issues'].append(f"Contenuto scarso ({word_count} parole): {url}")
+        else:
+            result['pages_good_word_count'] = 1
+        
+        if text_ratio < SEO_CONFIG['min_text_html_ratio']:
+            result['pages_low_text_ratio'] = 1
+            result['issues'].append(f"Rapporto testo/HTML basso ({text_ratio:.2f}): {url}")
         
-        for page in self.pages_data:
-            title = page.get('title', '').strip()
-            url = page.get('url', '')
+        return result
+    
+    def _evaluate_links(self, page: Dict) -> Dict:
+        """Link interni ed esterni di una pagina"""
+        result = {
+            'total_links': 0,
+            'internal_links': 0,
+            'external_links': 0,
+            'links_without_text': 0,
+            'pages_with_few_internal_links': 0
+        }
+        
+        for link in page.get('links', []):
+            result['total_links'] += 1
             
-            if title:
-                analysis['pages_with_title'] += 1
-                title_length = len(title)
-                analysis['title_lengths'].append(title_length)
-                
-                # Conta duplicati
-                if title in title_counts:
-                    title_counts[title].append(url)
-                else:
-                    title_counts[title] = [url]
-                
-                # Controlla lunghezza
-                if title_length < SEO_CONFIG['title_min_length']:
-                    analysis['too_short_titles'].append({
-                        'url': url,
-                        'title': title,
-                        'length': title_length
-                    })
-                elif title_length > SEO_CONFIG['title_max_length']:
-                    analysis['too_long_titles'].append({
-                        'url': url,
-                        'title': title,
-                        'length': title_length
-                    })
-                else:
-                    analysis['optimal_titles'].append({
-                        'url': url,
-                        'title': title,
-                        'length': title_length
-                    })
+            if link.get('is_external', False):
+                result['external_links'] += 1
+            else:
+                result['internal_links'] += 1
+            
+            if not link.get('text', '').strip():
+                result['links_without_text'] += 1
+        
+        if result['internal_links'] < 3:  # Soglia minima di link interni
+            result['pages_with_few_internal_links'] = 1
+        
+        return result
+    
+    def _evaluate_technical(self, page: Dict) -> Dict:
+        """Canonical, lingua e schema markup di una pagina"""
+        canonical = page.get('canonical_url', '').strip()
+        
+        return {
+            'pages_with_canonical': 1 if canonical else 0,
+            'pages_without_canonical': 0 if canonical else 1,
+            'pages_with_lang': 1 if page.get('lang', '').strip() else 0,
+            'pages_without_lang': 0 if page.get('lang', '').strip() else 1,
+            'pages_with_schema': 1 if page.get('schema_markup', []) else 0,
+            'pages_without_schema': 0 if page.get('schema_markup', []) else 1,
+            'canonicals': [canonical] if canonical else []
+        }
+    
+    def _evaluate_page_size(self, page: Dict) -> Dict:
+        """Dimensione dell'HTML di una pagina"""
+        html_size = page.get('html_size', 0)
+        return {
+            'large_pages': 1 if html_size > SEO_CONFIG['max_page_size_mb'] * 1024 * 1024 else 0,
+            'page_sizes': [html_size]
+        }
+    
+    def _merge_page_results(self, section: str) -> Dict:
+        """Contatori sommati e liste concatenate di una sezione, valutazione delle pagine e tempi di risposta"""
+        merged = self._aggregates.section(section)
+        for key, value in self._timing.section(section).items():
+            if isinstance(value, list):
+                merged[key] = merged.get(key, []) + value
             else:
-                analysis['pages_without_title'] += 1
-                analysis['issues'].append(f"Pagina senza title: {url}")
+                merged[key] = merged.get(key, 0) + value
+        return merged
+    
+    def _html_pages(self) -> int:
+        """Pagine con contenuto analizzato (esclusi i record di errori e redirect)"""
+        return self._aggregates.totals.get('pages', {}).get('html_pages', 0)
+    
+    def _analyze_titles(self) -> Dict:
+        """Analizza i title tag"""
+        merged = self._merge_page_results('titles')
+        analysis = {
+            'total_pages': self._html_pages(),
+            'pages_with_title': merged.get('pages_with_title', 0),
+            'pages_without_title': merged.get('pages_without_title', 0),
+            'duplicate_titles': [],
+            'too_short_titles': merged.get('too_short_titles', []),
+            'too_long_titles': merged.get('too_long_titles', []),
+            'optimal_titles': merged.get('optimal_titles', []),
+            'title_lengths': merged.get('title_lengths', []),
+            'score': 0,
+            'issues': merged.get('issues', [])
+        }
         
         # Trova duplicati
-        for title, urls in title_counts.items():
-            if len(urls) > 1:
-                analysis['duplicate_titles'].append({
-                    'title': title,
-                    'urls': urls,
-                    'count': len(urls)
-                })
+        for title, urls in self._aggregates.duplicates('titles', 'titles'):
+            analysis['duplicate_titles'].append({
+                'title': title,
+                'urls': urls,
+                'count': len(urls)
+            })
         
         # Calcola il punteggio
         if analysis['total_pages'] > 0:
@@ -135,67 +508,27 @@ class SEOAnalyzer:
     
     def _analyze_meta_descriptions(self) -> Dict:
         """Analizza le meta description"""
+        merged = self._merge_page_results('metas')
         analysis = {
-            'total_pages': len(self.pages_data),
-            'pages_with_meta': 0,
-            'pages_without_meta': 0,
+            'total_pages': self._html_pages(),
+            'pages_with_meta': merged.get('pages_with_meta', 0),
+            'pages_without_meta': merged.get('pages_without_meta', 0),
             'duplicate_metas': [],
-            'too_short_metas': [],
-            'too_long_metas': [],
-            'optimal_metas': [],
-            'meta_lengths': [],
+            'too_short_metas': merged.get('too_short_metas', []),
+            'too_long_metas': merged.get('too_long_metas', []),
+            'optimal_metas': merged.get('optimal_metas', []),
+            'meta_lengths': merged.get('meta_lengths', []),
             'score': 0,
-            'issues': []
+            'issues': merged.get('issues', [])
         }
         
-        meta_counts = {}
-        
-        for page in self.pages_data:
-            meta_desc = page.get('meta_description', '').strip()
-            url = page.get('url', '')
-            
-            if meta_desc:
-                analysis['pages_with_meta'] += 1
-                meta_length = len(meta_desc)
-                analysis['meta_lengths'].append(meta_length)
-                
-                # Conta duplicati
-                if meta_desc in meta_counts:
-                    meta_counts[meta_desc].append(url)
-                else:
-                    meta_counts[meta_desc] = [url]
-                
-                # Controlla lunghezza
-                if meta_length < SEO_CONFIG['meta_description_min_length']:
-                    analysis['too_short_metas'].append({
-                        'url': url,
-                        'meta': meta_desc,
-                        'length': meta_length
-                    })
-                elif meta_length > SEO_CONFIG['meta_description_max_length']:
-                    analysis['too_long_metas'].append({
-                        'url': url,
-                        'meta': meta_desc,
-                        'length': meta_length
-                    })
-                else:
-                    analysis['optimal_metas'].append({
-                        'url': url,
-                        'meta': meta_desc,
-                        'length': meta_length
-                    })
-            else:
-                analysis['pages_without_meta'] += 1
-                analysis['issues'].append(f"Pagina senza meta description: {url}")
-        
         # Trova duplicati
-        for meta, urls in meta_counts.items():
-            if len(urls) > 1:
-                analysis['duplicate_metas'].append({
-                    'meta': meta,
-                    'urls': urls,
-                    'count': len(urls)
-                })
+        for meta, urls in self._aggregates.duplicates('metas', 'metas'):
+            analysis['duplicate_metas'].append({
+                'meta': meta,
+                'urls': urls,
+                'count': len(urls)
+            })
         
         # Calcola il punteggio
         if analysis['total_pages'] > 0:
@@ -209,38 +542,22 @@ class SEOAnalyzer:
     
     def _analyze_headings(self) -> Dict:
         """Analizza la struttura dei heading"""
+        merged = self._merge_page_results('headings')
+        heading_counts = merged.get('heading_counts', [])
         analysis = {
-            'total_pages': len(self.pages_data),
-            'pages_with_h1': 0,
-            'pages_without_h1': 0,
-            'pages_multiple_h1': 0,
+            'total_pages': self._html_pages(),
+            'pages_with_h1': merged.get('pages_with_h1', 0),
+            'pages_without_h1': merged.get('pages_without_h1', 0),
+            'pages_multiple_h1': merged.get('pages_multiple_h1', 0),
             'heading_structure': {},
-            'issues': [],
+            'issues': merged.get('issues', []),
             'score': 0
         }
         
-        for page in self.pages_data:
-            headings = page.get('headings', {})
-            url = page.get('url', '')
-            
-            h1_count = len(headings.get('h1', []))
-            
-            if h1_count == 0:
-                analysis['pages_without_h1'] += 1
-                analysis['issues'].append(f"Pagina senza H1: {url}")
-            elif h1_count == 1:
-                analysis['pages_with_h1'] += 1
-            else:
-                analysis['pages_multiple_h1'] += 1
-                analysis['issues'].append(f"Pagina con {h1_count} H1: {url}")
-            
-            # Analizza struttura
+        # Struttura: numero di heading per livello, pagina per pagina
+        if heading_counts:
             for level in range(1, 7):
-                h_key = f'h{level}'
-                count = len(headings.get(h_key, []))
-                if h_key not in analysis['heading_structure']:
-                    analysis['heading_structure'][h_key] = []
-                analysis['heading_structure'][h_key].append(count)
+                analysis['heading_structure'][f'h{level}'] = [counts[level - 1] for counts in heading_counts]
         
         # Calcola il punteggio
         if analysis['total_pages'] > 0:
@@ -253,38 +570,18 @@ class SEOAnalyzer:
     
     def _analyze_images(self) -> Dict:
         """Analizza le immagini e gli alt text"""
+        merged = self._merge_page_results('images')
         analysis = {
-            'total_images': 0,
-            'images_with_alt': 0,
-            'images_without_alt': 0,
-            'images_with_empty_alt': 0,
-            'images_with_title': 0,
-            'alt_text_lengths': [],
-            'issues': [],
+            'total_images': merged.get('total_images', 0),
+            'images_with_alt': merged.get('images_with_alt', 0),
+            'images_without_alt': merged.get('images_without_alt', 0),
+            'images_with_empty_alt': merged.get('images_with_empty_alt', 0),
+            'images_with_title': merged.get('images_with_title', 0),
+            'alt_text_lengths': merged.get('alt_text_lengths', []),
+            'issues': merged.get('issues', []),
             'score': 0
         }
         
-        for page in self.pages_data:
-            images = page.get('images', [])
-            url = page.get('url', '')
-            
-            for img in images:
-                analysis['total_images'] += 1
-                alt_text = img.get('alt', '').strip()
-                title_text = img.get('title', '').strip()
-                
-                if alt_text:
-                    analysis['images_with_alt'] += 1
-                    analysis['alt_text_lengths'].append(len(alt_text))
-                elif alt_text == '':
-                    analysis['images_with_empty_alt'] += 1
-                else:
-                    analysis['images_without_alt'] += 1
-                    analysis['issues'].append(f"Immagine senza alt: {img.get('src', '')} in {url}")
-                
-                if title_text:
-                    analysis['images_with_title'] += 1
-        
         # Calcola il punteggio
         if analysis['total_images'] > 0:
             alt_ratio = analysis['images_with_alt'] / analysis['total_images']
@@ -296,39 +593,20 @@ class SEOAnalyzer:
     
     def _analyze_content(self) -> Dict:
         """Analizza la qualità del contenuto"""
+        merged = self._merge_page_results('content')
         analysis = {
-            'total_pages': len(self.pages_data),
-            'pages_low_word_count': 0,
-            'pages_good_word_count': 0,
-            'pages_low_text_ratio': 0,
-            'word_counts': [],
-            'text_html_ratios': [],
+            'total_pages': self._html_pages(),
+            'pages_low_word_count': merged.get('pages_low_word_count', 0),
+            'pages_good_word_count': merged.get('pages_good_word_count', 0),
+            'pages_low_text_ratio': merged.get('pages_low_text_ratio', 0),
+            'word_counts': merged.get('word_counts', []),
+            'text_html_ratios': merged.get('text_html_ratios', []),
             'average_word_count': 0,
             'average_text_ratio': 0,
-            'issues': [],
+            'issues': merged.get('issues', []),
             'score': 0
         }
         
-        for page in self.pages_data:
-            content = page.get('content', {})
-            url = page.get('url', '')
-            
-            word_count = content.get('word_count', 0)
-            text_ratio = content.get('text_html_ratio', 0)
-            
-            analysis['word_counts'].append(word_count)
-            analysis['text_html_ratios'].append(text_ratio)
-            
-            if word_count < SEO_CONFIG['min_word_count']:
-                analysis['pages_low_word_count'] += 1
-                analysis['issues'].append(f"Contenuto scarso ({word_count} parole): {url}")
-            else:
-                analysis['pages_good_word_count'] += 1
-            
-            if text_ratio < SEO_CONFIG['min_text_html_ratio']:
-                analysis['pages_low_text_ratio'] += 1
-                analysis['issues'].append(f"Rapporto testo/HTML basso ({text_ratio:.2f}): {url}")
-        
         # Calcola medie
         if analysis['word_counts']:
             analysis['average_word_count'] = statistics.mean(analysis['word_counts'])
@@ -346,48 +624,27 @@ class SEOAnalyzer:
     
     def _analyze_links(self) -> Dict:
         """Analizza i link interni ed esterni"""
+        merged = self._merge_page_results('links')
         analysis = {
-            'total_links': 0,
-            'internal_links': 0,
-            'external_links': 0,
-            'broken_links': [],
-            'links_without_text': 0,
-            'pages_with_few_internal_links': 0,
+            'total_links': merged.get('total_links', 0),
+            'internal_links': merged.get('internal_links', 0),
+            'external_links': merged.get('external_links', 0),
+            'unique_link_targets': len(self.links) if self.links else 0,
+            'broken_links': self.links.broken_links() if self.links else [],
+            'links_without_text': merged.get('links_without_text', 0),
+            'pages_with_few_internal_links': merged.get('pages_with_few_internal_links', 0),
             'average_internal_links_per_page': 0,
             'score': 0
         }
         
-        all_internal_links = []
-        
-        for page in self.pages_data:
-            links = page.get('links', [])
-            url = page.get('url', '')
-            
-            page_internal_links = 0
-            
-            for link in links:
-                analysis['total_links'] += 1
-                
-                if link.get('is_external', False):
-                    analysis['external_links'] += 1
-                else:
-                    analysis['internal_links'] += 1
-                    page_internal_links += 1
-                    all_internal_links.append(link.get('url'))
-                
-                if not link.get('text', '').strip():
-                    analysis['links_without_text'] += 1
-            
-            if page_internal_links < 3:  # Soglia minima di link interni
-                analysis['pages_with_few_internal_links'] += 1
-        
         # Calcola media link interni per pagina
-        if len(self.pages_data) > 0:
-            analysis['average_internal_links_per_page'] = analysis['internal_links'] / len(self.pages_data)
+        html_pages = self._html_pages()
+        if html_pages > 0:
+            analysis['average_internal_links_per_page'] = analysis['internal_links'] / html_pages
         
         # Calcola il punteggio
         internal_ratio = analysis['internal_links'] / max(1, analysis['total_links'])
-        few_links_penalty = analysis['pages_with_few_internal_links'] / max(1, len(self.pages_data))
+        few_links_penalty = analysis['pages_with_few_internal_links'] / max(1, html_pages)
         
         analysis['score'] = max(0, int((internal_ratio - few_links_penalty) * 100))
         
@@ -395,56 +652,27 @@ class SEOAnalyzer:
     
     def _analyze_technical(self) -> Dict:
         """Analizza aspetti tecnici"""
+        merged = self._merge_page_results('technical')
         analysis = {
-            'pages_with_canonical': 0,
-            'pages_without_canonical': 0,
-            'pages_with_lang': 0,
-            'pages_without_lang': 0,
-            'pages_with_schema': 0,
-            'pages_without_schema': 0,
+            'pages_with_canonical': merged.get('pages_with_canonical', 0),
+            'pages_without_canonical': merged.get('pages_without_canonical', 0),
+            'pages_with_lang': merged.get('pages_with_lang', 0),
+            'pages_without_lang': merged.get('pages_without_lang', 0),
+            'pages_with_schema': merged.get('pages_with_schema', 0),
+            'pages_without_schema': merged.get('pages_without_schema', 0),
             'duplicate_canonicals': [],
             'score': 0
         }
         
-        canonical_counts = {}
-        
-        for page in self.pages_data:
-            canonical = page.get('canonical_url', '').strip()
-            lang = page.get('lang', '').strip()
-            schema = page.get('schema_markup', [])
-            
-            # Canonical
-            if canonical:
-                analysis['pages_with_canonical'] += 1
-                if canonical in canonical_counts:
-                    canonical_counts[canonical] += 1
-                else:
-                    canonical_counts[canonical] = 1
-            else:
-                analysis['pages_without_canonical'] += 1
-            
-            # Lang
-            if lang:
-                analysis['pages_with_lang'] += 1
-            else:
-                analysis['pages_without_lang'] += 1
-            
-            # Schema
-            if schema:
-                analysis['pages_with_schema'] += 1
-            else:
-                analysis['pages_without_schema'] += 1
-        
         # Trova canonical duplicati
-        for canonical, count in canonical_counts.items():
-            if count > 1:
-                analysis['duplicate_canonicals'].append({
-                    'canonical': canonical,
-                    'count': count
-                })
+        for canonical, urls in self._aggregates.duplicates('technical', 'canonicals'):
+            analysis['duplicate_canonicals'].append({
+                'canonical': canonical,
+                'count': len(urls)
+            })
         
         # Calcola il punteggio
-        total_pages = len(self.pages_data)
+        total_pages = self._html_pages()
         if total_pages > 0:
             canonical_score = analysis['pages_with_canonical'] / total_pages
             lang_score = analysis['pages_with_lang'] / total_pages
@@ -456,33 +684,19 @@ class SEOAnalyzer:
     
     def _analyze_performance(self) -> Dict:
         """Analizza le performance"""
+        merged = self._merge_page_results('performance')
         analysis = {
-            'total_pages': len(self.pages_data),
-            'fast_pages': 0,
-            'slow_pages': 0,
-            'large_pages': 0,
-            'response_times': [],
-            'page_sizes': [],
+            'total_pages': self._html_pages(),
+            'fast_pages': merged.get('fast_pages', 0),
+            'slow_pages': merged.get('slow_pages', 0),
+            'large_pages': merged.get('large_pages', 0),
+            'response_times': merged.get('response_times', []),
+            'page_sizes': merged.get('page_sizes', []),
             'average_response_time': 0,
             'average_page_size': 0,
             'score': 0
         }
         
-        for page in self.pages_data:
-            response_time = page.get('response_time', 0)
-            html_size = page.get('html_size', 0)
-            
-            analysis['response_times'].append(response_time)
-            analysis['page_sizes'].append(html_size)
-            
-            if response_time <= PERFORMANCE_CONFIG['max_response_time']:
-                analysis['fast_pages'] += 1
-            else:
-                analysis['slow_pages'] += 1
-            
-            if html_size > SEO_CONFIG['max_page_size_mb'] * 1024 * 1024:
-                analysis['large_pages'] += 1
-        
         # Calcola medie
         if analysis['response_times']:
             analysis['average_response_time'] = statistics.mean(analysis['response_times'])
@@ -538,13 +752,353 @@ class SEOAnalyzer:
                     analysis['ssl_expires'] = cert.get('notAfter')
                 
                 ssock.close()
-                
+        
         except Exception as e:
             self.logger.warning(f"Errore verifica SSL: {e}")
             analysis['score'] = 0
         
         return analysis
     
+    def _evaluate_detailed_issues(self, page: Dict, url: str) -> Dict:
+        """Problemi specifici di una pagina (errori, avvertimenti, avvisi)"""
+        detailed = {
+            'errors': [],
+            'warnings': [],
+            'late_warnings': [],  # avvertimenti successivi a quello sul tempo di risposta
+            'notices': [],
+            'missing_h1_pages': [],
+            'missing_h2_pages': [],
+            'missing_h3_pages': [],
+            'images_without_alt': [],
+            'images_without_title': [],
+            'pages_without_title': [],
+            'pages_without_meta': [],
+            'low_word_count_pages': [],
+            'large_html_pages': [],
+            'pages_without_lang': [],
+            'pages_without_canonical': [],
+            'pages_without_schema': [],
+        }
+        
+        title = page.get('title', '').strip()
+        meta_desc = page.get('meta_description', '').strip()
+        headings = page.get('headings', {})
+        images = page.get('images', [])
+        content = page.get('content', {})
+        html_size = page.get('html_size', 0)
+        canonical = page.get('canonical_url', '').strip()
+        lang = page.get('lang', '').strip()
+        schema = page.get('schema_markup', [])
+        
+        # ERRORI (Problemi gravi)
+        if not title:
+            detailed['pages_without_title'].append({
+                'url': url,
+                'issue': 'Pagina senza title tag'
+            })
+            detailed['errors'].append({
+                'type': 'missing_title',
+                'url': url,
+                'message': 'Title tag mancante'
+            })
+        
+        # AVVERTIMENTI (Problemi da correggere)
+        if not meta_desc:
+            detailed['pages_without_meta'].append({
+                'url': url,
+                'issue': 'Meta description mancante'
+            })
+            detailed['warnings'].append({
+                'type': 'missing_meta',
+                'url': url,
+                'message': 'Meta description mancante'
+            })
+        
+        # Analisi headings
+        h1_count = len(headings.get('h1', []))
+        h2_count = len(headings.get('h2', []))
+        h3_count = len(headings.get('h3', []))
+        
+        if h1_count == 0:
+            detailed['missing_h1_pages'].append({
+                'url': url,
+                'issue': 'H1 mancante'
+            })
+            detailed['warnings'].append({
+                'type': 'missing_h1',
+                'url': url,
+                'message': 'Tag H1 mancante'
+            })
+        elif h1_count > 1:
+            detailed['warnings'].append({
+                'type': 'multiple_h1',
+                'url': url,
+                'message': f'Multipli H1 trovati ({h1_count})'
+            })
+        
+        if h2_count == 0:
+            detailed['missing_h2_pages'].append({
+                'url': url,
+                'issue': 'H2 mancante'
+            })
+            detailed['notices'].append({
+                'type': 'missing_h2',
+                'url': url,
+                'message': 'Nessun tag H2 trovato'
+            })
+        
+        if h3_count == 0:
+            detailed['missing_h3_pages'].append({
+                'url': url,
+                'issue': 'H3 mancante'
+            })
+            detailed['notices'].append({
+                'type': 'missing_h3',
+                'url': url,
+                'message': 'Nessun tag H3 trovato'
+            })
+        
+        # Analisi immagini
+        for img in images:
+            img_src = img.get('src', '')
+            img_alt = img.get('alt', '').strip()
+            img_title = img.get('title', '').strip()
+            
+            if not img_alt:
+                detailed['images_without_alt'].append({
+                    'url': url,
+                    'image_src': img_src,
+                    'issue': 'Alt text mancante'
+                })
+                detailed['warnings'].append({
+                    'type': 'missing_alt',
+                    'url': url,
+                    'image': img_src,
+                    'message': 'Immagine senza alt text'
+                })
+            
+            if not img_title:
+                detailed['images_without_title'].append({
+                    'url': url,
+                    'image_src': img_src,
+                    'issue': 'Title mancante'
+                })
+                detailed['notices'].append({
+                    'type': 'missing_img_title',
+                    'url': url,
+                    'image': img_src,
+                    'message': 'Immagine senza attributo title'
+                })
+        
+        # Contenuto
+        word_count = content.get('word_count', 0)
+        if word_count < SEO_CONFIG['min_word_count']:
+            detailed['low_word_count_pages'].append({
+                'url': url,
+                'word_count': word_count,
+                'issue': f'Contenuto scarso ({word_count} parole)'
+            })
+            detailed['warnings'].append({
+                'type': 'low_content',
+                'url': url,
+                'message': f'Contenuto insufficiente ({word_count} parole)'
+            })
+        
+        # Performance (il tempo di risposta è valutato in _evaluate_page_timing)
+        if html_size > SEO_CONFIG['max_page_size_mb'] * 1024 * 1024:
+            detailed['large_html_pages'].append({
+                'url': url,
+                'size_mb': html_size / (1024 * 1024),
+                'issue': f'HTML troppo grande ({html_size / (1024 * 1024):.1f}MB)'
+            })
+            detailed['late_warnings'].append({
+                'type': 'large_page',
+                'url': url,
+                'message': f'Pagina troppo pesante ({html_size / (1024 * 1024):.1f}MB)'
+            })
+        
+        # Aspetti tecnici
+        if not canonical:
+            detailed['pages_without_canonical'].append({
+                'url': url,
+                'issue': 'URL canonico mancante'
+            })
+            detailed['notices'].append({
+                'type': 'missing_canonical',
+                'url': url,
+                'message': 'URL canonico non specificato'
+            })
+        
+        if not lang:
+            detailed['pages_without_lang'].append({
+                'url': url,
+                'issue': 'Attributo lang mancante'
+            })
+            detailed['notices'].append({
+                'type': 'missing_lang',
+                'url': url,
+                'message': 'Lingua della pagina non specificata'
+            })
+        
+        if not schema:
+            detailed['pages_without_schema'].append({
+                'url': url,
+                'issue': 'Schema markup mancante'
+            })
+            detailed['notices'].append({
+                'type': 'missing_schema',
+                'url': url,
+                'message': 'Dati strutturati non presenti'
+            })
+        
+        return detailed
+    
+    def _evaluate_status_issues(self, page: Dict, url: str) -> Dict:
+        """Problemi di una risposta di errore o di un redirect (record senza contenuto)"""
+        detailed = {
+            'errors': [],
+            'warnings': [],
+            'status_4xx_pages': [],
+            'status_5xx_pages': [],
+            'redirect_chains': [],
+        }
+        status_code = page.get('status_code', 200)
+        
+        if status_code >= 500:
+            detailed['status_5xx_pages'].append({
+                'url': url,
+                'status_code': status_code,
+                'issue': f'Errore server {status_code}'
+            })
+            detailed['errors'].append({
+                'type': 'server_error',
+                'url': url,
+                'message': f'Errore server {status_code}'
+            })
+        
+        if status_code >= 400 and status_code < 500:
+            detailed['status_4xx_pages'].append({
+                'url': url,
+                'status_code': status_code,
+                'issue': f'Errore client {status_code}'
+            })
+            detailed['errors'].append({
+                'type': 'client_error',
+                'url': url,
+                'message': f'Errore client {status_code}'
+            })
+        
+        # Un singolo redirect è normale: si segnalano catene (più passaggi) e loop
+        chain = page.get('redirect_chain', [])
+        if page.get('redirect_loop'):
+            detailed['redirect_chains'].append({
+                'url': url,
+                'type': 'Loop di redirect',
+                'chain': [hop['url'] for hop in chain],
+                'issue': f'Troppi redirect ({len(chain)} passaggi)'
+            })
+            detailed['errors'].append({
+                'type': 'redirect_loop',
+                'url': url,
+                'message': 'Loop di redirect o catena troppo lunga'
+            })
+        elif len(chain) > 1:
+            detailed['redirect_chains'].append({
+                'url': url,
+                'type': f'Catena di {len(chain)} redirect',
+                'chain': [hop['url'] for hop in chain] + [page.get('redirect_target', '')],
+                'issue': f'Catena di {len(chain)} redirect'
+            })
+            detailed['warnings'].append({
+                'type': 'redirect_chain',
+                'url': url,
+                'message': f'Catena di {len(chain)} redirect verso {page.get("redirect_target", "")}'
+            })
+        
+        return detailed
+    
+    def _evaluate_site_health(self, page: Dict) -> Dict:
+        """Contributo di una pagina allo stato di salute del sito"""
+        result = {
+            'healthy': 0,
+            'broken': 0,
+            'problematic': 0,
+            'redirected': 0,
+            'critical_issues': 0,  # Errori gravi
+            'warning_issues': 0,   # Avvertimenti
+            'minor_issues': 0      # Avvisi minori
+        }
+        
+        status_code = page.get('status_code', 200)
+        title = page.get('title', '').strip()
+        meta = page.get('meta_description', '').strip()
+        word_count = page.get('content', {}).get('word_count', 0)
+        headings = page.get('headings', {})
+        images = page.get('images', [])
+        
+        # Classifica stato pagina
+        page_issues = 0
+        
+        # Errori gravi (influenzano molto la salute)
+        if status_code >= 400:
+            result['broken'] = 1
+            if status_code >= 500:
+                result['critical_issues'] += 3  # Peso alto per errori server
+            else:
+                result['critical_issues'] += 2  # Peso medio per errori client
+            return result
+        elif status_code >= 300:
+            result['redirected'] = 1
+            result['warning_issues'] += 1
+            return result
+        
+        # Problemi SEO che influenzano la salute
+        if not title:
+            result['critical_issues'] += 2
+            page_issues += 2
+        
+        if not meta:
+            result['warning_issues'] += 1
+            page_issues += 1
+        
+        if word_count < SEO_CONFIG['min_word_count']:
+            result['warning_issues'] += 1
+            page_issues += 1
+        
+        # Problemi strutturali
+        h1_count = len(headings.get('h1', []))
+        if h1_count == 0:
+            result['warning_issues'] += 1
+            page_issues += 1
+        elif h1_count > 1:
+            result['warning_issues'] += 1
+            page_issues += 1
+        
+        # Problemi immagini (peso minore)
+        for img in images:
+            if not img.get('alt', '').strip():
+                result['warning_issues'] += 1
+            if not img.get('title', '').strip():
+                result['minor_issues'] += 1
+        
+        # Schema markup e aspetti tecnici minori
+        if not page.get('canonical_url', '').strip():
+            result['minor_issues'] += 1
+        
+        if not page.get('lang', '').strip():
+            result['minor_issues'] += 1
+        
+        if not page.get('schema_markup', []):
+            result['minor_issues'] += 1
+        
+        # Classifica la pagina (con problemi minori resta comunque sana)
+        if page_issues >= 3:
+            result['problematic'] = 1
+        else:
+            result['healthy'] = 1
+        
+        return result
+    
     def _analyze_detailed_issues(self) -> Dict:
         """Analisi dettagliata dei problemi specifici"""
         detailed = {
@@ -566,284 +1120,104 @@ class SEOAnalyzer:
             'pages_without_viewport': [],
             'pages_without_lang': [],
             'pages_without_canonical': [],
-            'broken_links': [],
+            'broken_links': self.links.broken_links() if self.links else [],
             'status_4xx_pages': [],
             'status_5xx_pages': [],
             'pages_without_schema': [],
             'redirect_chains': [],
             'mixed_content_pages': [],
+            'sitemap_xml_errors': list(self.sitemap.errors) if self.sitemap else [],
+            'large_sitemap_files': list(self.sitemap.oversized) if self.sitemap else [],
         }
         
-        # Analizza ogni pagina per problemi specifici
-        for page in self.pages_data:
-            url = page.get('url', '')
-            title = page.get('title', '').strip()
-            meta_desc = page.get('meta_description', '').strip()
-            headings = page.get('headings', {})
-            images = page.get('images', [])
-            content = page.get('content', {})
-            status_code = page.get('status_code', 200)
-            html_size = page.get('html_size', 0)
-            response_time = page.get('response_time', 0)
-            canonical = page.get('canonical_url', '').strip()
-            lang = page.get('lang', '').strip()
-            schema = page.get('schema_markup', [])
-            
-            # ERRORI (Problemi gravi)
-            if not title:
-                detailed['pages_without_title'].append({
-                    'url': url,
-                    'issue': 'Pagina senza title tag'
-                })
-                detailed['errors'].append({
-                    'type': 'missing_title',
-                    'url': url,
-                    'message': 'Title tag mancante'
-                })
-            
-            if status_code >= 500:
-                detailed['status_5xx_pages'].append({
-                    'url': url,
-                    'status_code': status_code,
-                    'issue': f'Errore server {status_code}'
-                })
-                detailed['errors'].append({
-                    'type': 'server_error',
-                    'url': url,
-                    'message': f'Errore server {status_code}'
-                })
-            
-            if status_code >= 400 and status_code < 500:
-                detailed['status_4xx_pages'].append({
-                    'url': url,
-                    'status_code': status_code,
-                    'issue': f'Errore client {status_code}'
-                })
-                detailed['errors'].append({
-                    'type': 'client_error',
-                    'url': url,
-                    'message': f'Errore client {status_code}'
-                })
-            
-            # AVVERTIMENTI (Problemi da correggere)
-            if not meta_desc:
-                detailed['pages_without_meta'].append({
-                    'url': url,
-                    'issue': 'Meta description mancante'
-                })
-                detailed['warnings'].append({
-                    'type': 'missing_meta',
-                    'url': url,
-                    'message': 'Meta description mancante'
-                })
-            
-            # Analisi headings
-            h1_count = len(headings.get('h1', []))
-            h2_count = len(headings.get('h2', []))
-            h3_count = len(headings.get('h3', []))
-            
-            if h1_count == 0:
-                detailed['missing_h1_pages'].append({
-                    'url': url,
-                    'issue': 'H1 mancante'
-                })
-                detailed['warnings'].append({
-                    'type': 'missing_h1',
-                    'url': url,
-                    'message': 'Tag H1 mancante'
-                })
-            elif h1_count > 1:
-                detailed['warnings'].append({
-                    'type': 'multiple_h1',
-                    'url': url,
-                    'message': f'Multipli H1 trovati ({h1_count})'
-                })
-            
-            if h2_count == 0:
-                detailed['missing_h2_pages'].append({
-                    'url': url,
-                    'issue': 'H2 mancante'
-                })
-                detailed['notices'].append({
-                    'type': 'missing_h2',
-                    'url': url,
-                    'message': 'Nessun tag H2 trovato'
-                })
-            
-            if h3_count == 0:
-                detailed['missing_h3_pages'].append({
-                    'url': url,
-                    'issue': 'H3 mancante'
-                })
-                detailed['notices'].append({
-                    'type': 'missing_h3',
-                    'url': url,
-                    'message': 'Nessun tag H3 trovato'
-                })
-            
-            # Analisi immagini
-            for img in images:
-                img_src = img.get('src', '')
-                img_alt = img.get('alt', '').strip()
-                img_title = img.get('title', '').strip()
-                
-                if not img_alt:
-                    detailed['images_without_alt'].append({
-                        'url': url,
-                        'image_src': img_src,
-                        'issue': 'Alt text mancante'
-                    })
-                    detailed['warnings'].append({
-                        'type': 'missing_alt',
-                        'url': url,
-                        'image': img_src,
-                        'message': 'Immagine senza alt text'
-                    })
-                
-                if not img_title:
-                    detailed['images_without_title'].append({
-                        'url': url,
-                        'image_src': img_src,
-                        'issue': 'Title mancante'
-                    })
-                    detailed['notices'].append({
-                        'type': 'missing_img_title',
-                        'url': url,
-                        'image': img_src,
-                        'message': 'Immagine senza attributo title'
-                    })
-            
-            # Contenuto
-            word_count = content.get('word_count', 0)
-            if word_count < SEO_CONFIG['min_word_count']:
-                detailed['low_word_count_pages'].append({
-                    'url': url,
-                    'word_count': word_count,
-                    'issue': f'Contenuto scarso ({word_count} parole)'
-                })
-                detailed['warnings'].append({
-                    'type': 'low_content',
-                    'url': url,
-                    'message': f'Contenuto insufficiente ({word_count} parole)'
-                })
-            
-            # Performance
-            if response_time > PERFORMANCE_CONFIG['max_response_time']:
-                detailed['slow_pages'].append({
+        # Unisce i problemi delle singole pagine
+        content_issues = self._aggregates.section('detailed')
+        for key, items in content_issues.items():
+            if key not in ('warnings', 'late_warnings'):
+                detailed[key].extend(items)
+        detailed['slow_pages'].extend(self._timing.section('detailed').get('slow_pages', []))
+        
+        # Avvertimenti raggruppati per pagina: contenuto, tempo di risposta, dimensione
+        warnings = self._aggregates.by_page('detailed', 'warnings')
+        slow_warnings = self._timing.by_page('detailed', 'warnings')
+        late_warnings = self._aggregates.by_page('detailed', 'late_warnings')
+        for key in self._seen:
+            detailed['warnings'].extend(warnings.get(key, []))
+            detailed['warnings'].extend(slow_warnings.get(key, []))
+            detailed['warnings'].extend(late_warnings.get(key, []))
+        
+        # Link interrotti: un errore per destinazione, non per occorrenza
+        for link in detailed['broken_links']:
+            detailed['errors'].append({
+                'type': 'broken_link',
+                'url': link['url'],
+                'message': f"Link interrotto ({link['type']}) presente {link['occurrences']} volte"
+            })
+        
+        # Trova duplicati
+        self._find_duplicates(detailed)
+        
+        return detailed
+    
+    def _find_duplicates(self, detailed: Dict):
+        """Trova duplicati nei title e meta description"""
+        # Duplicati title
+        for title, urls in self._aggregates.duplicates('titles', 'titles'):
+            for url in urls:
+                detailed['duplicate_titles'].append({
                     'url': url,
-                    'response_time': response_time,
-                    'issue': f'Pagina lenta ({response_time:.2f}s)'
+                    'title': title,
+                    'duplicate_count': len(urls),
+                    'issue': f'Title duplicato ({len(urls)} pagine)'
                 })
                 detailed['warnings'].append({
-                    'type': 'slow_page',
+                    'type': 'duplicate_title',
                     'url': url,
-                    'message': f'Tempo di caricamento elevato ({response_time:.2f}s)'
+                    'message': f'Title duplicato su {len(urls)} pagine'
                 })
-            
-            if html_size > SEO_CONFIG['max_page_size_mb'] * 1024 * 1024:
-                detailed['large_html_pages'].append({
+        
+        # Duplicati meta
+        for meta, urls in self._aggregates.duplicates('metas', 'metas'):
+            for url in urls:
+                detailed['duplicate_meta_descriptions'].append({
                     'url': url,
-                    'size_mb': html_size / (1024 * 1024),
-                    'issue': f'HTML troppo grande ({html_size / (1024 * 1024):.1f}MB)'
+                    'meta': meta,
+                    'duplicate_count': len(urls),
+                    'issue': f'Meta description duplicata ({len(urls)} pagine)'
                 })
                 detailed['warnings'].append({
-                    'type': 'large_page',
+                    'type': 'duplicate_meta',
                     'url': url,
-                    'message': f'Pagina troppo pesante ({html_size / (1024 * 1024):.1f}MB)'
+                    'message': f'Meta description duplicata su {len(urls)} pagine'
                 })
-            
-            # Aspetti tecnici
-            if not canonical:
-                detailed['pages_without_canonical'].append({
-                    'url': url,
-                    'issue': 'URL canonico mancante'
-                })
-                detailed['notices'].append({
-                    'type': 'missing_canonical',
-                    'url': url,
-                    'message': 'URL canonico non specificato'
-                })
-            
-            if not lang:
-                detailed['pages_without_lang'].append({
-                    'url': url,
-                    'issue': 'Attributo lang mancante'
-                })
-                detailed['notices'].append({
-                    'type': 'missing_lang',
-                    'url': url,
-                    'message': 'Lingua della pagina non specificata'
-                })
-            
-            if not schema:
-                detailed['pages_without_schema'].append({
-                    'url': url,
-                    'issue': 'Schema markup mancante'
-                })
-                detailed['notices'].append({
-                    'type': 'missing_schema',
-                    'url': url,
-                    'message': 'Dati strutturati non presenti'
-                })
-        
-        # Trova duplicati
-        self._find_duplicates(detailed)
-        
-        return detailed
     
-    def _find_duplicates(self, detailed: Dict):
-        """Trova duplicati nei title e meta description"""
-        title_counts = {}
-        meta_counts = {}
-        
-        for page in self.pages_data:
-            title = page.get('title', '').strip()
-            meta = page.get('meta_description', '').strip()
-            url = page.get('url', '')
-            
-            if title:
-                if title in title_counts:
-                    title_counts[title].append(url)
-                else:
-                    title_counts[title] = [url]
-            
-            if meta:
-                if meta in meta_counts:
-                    meta_counts[meta].append(url)
-                else:
-                    meta_counts[meta] = [url]
+    def _analyze_sitemap_coverage(self) -> Dict:
+        """Confronto tra URL dichiarati nelle sitemap e pagine raggiunte dal crawling"""
+        if self.sitemap is None:
+            return {'available': False}
         
-        # Duplicati title
-        for title, urls in title_counts.items():
-            if len(urls) > 1:
-                for url in urls:
-                    detailed['duplicate_titles'].append({
-                        'url': url,
-                        'title': title,
-                        'duplicate_count': len(urls),
-                        'issue': f'Title duplicato ({len(urls)} pagine)'
-                    })
-                    detailed['warnings'].append({
-                        'type': 'duplicate_title',
-                        'url': url,
-                        'message': f'Title duplicato su {len(urls)} pagine'
-                    })
+        # Insiemi di hash: il confronto non dipende dal numero di URL in chiaro
+        sitemap_urls = self.sitemap.urls
+        crawled = URLHashSet(sitemap_urls.tracking_params)
+        crawled.update(page['url'] for page in self.pages_data if page.get('status_code', 200) < 300)
+        in_both = sitemap_urls.intersection_count(crawled)
         
-        # Duplicati meta
-        for meta, urls in meta_counts.items():
-            if len(urls) > 1:
-                for url in urls:
-                    detailed['duplicate_meta_descriptions'].append({
-                        'url': url,
-                        'meta': meta,
-                        'duplicate_count': len(urls),
-                        'issue': f'Meta description duplicata ({len(urls)} pagine)'
-                    })
-                    detailed['warnings'].append({
-                        'type': 'duplicate_meta',
-                        'url': url,
-                        'message': f'Meta description duplicata su {len(urls)} pagine'
-                    })
+        return {
+            'available': True,
+            'sitemaps': list(self.sitemap.sitemaps),
+            'sitemap_urls': len(sitemap_urls),
+            'crawled_pages': len(crawled),
+            'crawled_in_sitemap': in_both,
+            'sitemap_not_crawled': len(sitemap_urls) - in_both,
+            'crawled_not_in_sitemap': len(crawled) - in_both,
+            'coverage_percentage': round(in_both / len(sitemap_urls) * 100, 1) if len(sitemap_urls) else 0,
+            # Esempi dai primi URL della sitemap (gli altri sono conservati solo come hash)
+            'not_crawled_sample': [url for url in self.sitemap.sample if url not in crawled],
+            'not_in_sitemap_pages': [
+                page['url'] for page in self.pages_data
+                if page.get('status_code', 200) < 300 and page['url'] not in sitemap_urls
+            ],
+        }
     
     def _calculate_site_health(self) -> Dict:
         """Calcola lo stato di salute del sito con algoritmo migliorato"""
@@ -859,90 +1233,16 @@ class SEOAnalyzer:
                 'total_pages': 0
             }
         
-        # Contatori per stato pagine
-        healthy = 0
-        broken = 0
-        problematic = 0
-        redirected = 0
+        # Contatori per stato pagine e per problemi complessivi
+        merged = self._merge_page_results('site_health')
+        healthy = merged.get('healthy', 0)
+        broken = merged.get('broken', 0)
+        problematic = merged.get('problematic', 0)
+        redirected = merged.get('redirected', 0)
         blocked = 0
-        
-        # Contatori per problemi complessivi
-        total_critical_issues = 0  # Errori gravi
-        total_warning_issues = 0   # Avvertimenti
-        total_minor_issues = 0     # Avvisi minori
-        
-        for page in self.pages_data:
-            status_code = page.get('status_code', 200)
-            title = page.get('title', '').strip()
-            meta = page.get('meta_description', '').strip()
-            word_count = page.get('content', {}).get('word_count', 0)
-            headings = page.get('headings', {})
-            images = page.get('images', [])
-            
-            # Classifica stato pagina
-            page_issues = 0
-            
-            # Errori gravi (influenzano molto la salute)
-            if status_code >= 400:
-                if status_code >= 500:
-                    broken += 1
-                    total_critical_issues += 3  # Peso alto per errori server
-                else:
-                    broken += 1
-                    total_critical_issues += 2  # Peso medio per errori client
-                continue
-            elif status_code >= 300:
-                redirected += 1
-                total_warning_issues += 1
-                page_issues += 1
-            
-            # Problemi SEO che influenzano la salute
-            if not title:
-                total_critical_issues += 2
-                page_issues += 2
-            
-            if not meta:
-                total_warning_issues += 1
-                page_issues += 1
-            
-            if word_count < SEO_CONFIG['min_word_count']:
-                total_warning_issues += 1
-                page_issues += 1
-            
-            # Problemi strutturali
-            h1_count = len(headings.get('h1', []))
-            if h1_count == 0:
-                total_warning_issues += 1
-                page_issues += 1
-            elif h1_count > 1:
-                total_warning_issues += 1
-                page_issues += 1
-            
-            # Problemi immagini (peso minore)
-            for img in images:
-                if not img.get('alt', '').strip():
-                    total_warning_issues += 1
-                if not img.get('title', '').strip():
-                    total_minor_issues += 1
-            
-            # Schema markup e aspetti tecnici minori
-            if not page.get('canonical_url', '').strip():
-                total_minor_issues += 1
-            
-            if not page.get('lang', '').strip():
-                total_minor_issues += 1
-            
-            if not page.get('schema_markup', []):
-                total_minor_issues += 1
-            
-            # Classifica la pagina
-            if page_issues >= 3:
-                problematic += 1
-            elif page_issues >= 1:
-                # Pagina con problemi minori ma non critici
-                healthy += 1
-            else:
-                healthy += 1
+        total_critical_issues = merged.get('critical_issues', 0)
+        total_warning_issues = merged.get('warning_issues', 0)
+        total_minor_issues = merged.get('minor_issues', 0)
         
         # Calcola percentuale di salute più precisa
         # Formula migliorata che considera tutti i tipi di problemi
@@ -1071,6 +1371,7 @@ class SEOAnalyzer:
         """Crea un riassunto dell'analisi"""
         return {
             'domain': self.domain,
+            'report_title': f"Report SEO - {self.domain}",
             'analysis_date': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             'total_pages_analyzed': len(self.pages_data),
             'overall_score': self.analysis_results['overall_score'],
@@ -1082,4 +1383,30 @@ class SEOAnalyzer:
                 'needs_improvement': 50 <= self.analysis_results['overall_score'] < 70,
                 'poor': self.analysis_results['overall_score'] < 50
             }
-        }
\ No newline at end of file
+        }
+
+
+def load_analysis_state(path: Union[str, Path]) -> Optional[Dict]:
+    """Carica lo stato dell'analisi precedente di un sito, None se assente o illeggibile"""
+    path = Path(path)
+    if not path.exists():
+        return None
+    
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logging.getLogger(__name__).warning(f"Stato analisi non leggibile ({path}): {e}")
+        return None
+
+
+def save_analysis_state(path: Union[str, Path], state: Dict):
+    """Salva lo stato per l'analisi incrementale successiva"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    
+    # Scrittura atomica: un'interruzione non lascia uno stato troncato
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, default=str)
+    tmp_path.replace(path)
@@ -0,0 +1,203 @@
+"""
+Crawling e analisi di più siti nello stesso processo, con risorse di rete condivise
+"""
+
+import asyncio
+import logging
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Union
+
+import aiohttp
+import requests
+
+from config import *
+from utils.analyzer import SEOAnalyzer, load_analysis_state, save_analysis_state
+from utils.checkpoint import checkpoint_status, remove_checkpoint
+from utils.crawler import WebCrawler
+from utils.http_cache import ResponseCache
+from utils.parse_pool import ParsePool
+from utils.pdf_generator import PDFGenerator
+
+
+def site_key(url: str) -> str:
+    """Nome di file che identifica un sito (host e porta)"""
+    site = re.sub(r'^https?://', '', url).split('/')[0]
+    return re.sub(r'[^\w.-]', '_', site)
+
+
+def load_site_list(path: Union[str, Path]) -> List[str]:
+    """URL da analizzare, uno per riga (righe vuote e commenti '#' ignorati, duplicati rimossi)"""
+    urls = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            url = line.split('#', 1)[0].strip()
+            if url:
+                urls.append(url)
+    return list(dict.fromkeys(urls))
+
+
+class SiteResult(NamedTuple):
+    """Esito dell'analisi di un sito del batch"""
+    url: str
+    domain: str
+    pages: int
+    analysis: Optional[Dict]
+    report_path: Optional[Path]
+    error: str = ''
+
+    @property
+    def ok(self) -> bool:
+        return self.analysis is not None
+
+
+class BatchCrawler:
+    """
+    Crawling e analisi di molti siti nello stesso processo.
+
+    Tutti i siti usano un'unica sessione aiohttp (pool di connessioni con
+    cache DNS), un budget comune di max_requests richieste in volo, una sola
+    connessione alla cache HTTP e un solo pool di processi per il parsing;
+    al più max_sites siti sono in corso contemporaneamente e si dividono il
+    budget di memoria delle pagine.
+    Ogni sito ha il proprio WebCrawler (frontiera, cortesia, robots.txt,
+    pagine), il proprio SEOAnalyzer e il proprio report; analisi e PDF
+    vengono prodotti in un thread mentre gli altri siti continuano.
+    L'errore di un sito non interrompe gli altri.
+    """
+
+    def __init__(self, urls: Iterable[str], max_sites: Optional[int] = None, max_requests: Optional[int] = None,
+                 reports_dir: Union[str, Path] = REPORTS_DIR, generate_pdf: Optional[bool] = None,
+                 callback: Optional[Callable[[SiteResult], None]] = None):
+        self.urls = list(dict.fromkeys(urls))
+        self.max_sites = max(1, max_sites or BATCH_CONFIG['max_sites'])
+        self.max_requests = max(1, max_requests or BATCH_CONFIG['max_requests'])
+        self.reports_dir = Path(reports_dir)
+        self.generate_pdf = BATCH_CONFIG['generate_pdf'] if generate_pdf is None else generate_pdf
+        self.callback = callback  # Riceve il SiteResult di ogni sito appena concluso
+        self.crawlers: Dict[str, WebCrawler] = {}  # Crawler dei siti in corso
+        self.is_running = False
+        self.logger = logging.getLogger(__name__)
+
+    def run(self) -> List[SiteResult]:
+        """Analizza tutti i siti e restituisce gli esiti nell'ordine degli URL"""
+        self.is_running = True
+        try:
+            return asyncio.run(self._run())
+        finally:
+            self.is_running = False
+
+    def stop(self):
+        """Ferma i crawling in corso; i siti non ancora iniziati vengono saltati"""
+        self.is_running = False
+        for crawler in list(self.crawlers.values()):
+            crawler.stop_crawling()
+
+    async def _run(self) -> List[SiteResult]:
+        site_slots = asyncio.Semaphore(self.max_sites)
+        worker_budget = asyncio.Semaphore(self.max_requests)
+
+        timeout = aiohttp.ClientTimeout(total=CRAWL_CONFIG['timeout'])
+        connector = aiohttp.TCPConnector(limit=self.max_requests, ttl_dns_cache=BATCH_CONFIG['dns_cache_ttl'])
+        # Sessione requests condivisa per robots.txt e sitemap (un pool per host, fino a max_sites host)
+        http_session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=self.max_sites, pool_maxsize=self.max_sites)
+        http_session.mount('http://', adapter)
+        http_session.mount('https://', adapter)
+
+        # Una connessione per tutti i siti: con una per crawler le transazioni aperte si bloccano a vicenda
+        cache = ResponseCache(HTTP_CACHE_CONFIG['path']) if HTTP_CACHE_CONFIG['enabled'] else None
+
+        parse_pool = None
+        if PARSE_CONFIG['enabled'] and CRAWL_CONFIG['extraction_engine'] == 'lxml':
+            parse_pool = ParsePool(PARSE_CONFIG['workers'], PARSE_CONFIG['max_pending'])
+
+        async def run_site(url: str) -> SiteResult:
+            async with site_slots:
+                return await self._run_site(url, session, worker_budget, http_session, cache, parse_pool)
+
+        try:
+            async with aiohttp.ClientSession(headers=HTTP_HEADERS, timeout=timeout, connector=connector) as session:
+                return list(await asyncio.gather(*(run_site(url) for url in self.urls)))
+        finally:
+            http_session.close()
+            if cache:
+                cache.close()
+            if parse_pool:
+                parse_pool.close()
+
+    async def _run_site(self, url: str, session: aiohttp.ClientSession, worker_budget: asyncio.Semaphore,
+                        http_session: requests.Session, cache: Optional[ResponseCache] = None,
+                        parse_pool: Optional[ParsePool] = None) -> SiteResult:
+        """Crawling, analisi e report di un sito"""
+        domain = url.replace('https://', '').replace('http://', '').replace('www.', '').split('/')[0]
+        if not self.is_running:
+            return SiteResult(url, domain, 0, None, None, 'Batch interrotto')
+
+        loop = asyncio.get_running_loop()
+        crawler = None
+        try:
+            crawler = self._create_crawler(url, http_session, cache)
+            self.crawlers[url] = crawler
+
+            previous_state = load_analysis_state(self._analysis_state_path(url)) if ANALYSIS_CONFIG['incremental'] else None
+            analyzer = SEOAnalyzer(domain=domain, previous_state=previous_state, sitemap=crawler.sitemap,
+                                   links=crawler.links)
+
+            # Le pagine vengono valutate man mano che il crawler le registra
+            await crawler.crawl_async(session, worker_budget, on_page=analyzer.add_page, parse_pool=parse_pool)
+            if not crawler.pages_data:
+                raise Exception("Nessun dato raccolto durante il crawling")
+
+            analysis, report_path = await loop.run_in_executor(None, self._analyze_site, url, domain, analyzer)
+            result = SiteResult(url, domain, len(crawler.pages_data), analysis, report_path)
+
+        except Exception as e:
+            self.logger.error(f"Analisi di {url} non riuscita: {e}")
+            result = SiteResult(url, domain, len(crawler.pages_data) if crawler else 0, None, None, str(e))
+
+        finally:
+            self.crawlers.pop(url, None)
+            if crawler:
+                crawler.pages_data.close()
+
+        if self.callback:
+            self.callback(result)
+        return result
+
+    def _create_crawler(self, url: str, http_session: requests.Session,
+                        cache: Optional[ResponseCache] = None) -> WebCrawler:
+        """Crawler del sito; un crawling interrotto in un batch precedente viene ripreso"""
+        checkpoint_path = None
+        if CRAWL_CONFIG['checkpoints']:
+            checkpoint_path = CHECKPOINTS_DIR / f"{site_key(url)}.sqlite"
+            if checkpoint_status(checkpoint_path) in ('running', 'interrupted'):
+                crawler = WebCrawler.resume(checkpoint_path, session=http_session, cache=cache)
+            else:
+                remove_checkpoint(checkpoint_path)
+                crawler = WebCrawler(url, checkpoint_path=checkpoint_path, session=http_session, cache=cache)
+        else:
+            crawler = WebCrawler(url, session=http_session, cache=cache)
+
+        # Il budget di memoria delle pagine è condiviso tra i siti in corso
+        crawler.pages_data.memory_budget = PAGE_STORE_CONFIG['memory_budget_mb'] * 1024 * 1024 // self.max_sites
+        return crawler
+
+    def _analyze_site(self, url: str, domain: str, analyzer: SEOAnalyzer):
+        """Analisi completa e report PDF di un sito (eseguita in un thread)"""
+        analysis = analyzer.analyze_all()
+        if ANALYSIS_CONFIG['incremental']:
+            save_analysis_state(self._analysis_state_path(url), analyzer.get_incremental_state())
+
+        report_path = None
+        if self.generate_pdf:
+            self.reports_dir.mkdir(parents=True, exist_ok=True)
+            report_path = self.reports_dir / f"seo_report_{site_key(url)}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+            if not PDFGenerator(analysis, domain).generate_pdf(str(report_path)):
+                self.logger.warning(f"Report PDF di {url} non generato")
+                report_path = None
+        return analysis, report_path
+
+    def _analysis_state_path(self, url: str) -> Path:
+        return ANALYSIS_CONFIG['state_dir'] / f"{site_key(url)}.json"
@@ -0,0 +1,301 @@
+"""
+Checkpoint su disco (SQLite) per crawling lunghi e riprendibili
+"""
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from utils.frontier import FrontierEntry, canonicalize_url
+
+# Stati di un URL nella frontiera su disco
+PENDING, IN_PROGRESS, DONE = 0, 1, 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS frontier (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    depth INTEGER NOT NULL,
+    inlinks INTEGER NOT NULL DEFAULT 0,
+    sitemap_priority REAL,
+    lastmod REAL,
+    score REAL NOT NULL,
+    seq INTEGER NOT NULL,
+    state INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS frontier_queue ON frontier (state, score, seq);
+CREATE TABLE IF NOT EXISTS pages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class SQLiteFrontier:
+    """
+    Frontiera con la stessa interfaccia di URLFrontier, ma con gli URL in
+    attesa salvati su SQLite: la memoria resta costante anche con milioni di URL.
+
+    Gli URL estratti restano IN_PROGRESS finché complete() non li segna come
+    visitati; alla riapertura quelli rimasti in sospeso tornano in coda.
+    """
+
+    def __init__(self, connection: sqlite3.Connection, lock: threading.RLock,
+                 tracking_params: Iterable[str] = (), max_depth: Optional[int] = None,
+                 depth_weight: float = 1.0):
+        self._conn = connection
+        self._lock = lock
+        self.tracking_params = tuple(p.lower() for p in tracking_params)
+        self.max_depth = max_depth
+        self.depth_weight = depth_weight
+        self._signals: List[Tuple[Callable[[FrontierEntry], float], float]] = []
+
+        with self._lock:
+            self._seq = self._conn.execute("SELECT COALESCE(MAX(seq), 0) FROM frontier").fetchone()[0]
+            self._pending = self._conn.execute(
+                "SELECT COUNT(*) FROM frontier WHERE state = ?", (PENDING,)
+            ).fetchone()[0]
+
+    def add_signal(self, signal: Callable[[FrontierEntry], float], weight: float = 1.0):
+        """Registra un segnale di priorità: valori più alti anticipano l'URL"""
+        self._signals.append((signal, weight))
+
+    def canonicalize(self, url: str) -> str:
+        return canonicalize_url(url, self.tracking_params)
+
+    def _score(self, url: str, depth: int, inlinks: int, sitemap_priority: Optional[float],
+               lastmod: Optional[float] = None) -> float:
+        entry = FrontierEntry(url, depth)
+        entry.inlinks = inlinks
+        entry.sitemap_priority = sitemap_priority
+        entry.lastmod = lastmod
+
+        score = depth * self.depth_weight
+        for signal, weight in self._signals:
+            score -= weight * signal(entry)
+        return score
+
+    def _next_seq(self) -> int:
+        self._seq += 1
+        return self._seq
+
+    def _insert(self, key: str, url: str, depth: int, score: float, state: int):
+        self._conn.execute(
+            "INSERT INTO frontier (key, url, depth, score, seq, state) VALUES (?, ?, ?, ?, ?, ?)",
+            (key, url, depth, score, self._next_seq(), state)
+        )
+
+    def push(self, url: str, depth: int = 0) -> bool:
+        """Accoda l'URL se non è mai stato visto; restituisce True se è stato accodato"""
+        if self.max_depth is not None and depth > self.max_depth:
+            return False
+
+        key = self.canonicalize(url)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, depth, inlinks, sitemap_priority, lastmod, state FROM frontier WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                url = url.split('#', 1)[0]
+                self._insert(key, url, depth, self._score(url, depth, 0, None), PENDING)
+                self._pending += 1
+                return True
+
+            stored_url, stored_depth, inlinks, sitemap_priority, lastmod, state = row
+            if state == PENDING:
+                inlinks += 1
+                depth = min(depth, stored_depth)
+                self._conn.execute(
+                    "UPDATE frontier SET depth = ?, inlinks = ?, score = ? WHERE key = ?",
+                    (depth, inlinks, self._score(stored_url, depth, inlinks, sitemap_priority, lastmod), key)
+                )
+            return False
+
+    def requeue(self, url: str):
+        """Rimette in coda un URL già estratto (es. dopo un 429)"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE frontier SET state = ?, seq = ? WHERE key = ? AND state != ?",
+                (PENDING, self._next_seq(), self.canonicalize(url), PENDING)
+            )
+            self._pending += cursor.rowcount
+
+    def set_sitemap_priority(self, url: str, priority: float, lastmod: Optional[float] = None):
+        """Registra priorità e lastmod dichiarati in sitemap per un URL in attesa"""
+        key = self.canonicalize(url)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, depth, inlinks FROM frontier WHERE key = ? AND state = ?", (key, PENDING)
+            ).fetchone()
+            if row is not None:
+                self._conn.execute(
+                    "UPDATE frontier SET sitemap_priority = ?, lastmod = ?, score = ? WHERE key = ?",
+                    (priority, lastmod, self._score(row[0], row[1], row[2], priority, lastmod), key)
+                )
+
+    def pop(self) -> Optional[str]:
+        """Estrae l'URL con priorità più alta, o None se la coda è vuota"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT key, url FROM frontier WHERE state = ? ORDER BY score, seq LIMIT 1", (PENDING,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            self._conn.execute("UPDATE frontier SET state = ? WHERE key = ?", (IN_PROGRESS, row[0]))
+            self._pending -= 1
+            return row[1]
+
+    def complete(self, url: str):
+        """Segna un URL estratto come visitato (se non è stato rimesso in coda)"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE frontier SET state = ? WHERE key = ? AND state = ?",
+                (DONE, self.canonicalize(url), IN_PROGRESS)
+            )
+
+    def mark_visited(self, url: str, depth: int = 0) -> bool:
+        """Segna come visitato un URL raggiunto senza passare dalla coda; False se era già stato estratto"""
+        key = self.canonicalize(url)
+        with self._lock:
+            row = self._conn.execute("SELECT state FROM frontier WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._insert(key, url.split('#', 1)[0], depth, 0, DONE)
+                return True
+            if row[0] != PENDING:
+                return False
+            self._conn.execute("UPDATE frontier SET state = ? WHERE key = ?", (DONE, key))
+            self._pending -= 1
+            return True
+
+    def depth_of(self, url: str) -> int:
+        """Profondità di scoperta di un URL noto (0 se sconosciuto)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT depth FROM frontier WHERE key = ?", (self.canonicalize(url),)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def is_seen(self, url: str) -> bool:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM frontier WHERE key = ?", (self.canonicalize(url),)
+            ).fetchone() is not None
+
+    def empty(self) -> bool:
+        return self._pending == 0
+
+    def __len__(self) -> int:
+        return self._pending
+
+    @property
+    def seen_count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM frontier").fetchone()[0]
+
+
+class CrawlCheckpoint:
+    """
+    File SQLite con frontiera, pagine raccolte e metadati di un crawling.
+
+    Pagine e stato della frontiera vengono salvati nella stessa transazione,
+    quindi dopo un crash il crawling riparte dall'ultimo commit coerente.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+        self._conn.commit()
+
+    def _migrate(self):
+        """Aggiorna i checkpoint creati da versioni precedenti"""
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(frontier)")}
+        if 'lastmod' not in columns:
+            self._conn.execute("ALTER TABLE frontier ADD COLUMN lastmod REAL")
+
+    def create_frontier(self, tracking_params: Iterable[str] = (), max_depth: Optional[int] = None,
+                        depth_weight: float = 1.0) -> SQLiteFrontier:
+        # Gli URL rimasti in corso all'interruzione precedente tornano in coda
+        with self._lock:
+            self._conn.execute("UPDATE frontier SET state = ? WHERE state = ?", (PENDING, IN_PROGRESS))
+        return SQLiteFrontier(self._conn, self._lock, tracking_params, max_depth, depth_weight)
+
+    def get_meta(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key: str, value: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value)
+            )
+
+    def save_page(self, page_data: Dict):
+        """Aggiunge una pagina (salvata al prossimo commit)"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO pages (url, data) VALUES (?, ?)",
+                (page_data.get('url', ''), json.dumps(page_data, ensure_ascii=False, default=str))
+            )
+
+    def load_pages(self) -> List[Dict]:
+        """Restituisce le pagine salvate, nell'ordine di raccolta"""
+        with self._lock:
+            rows = self._conn.execute("SELECT data FROM pages ORDER BY id").fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def page_count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def commit(self):
+        """Rende persistente lo stato corrente"""
+        with self._lock:
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
+
+
+def checkpoint_status(path: Union[str, Path]) -> Optional[str]:
+    """Stato salvato in un checkpoint ('running', 'interrupted', 'completed'), None se assente"""
+    path = Path(path)
+    if not path.exists():
+        return None
+
+    try:
+        connection = sqlite3.connect(str(path))
+        try:
+            row = connection.execute("SELECT value FROM meta WHERE key = 'status'").fetchone()
+        finally:
+            connection.close()
+    except sqlite3.Error:
+        return None
+    return row[0] if row else None
+
+
+def remove_checkpoint(path: Union[str, Path]):
+    """Elimina un checkpoint e i file WAL associati"""
+    path = Path(path)
+    for suffix in ('', '-wal', '-shm'):
+        candidate = path.with_name(path.name + suffix)
+        if candidate.exists():
+            candidate.unlink()
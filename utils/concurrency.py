@@ -0,0 +1,131 @@
+"""
+Concorrenza adattiva per host (AIMD) guidata da latenza, 429/503 e timeout
+"""
+
+import asyncio
+from typing import Dict, Optional, Tuple, Type
+
+# Status che indicano un server in affanno
+CONGESTION_STATUSES = {429, 503}
+
+
+class _HostWindow:
+    """Finestra di richieste contemporanee verso un host"""
+
+    __slots__ = ('limit', 'in_flight', 'baseline', 'latency', 'completed', 'last_decrease', 'condition')
+
+    def __init__(self, limit: float):
+        self.limit = limit
+        self.in_flight = 0
+        self.baseline: Optional[float] = None  # latenza minima osservata (lentamente adattata)
+        self.latency: Optional[float] = None   # media mobile esponenziale della latenza
+        self.completed = 0
+        self.last_decrease = -1
+        self.condition = asyncio.Condition()
+
+
+class HostSlot:
+    """Richiesta in corso verso un host: raccoglie l'esito per il controller"""
+
+    __slots__ = ('controller', 'host', 'latency', 'status')
+
+    def __init__(self, controller: 'AdaptiveConcurrency', host: str):
+        self.controller = controller
+        self.host = host
+        self.latency: Optional[float] = None
+        self.status: Optional[int] = None
+
+    def observe(self, latency: float, status: int):
+        """Tempo fino agli header e status della risposta"""
+        self.latency = latency
+        self.status = status
+
+    async def __aenter__(self) -> 'HostSlot':
+        await self.controller.acquire(self.host)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        congested = exc_type is not None and issubclass(exc_type, self.controller.congestion_errors)
+        await self.controller.release(self.host, self.latency, self.status, congested)
+        return False
+
+
+class AdaptiveConcurrency:
+    """
+    Limite di richieste contemporanee per host, adattato con AIMD.
+
+    Ogni risposta rapida alza il limite di 1/limite (circa +1 per ogni
+    finestra di richieste completate); un 429/503, un timeout o un errore di
+    connessione, oppure una latenza media oltre latency_threshold volte la
+    latenza minima osservata, lo moltiplicano per decrease_factor. Dopo una
+    riduzione le richieste già in volo non ne causano un'altra: la finestra
+    si riduce al più una volta per giro di richieste. Il limite resta tra
+    min_limit e max_limit, quindi ogni host converge al proprio ritmo
+    sostenibile senza configurazioni per sito.
+    """
+
+    def __init__(self, initial: float = 2, max_limit: float = 10, min_limit: float = 1,
+                 latency_threshold: float = 2.0, decrease_factor: float = 0.5,
+                 congestion_errors: Tuple[Type[BaseException], ...] = (asyncio.TimeoutError, ConnectionError)):
+        self.max_limit = max(1.0, max_limit)
+        self.min_limit = max(1.0, min(min_limit, self.max_limit))
+        self.initial = min(max(initial, self.min_limit), self.max_limit)
+        self.latency_threshold = latency_threshold
+        self.decrease_factor = decrease_factor
+        self.congestion_errors = congestion_errors
+        self._hosts: Dict[str, _HostWindow] = {}
+
+    def _window(self, host: str) -> _HostWindow:
+        window = self._hosts.get(host)
+        if window is None:
+            window = self._hosts[host] = _HostWindow(self.initial)
+        return window
+
+    def slot(self, host: str) -> HostSlot:
+        """Contesto `async with` che occupa uno slot dell'host per la durata della richiesta"""
+        return HostSlot(self, host)
+
+    def limit(self, host: str) -> float:
+        return self._window(host).limit
+
+    @property
+    def limits(self) -> Dict[str, float]:
+        return {host: window.limit for host, window in self._hosts.items()}
+
+    async def acquire(self, host: str):
+        window = self._window(host)
+        async with window.condition:
+            while window.in_flight >= int(window.limit):
+                await window.condition.wait()
+            window.in_flight += 1
+
+    async def release(self, host: str, latency: Optional[float] = None, status: Optional[int] = None,
+                      congested: bool = False):
+        window = self._window(host)
+        async with window.condition:
+            window.in_flight -= 1
+            window.completed += 1
+            self._update(window, latency, status, congested)
+            window.condition.notify_all()
+
+    def _update(self, window: _HostWindow, latency: Optional[float], status: Optional[int], congested: bool):
+        if status in CONGESTION_STATUSES:
+            congested = True
+
+        if latency is not None and not congested:
+            window.latency = latency if window.latency is None else 0.8 * window.latency + 0.2 * latency
+            if window.baseline is None or latency < window.baseline:
+                window.baseline = latency
+            else:
+                # Risale lentamente: il server può diventare stabilmente più lento
+                window.baseline += (latency - window.baseline) * 0.01
+            if window.latency > self.latency_threshold * max(window.baseline, 0.001):
+                congested = True
+
+        if congested:
+            # Una sola riduzione per finestra: le risposte già in volo riflettono il limite precedente
+            if window.completed - window.last_decrease > window.limit:
+                window.limit = max(self.min_limit, window.limit * self.decrease_factor)
+                window.last_decrease = window.completed
+        elif status is not None and status < 400:
+            window.limit = min(self.max_limit, window.limit + 1.0 / window.limit)
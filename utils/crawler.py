@@ -3,47 +3,153 @@ Web Crawler per l'analisi SEO
 """
 
 import requests
+import aiohttp
+import asyncio
 import time
+import hashlib
 import logging
-from urllib.parse import urljoin, urlparse, parse_qs
-from urllib.robotparser import RobotFileParser
+from urllib.parse import urljoin, urlparse, urlsplit, parse_qs
 from bs4 import BeautifulSoup
+from lxml import etree
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+from selenium.common.exceptions import WebDriverException
 import re
-from typing import List, Dict, Set, Optional
+from typing import Callable, Iterator, List, Dict, Set, Optional, Tuple, Union
+from pathlib import Path
 from tqdm import tqdm
 import threading
-from queue import Queue
+import queue
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from collections import deque
+from contextlib import nullcontext
 
 from config import *
+from utils.politeness import PolitenessScheduler
+from utils.html_extractor import EXTRACTION_VERSION, extract_page_fields, normalize_newlines
+from utils.frontier import URLFrontier, sitemap_priority_signal, freshness_signal, inlink_signal
+from utils.checkpoint import CrawlCheckpoint
+from utils.http_cache import ResponseCache
+from utils.webdriver_pool import WebDriverPool
+from utils.render_policy import RenderPolicy
+from utils.driver_resolver import DriverResolver
+from utils.sitemap import SitemapInventory, SitemapReader
+from utils.robots import RobotsCache, RobotsRules
+from utils.url_classifier import URLClassifier, file_extension
+from utils.page_record import PageRecord, URLTable
+from utils.page_store import PageStore
+from utils.link_checker import LinkCheckCache, LinkChecker, LinkInventory
+from utils.concurrency import AdaptiveConcurrency
+from utils.retry import ABANDONED, OPEN, RETRY_STATUSES, CircuitBreaker, RetryPolicy, RetryQueue
+from utils.shard_queue import ShardQueue
+from utils.parse_pool import ParsePool, PendingPage
+
+# Errori di una singola pagina (contenuto non decodificabile o non analizzabile): la pagina viene saltata.
+# Gli altri (cache, checkpoint) non vengono intercettati dal fetch e interrompono il crawling.
+PARSE_ERRORS = (ValueError, LookupError, etree.LxmlError)
 
 class WebCrawler:
     """
     Classe principale per il crawling di siti web
     """
     
-    def __init__(self, start_url: str, callback=None):
+    def __init__(self, start_url: str, callback=None, checkpoint_path: Optional[Union[str, Path]] = None,
+                 session: Optional[requests.Session] = None, shard_queue: Optional[ShardQueue] = None,
+                 shard: Optional[int] = None, cache: Optional[ResponseCache] = None):
         self.start_url = self._normalize_url(start_url)
         self.domain = urlparse(self.start_url).netloc
         self.visited_urls: Set[str] = set()
-        self.to_visit: Queue = Queue()
-        self.pages_data: List[Dict] = []
-        self.robots_txt = None
+        # Checkpoint opzionale: frontiera e pagine su SQLite per riprendere il crawling
+        self.checkpoint = CrawlCheckpoint(checkpoint_path) if checkpoint_path else None
+        if self.checkpoint:
+            self.checkpoint.set_meta('start_url', self.start_url)
+            self.to_visit = self.checkpoint.create_frontier(
+                CRAWL_CONFIG['tracking_params'],
+                CRAWL_CONFIG['max_depth'],
+                CRAWL_CONFIG['priority_weights']['depth']
+            )
+        elif shard_queue is not None:
+            # Crawling ripartito (vedi ShardedCrawler): la parte della coda condivisa assegnata allo shard
+            self.to_visit = shard_queue.frontier(
+                shard,
+                CRAWL_CONFIG['tracking_params'],
+                CRAWL_CONFIG['max_depth'],
+                CRAWL_CONFIG['priority_weights']['depth']
+            )
+        else:
+            self.to_visit = URLFrontier(
+                CRAWL_CONFIG['tracking_params'],
+                CRAWL_CONFIG['max_depth'],
+                CRAWL_CONFIG['priority_weights']['depth']
+            )
+        self.to_visit.add_signal(sitemap_priority_signal, CRAWL_CONFIG['priority_weights']['sitemap'])
+        self.to_visit.add_signal(freshness_signal, CRAWL_CONFIG['priority_weights']['freshness'])
+        self.to_visit.add_signal(inlink_signal, CRAWL_CONFIG['priority_weights']['inlinks'])
+        self.pages_data = PageStore(PAGE_STORE_CONFIG['memory_budget_mb'] * 1024 * 1024, PAGE_STORE_CONFIG['spill_dir'])
+        # URL ed etichette dei link condivisi dai record compatti delle pagine
+        self.url_table = URLTable()
         self.sitemap_urls = []
+        # URL dichiarati nelle sitemap (come hash), per la copertura nell'analisi
+        self.sitemap = SitemapInventory(CRAWL_CONFIG['tracking_params'], SITEMAP_CONFIG['sample_size'])
+        # Destinazioni dei link trovati, verificate a fine crawling (vedi check_links)
+        self.links = LinkInventory(LINK_CHECK_CONFIG['sample_pages'])
         self.callback = callback  # Callback per aggiornare la GUI
+        self.on_page: Optional[Callable[[Dict], None]] = None  # Riceve ogni pagina appena registrata
         self.is_running = False
-        self.session = requests.Session()
-        self.driver = None
+        # Sessione HTTP (robots.txt, sitemap, fetch sincrono), eventualmente condivisa tra più crawler
+        self.session = session or requests.Session()
+        self.webdriver_pool: Optional[WebDriverPool] = None
+        self.driver_resolver: Optional[DriverResolver] = None
+        self.render_policy = RenderPolicy(
+            SELENIUM_CONFIG['render_mode'],
+            SELENIUM_CONFIG['timing_sample_rate'],
+            SELENIUM_CONFIG['render_min_words']
+        )
+        # Nuovi tentativi con backoff e sospensione degli host che continuano a fallire
+        self.retries = RetryQueue(
+            RetryPolicy(CRAWL_CONFIG['max_retries'], CRAWL_CONFIG['retry_backoff'], CRAWL_CONFIG['retry_backoff_max']),
+            CircuitBreaker(
+                CRAWL_CONFIG['circuit_failure_threshold'],
+                CRAWL_CONFIG['circuit_reset_timeout'],
+                CRAWL_CONFIG['circuit_max_trips']
+            ),
+            # Con la coda condivisa un URL abbandonato resterebbe "in corso" e bloccherebbe la fine degli altri shard
+            on_abandon=self.to_visit.complete if shard_queue is not None else None
+        )
+        # Richieste contemporanee per host in modalità asincrona (vedi _crawl_async)
+        self.host_concurrency: Optional[AdaptiveConcurrency] = None
+        # Richieste in volo condivise con altri crawler dello stesso processo (vedi crawl_async)
+        self.worker_budget: Optional[asyncio.Semaphore] = None
+        # Estrazione dei campi in processi separati (vedi _start_crawl), eventualmente condivisa tra più crawler
+        self.parse_pool: Optional[ParsePool] = None
+        self._owns_parse_pool = False
+        
+        # Cache delle risposte per rivalidare le pagine invariate ai crawling successivi (aperta in _start_crawl),
+        # eventualmente condivisa tra più crawler: una sola connessione SQLite per file
+        self.cache = cache
+        self._owns_cache = False
+        
+        # Budget di richieste per host al posto del delay fisso
+        self.scheduler = PolitenessScheduler(
+            CRAWL_CONFIG['delay'],
+            CRAWL_CONFIG['host_burst'],
+            CRAWL_CONFIG['max_retry_after']
+        )
         
         # Configura la sessione HTTP
         self.session.headers.update(HTTP_HEADERS)
         
+        # robots.txt scaricato una volta per host con la sessione HTTP, regole compilate
+        self.robots = RobotsCache(self.session, CRAWL_CONFIG['timeout'], on_load=self._on_robots_loaded)
+        
+        # Risoluzione e classificazione dei link memoizzate (i menu ripetono gli stessi href)
+        self.url_classifier = URLClassifier(self.domain, self._should_crawl_url, CRAWL_CONFIG['url_cache_size'])
+        
         # Setup logging
         self.logger = logging.getLogger(__name__)
         logging.basicConfig(
@@ -51,6 +157,28 @@ class WebCrawler:
             format=LOGGING_CONFIG['format']
         )
         
+    @classmethod
+    def resume(cls, checkpoint_path: Union[str, Path], callback=None,
+               session: Optional[requests.Session] = None, cache: Optional[ResponseCache] = None) -> 'WebCrawler':
+        """Ricrea un crawler dall'ultimo stato salvato in un checkpoint"""
+        if not Path(checkpoint_path).exists():
+            raise FileNotFoundError(f"Checkpoint non trovato: {checkpoint_path}")
+        
+        checkpoint = CrawlCheckpoint(checkpoint_path)
+        start_url = checkpoint.get_meta('start_url')
+        checkpoint.close()
+        
+        if not start_url:
+            raise ValueError(f"Checkpoint non valido: {checkpoint_path}")
+        
+        crawler = cls(start_url, callback=callback, checkpoint_path=checkpoint_path, session=session, cache=cache)
+        for page in crawler.checkpoint.load_pages():
+            crawler.links.add_page(page)
+            crawler.pages_data.append(crawler._compact_page(page))
+        crawler.visited_urls = {page['url'] for page in crawler.pages_data}
+        crawler.logger.info(f"Ripresa del crawling di {start_url}: {len(crawler.pages_data)} pagine già raccolte")
+        return crawler
+    
     def _normalize_url(self, url: str) -> str:
         """Normalizza l'URL aggiungendo https se mancante"""
         if not url.startswith(('http://', 'https://')):
@@ -63,29 +191,24 @@ class WebCrawler:
     
     def _should_crawl_url(self, url: str) -> bool:
         """Determina se un URL dovrebbe essere crawlato"""
-        parsed_url = urlparse(url)
+        parsed_url = urlsplit(url)
         
         # Controlla se è dello stesso dominio
         if not CRAWL_CONFIG['follow_external'] and parsed_url.netloc != self.domain:
             return False
         
         # Controlla le estensioni ignorate
-        path = parsed_url.path.lower()
-        if any(path.endswith(ext) for ext in IGNORED_EXTENSIONS):
+        if file_extension(parsed_url.path) in IGNORED_EXTENSIONS:
             return False
         
         # Controlla robots.txt
-        if CRAWL_CONFIG['respect_robots'] and self.robots_txt:
-            try:
-                if not self.robots_txt.can_fetch('*', url):
-                    return False
-            except:
-                pass
+        if CRAWL_CONFIG['respect_robots'] and not self.robots.can_fetch(url):
+            return False
         
         return True
     
     def _setup_selenium(self):
-        """Configura il driver Selenium"""
+        """Configura il pool di browser Selenium (i browser partono alla prima pagina da renderizzare)"""
         try:
             chrome_options = Options()
             
@@ -97,76 +220,538 @@ class WebCrawler:
             
             chrome_options.add_argument(f"--window-size={SELENIUM_CONFIG['window_size'][0]},{SELENIUM_CONFIG['window_size'][1]}")
             
-            service = Service(ChromeDriverManager().install())
-            self.driver = webdriver.Chrome(service=service, options=chrome_options)
+            # Il driver viene risolto una sola volta (con cache su disco) e condiviso da tutti i browser del pool
+            self.driver_resolver = DriverResolver(
+                SELENIUM_CONFIG['driver_cache'],
+                SELENIUM_CONFIG['driver_path'],
+                SELENIUM_CONFIG['offline']
+            )
             
-            self.driver.set_page_load_timeout(SELENIUM_CONFIG['page_load_timeout'])
-            self.driver.implicitly_wait(SELENIUM_CONFIG['implicit_wait'])
+            self.webdriver_pool = WebDriverPool(
+                lambda: self._create_driver(chrome_options),
+                SELENIUM_CONFIG['pool_size'],
+                SELENIUM_CONFIG['max_pages_per_driver']
+            )
             
             return True
         except Exception as e:
             self.logger.error(f"Errore configurazione Selenium: {e}")
             return False
     
-    def _load_robots_txt(self):
-        """Carica e analizza robots.txt"""
+    def _create_driver(self, chrome_options: Options) -> webdriver.Chrome:
+        """Avvia un'istanza di Chrome per il pool"""
         try:
-            robots_url = urljoin(self.start_url, '/robots.txt')
-            self.robots_txt = RobotFileParser()
-            self.robots_txt.set_url(robots_url)
-            self.robots_txt.read()
-            
-            # Estrai sitemap da robots.txt
-            if hasattr(self.robots_txt, 'site_maps'):
-                self.sitemap_urls.extend(self.robots_txt.site_maps())
-                
+            driver_path = self.driver_resolver.resolve()
+            try:
+                driver = webdriver.Chrome(service=Service(driver_path), options=chrome_options)
+            except WebDriverException:
+                if not self.driver_resolver.can_refresh:
+                    raise
+                # Driver in cache non più compatibile con il browser: lo risolve di nuovo
+                self.logger.info("chromedriver in cache non utilizzabile, nuova risoluzione")
+                driver_path = self.driver_resolver.resolve(force=True)
+                driver = webdriver.Chrome(service=Service(driver_path), options=chrome_options)
+            
+            driver.set_page_load_timeout(SELENIUM_CONFIG['page_load_timeout'])
+            driver.implicitly_wait(SELENIUM_CONFIG['implicit_wait'])
+            return driver
         except Exception as e:
-            self.logger.warning(f"Impossibile caricare robots.txt: {e}")
+            self.logger.error(f"Errore avvio Selenium, rendering disattivato: {e}")
+            raise
+    
+    def _load_robots_txt(self):
+        """Carica robots.txt del sito: regole, Crawl-delay e sitemap dichiarate"""
+        rules = self.robots.get(self.start_url)
+        self.sitemap_urls.extend(rules.sitemaps)
+            
+    def _on_robots_loaded(self, host: str, rules: RobotsRules):
+        """Applica il Crawl-delay dichiarato dall'host appena robots.txt è stato letto"""
+        if CRAWL_CONFIG['respect_robots']:
+            self.scheduler.set_crawl_delay(host, rules.crawl_delay)
+    
+    def _load_sitemaps(self):
+        """Legge le sitemap in streaming, accodando gli URL con priorità e lastmod"""
+        sitemap_urls = self.sitemap_urls or [urljoin(self.start_url, '/sitemap.xml')]
+        reader = SitemapReader(
+            self.session,
+            CRAWL_CONFIG['timeout'],
+            SITEMAP_CONFIG['max_sitemaps'],
+            inventory=self.sitemap,
+            before_fetch=self.scheduler.wait
+        )
+        
+        seeded = 0
+        for entry in reader.iter_entries(sitemap_urls):
+            if not self.is_running:
+                break
+            self.sitemap.add(entry.loc)
+            
+            if (not SITEMAP_CONFIG['seed_frontier'] or seeded >= SITEMAP_CONFIG['max_seed_urls'] or
+                    not self._is_valid_url(entry.loc) or not self._should_crawl_url(entry.loc)):
+                continue
+            # Gli URL in sitemap entrano a profondità 1, come i link della pagina iniziale
+            if self.to_visit.push(entry.loc, 1):
+                seeded += 1
+            # Priorità di default del protocollo sitemaps.org: 0.5
+            priority = entry.priority if entry.priority is not None else 0.5
+            self.to_visit.set_sitemap_priority(entry.loc, priority, entry.lastmod)
+        
+        self.logger.info(f"Sitemap: {len(self.sitemap)} URL dichiarati, {seeded} accodati")
     
-    def _fetch_page(self, url: str) -> Optional[Dict]:
-        """Scarica e analizza una singola pagina"""
+    def _fetch_page(self, url: str) -> Union[Dict, PendingPage, None]:
+        """
+        Scarica e analizza una singola pagina.
+        
+        Le risposte di errore diventano record leggeri (URL e status); dopo
+        un redirect la pagina viene registrata con l'URL finale e il record
+        dell'URL di partenza, con la catena dei passaggi, va in 'redirected_from'.
+        Con il pool di parsing attivo restituisce una PendingPage, da
+        completare con _complete_page quando i campi sono pronti.
+        """
         try:
-            # Usa requests per il contenuto base
-            response = self.session.get(
+            self.scheduler.wait(urlparse(url).netloc)
+            cached = self._cache_lookup(url)
+            
+            # Usa requests per il contenuto base (in streaming: il corpo si legge solo se serve)
+            with self.session.get(
                 url, 
                 timeout=CRAWL_CONFIG['timeout'],
-                allow_redirects=True
+                allow_redirects=True,
+                headers=ResponseCache.conditional_headers(cached),
+                stream=True
+            ) as response:
+                if self._retry_on_status(url, response.status_code, response.headers):
+                    return None
+                
+                redirect = None
+                if response.history:
+                    hops = [(hop.url, hop.status_code) for hop in response.history]
+                    redirect, follow = self._register_redirect(url, hops, response.url)
+                    if not follow:
+                        return redirect
+                    if redirect:
+                        url = response.url
+                
+                truncated = False
+                if response.status_code == 304 and cached:
+                    html, headers = self._revalidated_page(cached, response.headers)
+                    status_code = 200
+                elif response.status_code != 200:
+                    return self._with_redirect(self._error_page_data(
+                        url, response.status_code, response.elapsed.total_seconds(), response.headers
+                    ), redirect)
+                elif not self._is_html_response(url, response.headers):
+                    return redirect
+                else:
+                    body, truncated = self._read_body(response)
+                    html, headers, status_code = self._decode_body(body, response.headers), response.headers, response.status_code
+                    if not truncated:
+                        self._cache_store(url, body, headers)
+            
+            if self.parse_pool and self.parse_pool.available:
+                # I campi vengono estratti da un processo del pool mentre si scaricano le pagine successive
+                return self._submit_parse(url, html, status_code, response.elapsed.total_seconds(), headers,
+                                          truncated, redirect)
+            
+            page_data = self._build_page_data(
+                url,
+                html,
+                status_code,
+                response.elapsed.total_seconds(),
+                headers,
+                truncated
             )
             
-            if response.status_code != 200:
-                return None
-            
-            # Parse HTML
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Dati base della pagina
-            page_data = {
-                'url': url,
-                'status_code': response.status_code,
-                'title': self._extract_title(soup),
-                'meta_description': self._extract_meta_description(soup),
-                'headings': self._extract_headings(soup),
-                'images': self._extract_images(soup, url),
-                'links': self._extract_links(soup, url),
-                'content': self._extract_content(soup),
-                'html_size': len(response.text),
-                'response_time': response.elapsed.total_seconds(),
-                'content_type': response.headers.get('content-type', ''),
-                'last_modified': response.headers.get('last-modified', ''),
-                'canonical_url': self._extract_canonical(soup),
-                'lang': self._extract_language(soup),
-                'schema_markup': self._extract_schema(soup),
-            }
+            # Le metriche Selenium vengono raccolte dal pool di browser (vedi _crawl_sync)
+            return self._with_redirect(page_data, redirect)
             
-            # Se Selenium è disponibile, ottieni metriche aggiuntive
-            if self.driver:
-                page_data.update(self._get_selenium_data(url))
+        except requests.TooManyRedirects as e:
+            hops = [(hop.url, hop.status_code) for hop in e.response.history] if e.response is not None else []
+            return self._redirect_loop_record(url, hops)
+        except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+            self._retry_later(url, f"Errore nel fetch ({e})")
+            return None
+        except requests.RequestException as e:
+            self.logger.error(f"Errore nel fetch di {url}: {e}")
+            return None
+        except PARSE_ERRORS as e:
+            self.logger.error(f"Errore nell'analisi di {url}: {e!r}")
+            return None
+    
+    async def _fetch_page_async(self, session: aiohttp.ClientSession, url: str) -> Optional[Dict]:
+        """Versione asincrona di _fetch_page basata su aiohttp"""
+        try:
+            host = urlparse(url).netloc
+            async with self._host_slot(host) as slot:
+                await self.scheduler.wait_async(host)
+                cached = await self._cache_call(self._cache_lookup, url)
+                
+                # Slot del budget di richieste condiviso (vedi crawl_async), dopo l'attesa di cortesia
+                async with self._worker_slot():
+                    started = time.monotonic()
+                    async with session.get(url, allow_redirects=True, headers=ResponseCache.conditional_headers(cached)) as response:
+                        # Come response.elapsed di requests: tempo fino alla ricezione degli header
+                        response_time = time.monotonic() - started
+                        if slot:
+                            slot.observe(response_time, response.status)
+                        if self._retry_on_status(url, response.status, response.headers):
+                            return None
+                        
+                        redirect = None
+                        if response.history:
+                            hops = [(str(hop.url), hop.status) for hop in response.history]
+                            redirect, follow = self._register_redirect(url, hops, str(response.url))
+                            if not follow:
+                                return redirect
+                            if redirect:
+                                url = str(response.url)
+                        
+                        truncated = False
+                        if response.status == 304 and cached:
+                            html, headers = self._revalidated_page(cached, response.headers)
+                        elif response.status != 200:
+                            return self._with_redirect(
+                                self._error_page_data(url, response.status, response_time, response.headers), redirect
+                            )
+                        elif not self._is_html_response(url, response.headers):
+                            return redirect
+                        else:
+                            body, truncated = await self._read_body_async(response)
+                            headers = response.headers
+                            html = self._decode_body(body, headers)
+                            if not truncated:
+                                await self._cache_call(self._cache_store, url, body, headers)
             
-            return page_data
+            page_data = await self._build_page_data_async(url, html, 200, response_time, headers, truncated)
             
-        except Exception as e:
+            # Se la pagina va renderizzata, ottieni metriche aggiuntive da un browser del pool
+            if page_data.get('render_reason'):
+                page_data.update(await asyncio.wrap_future(self._submit_render(url)))
+            
+            return self._with_redirect(page_data, redirect)
+        
+        except aiohttp.TooManyRedirects as e:
+            return self._redirect_loop_record(url, [(str(hop.url), hop.status) for hop in e.history])
+        except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError) as e:
+            self._retry_later(url, f"Errore nel fetch ({e!r})")
+            return None
+        except aiohttp.ClientError as e:
             self.logger.error(f"Errore nel fetch di {url}: {e}")
             return None
+        except PARSE_ERRORS as e:
+            self.logger.error(f"Errore nell'analisi di {url}: {e!r}")
+            return None
+
+    def _host_slot(self, host: str):
+        """Slot della concorrenza adattiva per l'host (nessun limite per host se disattivata)"""
+        if self.host_concurrency is None:
+            return nullcontext()
+        return self.host_concurrency.slot(host)
+    
+    def _worker_slot(self):
+        """Slot del budget di richieste condiviso tra più crawler (nessun limite se assente)"""
+        if self.worker_budget is None:
+            return nullcontext()
+        return self.worker_budget
+    
+    def _register_redirect(self, url: str, hops: List[Tuple[str, int]], final_url: str) -> Tuple[Optional[Dict], bool]:
+        """
+        Record leggero dell'URL reindirizzato, con i passaggi fino a final_url.
+        
+        Il secondo valore indica se la pagina di destinazione va registrata:
+        non quando è esterna, esclusa dal crawling o già visitata (in quel
+        caso il corpo non viene nemmeno letto).
+        """
+        if self.to_visit.canonicalize(final_url) == self.to_visit.canonicalize(url):
+            return None, True
+        
+        record = {
+            'url': url,
+            'status_code': hops[0][1],
+            'redirect_chain': [{'url': hop_url, 'status_code': status} for hop_url, status in hops],
+            'redirect_target': final_url,
+        }
+        follow = (self._is_valid_url(final_url) and self._should_crawl_url(final_url) and
+                  self.to_visit.mark_visited(final_url, self.to_visit.depth_of(url)))
+        return record, follow
+    
+    def _redirect_loop_record(self, url: str, hops: List[Tuple[str, int]]) -> Dict:
+        """Record leggero di un URL i cui redirect superano il limite (loop o catena troppo lunga)"""
+        self.logger.warning(f"Troppi redirect per {url}")
+        # In un loop la catena si ripete: basta il primo giro
+        seen = set()
+        for index, (hop_url, _) in enumerate(hops):
+            if hop_url in seen:
+                hops = hops[:index]
+                break
+            seen.add(hop_url)
+        return {
+            'url': url,
+            'status_code': hops[0][1] if hops else 310,
+            'redirect_chain': [{'url': hop_url, 'status_code': status} for hop_url, status in hops],
+            'redirect_loop': True,
+        }
+    
+    def _error_page_data(self, url: str, status_code: int, response_time: float, headers) -> Dict:
+        """Record leggero di una risposta di errore: nessun contenuto da analizzare"""
+        return {
+            'url': url,
+            'status_code': status_code,
+            'response_time': response_time,
+            'content_type': headers.get('content-type', ''),
+        }
+    
+    @staticmethod
+    def _with_redirect(page_data: Dict, redirect: Optional[Dict]) -> Dict:
+        """Allega alla pagina il record dell'URL che l'ha reindirizzata (vedi _record_page)"""
+        if redirect:
+            page_data['redirected_from'] = redirect
+        return page_data
+    
+    def _retry_on_status(self, url: str, status_code: int, headers) -> bool:
+        """
+        Su 429 e sugli status temporanei (RETRY_STATUSES) pianifica un nuovo
+        tentativo dell'URL; restituisce True se verrà riprovato. Retry-After
+        (429/503) sospende l'host e allunga l'attesa. Le altre risposte
+        indicano un host raggiungibile e ne richiudono il circuito.
+        """
+        if status_code != 429 and status_code not in RETRY_STATUSES:
+            self.retries.succeeded(url)
+            return False
+        
+        min_delay = 0.0
+        if status_code in (429, 503):
+            host = urlparse(url).netloc
+            min_delay = self.scheduler.defer_from_header(host, headers.get('retry-after'), CRAWL_CONFIG['delay'])
+            self.logger.warning(f"{host} ha risposto {status_code}: pausa di {min_delay:.1f}s")
+        
+        # 429 chiede solo di rallentare: non conta come fallimento dell'host
+        return self._retry_later(url, f"HTTP {status_code}", min_delay, count_failure=status_code != 429)
+    
+    def _retry_later(self, url: str, reason: str, min_delay: float = 0.0, count_failure: bool = True) -> bool:
+        """Pianifica un nuovo tentativo dopo un errore temporaneo; False se i tentativi sono esauriti"""
+        host = urlparse(url).netloc
+        previous_state = self.retries.breaker.state(host)
+        delay = self.retries.failed(url, min_delay, count_failure)
+        
+        state = self.retries.breaker.state(host)
+        if state != previous_state:
+            if state == ABANDONED:
+                self.logger.error(f"{host} non risponde: host abbandonato")
+            elif state == OPEN:
+                seconds = self.retries.breaker.probe_at(host) - time.monotonic()
+                self.logger.warning(f"{host} sospeso dopo errori ripetuti: nuova prova tra {seconds:.1f}s")
+        
+        if delay is None:
+            self.logger.error(f"{reason} per {url}: tentativi esauriti")
+            return False
+        self.logger.warning(f"{reason} per {url}: nuovo tentativo tra {delay:.1f}s")
+        return True
+    
+    def _cache_lookup(self, url: str) -> Optional[Dict]:
+        """Voce in cache per l'URL (per le richieste condizionali)"""
+        if not self.cache:
+            return None
+        return self.cache.get(self.to_visit.canonicalize(url))
+    
+    def _cache_store(self, url: str, body: bytes, headers):
+        """Salva in cache una risposta 200"""
+        if self.cache:
+            self.cache.put(self.to_visit.canonicalize(url), url, body, headers)
+    
+    async def _cache_call(self, method: Callable, *args):
+        """Operazione sulla cache in un thread: le query SQLite non fermano l'event loop"""
+        if not self.cache:
+            return None
+        return await asyncio.get_running_loop().run_in_executor(None, method, *args)
+    
+    def _revalidated_page(self, cached: Dict, headers):
+        """HTML e header di una pagina confermata dal server con 304 Not Modified"""
+        merged_headers = {
+            'content-type': headers.get('content-type') or cached['content_type'],
+            'last-modified': headers.get('last-modified') or cached['last_modified'],
+        }
+        return self._decode_body(cached['body'], merged_headers), merged_headers
+    
+    def _is_html_response(self, url: str, headers) -> bool:
+        """Controlla il Content-Type prima di scaricare il corpo (senza header si assume HTML)"""
+        content_type = headers.get('content-type', '').split(';')[0].strip().lower()
+        if content_type and content_type not in CRAWL_CONFIG['html_content_types']:
+            self.logger.info(f"Contenuto non HTML ignorato ({content_type}): {url}")
+            return False
+        return True
+    
+    def _read_body(self, response: requests.Response) -> Tuple[bytes, bool]:
+        """Legge il corpo fino a CRAWL_CONFIG['max_body_bytes']; restituisce (corpo, troncato)"""
+        limit = CRAWL_CONFIG['max_body_bytes']
+        chunks = []
+        size = 0
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size > limit:
+                return b''.join(chunks)[:limit], True
+        return b''.join(chunks), False
+    
+    async def _read_body_async(self, response: aiohttp.ClientResponse) -> Tuple[bytes, bool]:
+        """Versione asincrona di _read_body"""
+        limit = CRAWL_CONFIG['max_body_bytes']
+        chunks = []
+        size = 0
+        async for chunk in response.content.iter_chunked(64 * 1024):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size > limit:
+                return b''.join(chunks)[:limit], True
+        return b''.join(chunks), False
+    
+    def _decode_body(self, body: bytes, headers) -> str:
+        """Decodifica il corpo della risposta con le stesse regole di requests.Response.text"""
+        encoding = requests.utils.get_encoding_from_headers(headers) or 'utf-8'
+        try:
+            return str(body, encoding, errors='replace')
+        except LookupError:
+            return str(body, 'utf-8', errors='replace')
+    
+    @staticmethod
+    def _content_hash(html: str) -> str:
+        return hashlib.sha1(html.encode('utf-8', 'replace')).hexdigest()
+    
+    def _cached_fields(self, url: str, content_hash: str) -> Optional[Dict]:
+        """Campi estratti in un crawling precedente, se la pagina è invariata"""
+        if not self.cache:
+            return None
+        return self.cache.get_fields(url, f"{CRAWL_CONFIG['extraction_engine']}:{EXTRACTION_VERSION}:{content_hash}")
+    
+    def _store_fields(self, url: str, content_hash: str, fields: Dict):
+        if self.cache:
+            self.cache.put_fields(url, f"{CRAWL_CONFIG['extraction_engine']}:{EXTRACTION_VERSION}:{content_hash}", fields)
+    
+    def _build_page_data(self, url: str, html: str, status_code: int, response_time: float, headers,
+                         truncated: bool = False, fields: Optional[Dict] = None) -> Dict:
+        """
+        Costruisce il record della pagina a partire dall'HTML scaricato
+        (fields: campi già estratti, dal pool di parsing o dalla cache).
+        """
+        content_hash = self._content_hash(html)
+        
+        if fields is None:
+            # Pagina invariata rispetto a un crawling precedente: riusa i campi estratti
+            fields = self._cached_fields(url, content_hash)
+            if fields is None:
+                fields = self._extract_fields(html, url)
+                self._store_fields(url, content_hash, fields)
+        
+        # Dati base della pagina
+        page_data = {
+            'url': url,
+            'status_code': status_code,
+            'title': fields['title'],
+            'meta_description': fields['meta_description'],
+            'headings': fields['headings'],
+            'images': fields['images'],
+            'links': self._process_links(fields['raw_links'], url),
+            'content': fields['content'],
+            'html_size': len(html),
+            'response_time': response_time,
+            'content_type': headers.get('content-type', ''),
+            'last_modified': headers.get('last-modified', ''),
+            'canonical_url': fields['canonical_url'],
+            'lang': fields['lang'],
+            'schema_markup': fields['schema_markup'],
+            'content_hash': content_hash,
+            'truncated': truncated,  # corpo oltre CRAWL_CONFIG['max_body_bytes'], analizzato solo in parte
+        }
+        
+        # Il browser serve solo alle pagine che richiedono JavaScript (più un campione per i tempi)
+        if self.webdriver_pool and self.webdriver_pool.available:
+            render_reason = self.render_policy.reason(url, html, fields['content']['word_count'])
+            if render_reason:
+                page_data['render_reason'] = render_reason
+        
+        return page_data
+    
+    def _submit_parse(self, url: str, html: str, status_code: int, response_time: float, headers,
+                      truncated: bool, redirect: Optional[Dict]) -> Union[Dict, PendingPage]:
+        """
+        Affida l'estrazione dei campi al pool di parsing e restituisce la
+        PendingPage (attende se il pool ha già max_pending pagine); le
+        pagine con i campi in cache vengono costruite subito.
+        """
+        fields = self._cached_fields(url, self._content_hash(html))
+        if fields is not None:
+            page_data = self._build_page_data(url, html, status_code, response_time, headers, truncated, fields)
+            return self._with_redirect(page_data, redirect)
+        
+        try:
+            future = self.parse_pool.submit(html, url)
+        except BrokenProcessPool:
+            return self._with_redirect(
+                self._build_page_data(url, html, status_code, response_time, headers, truncated), redirect
+            )
+        return PendingPage(url, html, status_code, response_time, headers, truncated, redirect, future)
+    
+    def _complete_page(self, pending: PendingPage) -> Optional[Dict]:
+        """Record della pagina con i campi estratti dal pool (attende se non sono ancora pronti)"""
+        try:
+            try:
+                fields = pending.future.result()
+            except BrokenProcessPool:
+                # Processo del pool terminato in modo anomalo: la pagina viene analizzata qui
+                fields = self._extract_fields(pending.html, pending.url)
+        except Exception as e:
+            self.logger.error(f"Errore nel parsing di {pending.url}: {e!r}")
+            return pending.redirect
+        
+        self._store_fields(pending.url, self._content_hash(pending.html), fields)
+        page_data = self._build_page_data(pending.url, pending.html, pending.status_code, pending.response_time,
+                                          pending.headers, pending.truncated, fields)
+        return self._with_redirect(page_data, pending.redirect)
+    
+    async def _build_page_data_async(self, url: str, html: str, status_code: int, response_time: float, headers,
+                                     truncated: bool = False) -> Dict:
+        """
+        _build_page_data per il motore asincrono: cache dei campi in un thread
+        e, se disponibile, estrazione nel pool di parsing.
+        """
+        content_hash = self._content_hash(html)
+        fields = await self._cache_call(self._cached_fields, url, content_hash)
+        if fields is None:
+            if self.parse_pool and self.parse_pool.available:
+                try:
+                    fields = await self.parse_pool.parse_async(html, url)
+                except BrokenProcessPool:
+                    # Processo del pool terminato in modo anomalo: la pagina viene analizzata qui
+                    pass
+            if fields is None:
+                fields = self._extract_fields(html, url)
+            await self._cache_call(self._store_fields, url, content_hash, fields)
+        return self._build_page_data(url, html, status_code, response_time, headers, truncated, fields)
+    
+    def _extract_fields(self, html: str, url: str) -> Dict:
+        """Estrae i campi SEO con il motore configurato (link ancora da risolvere)"""
+        if CRAWL_CONFIG['extraction_engine'] == 'lxml':
+            # Estrazione single-pass: un solo passaggio del parser per tutti i campi
+            return extract_page_fields(html, url)
+        return self._extract_fields_bs4(html, url)
+    
+    def _extract_fields_bs4(self, html: str, url: str) -> Dict:
+        """Estrae i campi con BeautifulSoup, un estrattore alla volta"""
+        # Parse HTML (ritorni a capo normalizzati come nel percorso lxml)
+        soup = BeautifulSoup(normalize_newlines(html), 'html.parser')
+        
+        # L'ordine conta: _extract_content rimuove script e style dall'albero
+        return {
+            'title': self._extract_title(soup),
+            'meta_description': self._extract_meta_description(soup),
+            'headings': self._extract_headings(soup),
+            'images': self._extract_images(soup, url),
+            'raw_links': self._extract_raw_links(soup),
+            'content': self._extract_content(soup),
+            'canonical_url': self._extract_canonical(soup),
+            'lang': self._extract_language(soup),
+            'schema_markup': self._extract_schema(soup),
+        }
     
     def _extract_title(self, soup: BeautifulSoup) -> str:
         """Estrae il titolo della pagina"""
@@ -203,24 +788,37 @@ class WebCrawler:
     
     def _extract_links(self, soup: BeautifulSoup, base_url: str) -> List[Dict]:
         """Estrae tutti i link dalla pagina"""
-        links = []
-        for link in soup.find_all('a', href=True):
-            href = link['href']
-            absolute_url = urljoin(base_url, href)
-            
-            links.append({
-                'url': absolute_url,
+        return self._process_links(self._extract_raw_links(soup), base_url)
+    
+    def _extract_raw_links(self, soup: BeautifulSoup) -> List[Dict]:
+        """Link della pagina così come compaiono nell'HTML"""
+        return [
+            {
+                'href': link['href'],
                 'text': link.get_text().strip(),
                 'title': link.get('title', ''),
                 'rel': link.get('rel', []),
-                'is_external': urlparse(absolute_url).netloc != self.domain
+            }
+            for link in soup.find_all('a', href=True)
+        ]
+    
+    def _process_links(self, raw_links: List[Dict], base_url: str) -> List[Dict]:
+        """Risolve i link estratti e accoda quelli da visitare"""
+        links = []
+        depth = self.to_visit.depth_of(base_url) + 1
+        classified = self.url_classifier.classify_all(base_url, [link['href'] for link in raw_links])
+        for link, target in zip(raw_links, classified):
+            links.append({
+                'url': target.url,
+                'text': link['text'],
+                'title': link['title'],
+                'rel': link['rel'],
+                'is_external': target.is_external
             })
             
-            # Aggiungi alla coda se è interno e non ancora visitato
-            if (self._should_crawl_url(absolute_url) and 
-                absolute_url not in self.visited_urls and
-                len(self.visited_urls) < CRAWL_CONFIG['max_pages']):
-                self.to_visit.put(absolute_url)
+            # Aggiungi alla coda se è interno (la frontiera scarta gli URL già visti)
+            if target.crawlable and len(self.visited_urls) < CRAWL_CONFIG['max_pages']:
+                self.to_visit.push(target.url, depth)
         
         return links
     
@@ -279,23 +877,27 @@ class WebCrawler:
         
         return schemas
     
-    def _get_selenium_data(self, url: str) -> Dict:
+    def _submit_render(self, url: str) -> Future:
+        """Accoda il rendering di una pagina su un browser libero del pool"""
+        return self.webdriver_pool.submit(lambda driver: self._get_selenium_data(driver, url))
+    
+    def _get_selenium_data(self, driver: webdriver.Chrome, url: str) -> Dict:
         """Ottiene dati aggiuntivi usando Selenium"""
         try:
-            self.driver.get(url)
+            driver.get(url)
             
             # Tempo di caricamento
-            navigation_start = self.driver.execute_script("return window.performance.timing.navigationStart")
-            dom_complete = self.driver.execute_script("return window.performance.timing.domComplete")
+            navigation_start = driver.execute_script("return window.performance.timing.navigationStart")
+            dom_complete = driver.execute_script("return window.performance.timing.domComplete")
             page_load_time = (dom_complete - navigation_start) / 1000.0
             
             # Dimensioni viewport
-            viewport_size = self.driver.execute_script("return {width: window.innerWidth, height: window.innerHeight}")
+            viewport_size = driver.execute_script("return {width: window.innerWidth, height: window.innerHeight}")
             
             # JavaScript errors (se presenti nei log)
             js_errors = []
             try:
-                logs = self.driver.get_log('browser')
+                logs = driver.get_log('browser')
                 js_errors = [log for log in logs if log['level'] == 'SEVERE']
             except:
                 pass
@@ -311,70 +913,444 @@ class WebCrawler:
             self.logger.warning(f"Errore Selenium per {url}: {e}")
             return {'has_javascript': False}
     
-    def crawl(self) -> List[Dict]:
-        """Esegue il crawling completo del sito"""
+    def crawl(self, on_page: Optional[Callable[[Dict], None]] = None) -> List[Dict]:
+        """
+        Esegue il crawling completo del sito.
+        
+        on_page, se indicato, riceve ogni pagina appena registrata (prima
+        quelle riprese da un checkpoint), dal thread del crawling.
+        """
+        self._start_crawl(on_page)
+        
+        status = 'interrupted'
+        try:
+            with tqdm(total=CRAWL_CONFIG['max_pages'], initial=len(self.pages_data), desc="Crawling pagine") as pbar:
+                if CRAWL_CONFIG['async_mode']:
+                    asyncio.run(self._crawl_async(pbar))
+                else:
+                    self._crawl_sync(pbar)
+            
+            status = self._finish_fetching()
+        
+        except KeyboardInterrupt:
+            self.logger.info("Crawling interrotto dall'utente")
+        
+        finally:
+            self._end_crawl(status)
+        
+        self._report_completion()
+        return self.pages_data
+    
+    async def crawl_async(self, session: aiohttp.ClientSession, worker_budget: Optional[asyncio.Semaphore] = None,
+                          on_page: Optional[Callable[[Dict], None]] = None,
+                          parse_pool: Optional[ParsePool] = None) -> List[Dict]:
+        """
+        Crawling completo con il motore asincrono, dentro un event loop già attivo.
+        
+        La sessione aiohttp (pool di connessioni e cache DNS) e il budget di
+        richieste in volo possono essere condivisi con i crawler di altri siti
+        (vedi BatchCrawler), come il pool di parsing; frontiera, cortesia,
+        robots.txt e pagine restano di questo crawler. Le fasi bloccanti (robots.txt, sitemap, verifica dei
+        link) vengono eseguite in un thread per non fermare gli altri siti.
+        """
+        loop = asyncio.get_running_loop()
+        self.worker_budget = worker_budget
+        self.parse_pool = parse_pool
+        await loop.run_in_executor(None, self._start_crawl, on_page)
+        
+        status = 'interrupted'
+        try:
+            with tqdm(total=CRAWL_CONFIG['max_pages'], initial=len(self.pages_data), desc=self.domain, leave=False) as pbar:
+                await self._crawl_async(pbar, session)
+            
+            status = await loop.run_in_executor(None, self._finish_fetching)
+        
+        finally:
+            self._end_crawl(status)
+        
+        self._report_completion()
+        return self.pages_data
+    
+    def _start_crawl(self, on_page: Optional[Callable[[Dict], None]]):
+        """robots.txt, browser, pagina iniziale e sitemap prima del ciclo di crawling"""
         self.is_running = True
         self.logger.info(f"Inizio crawling di {self.start_url}")
         
+        if on_page:
+            self.on_page = on_page
+        if self.on_page:
+            for page in self.pages_data:
+                self.on_page(page)
+        
         if self.callback:
             self.callback("Inizializzazione crawler...")
         
         # Setup iniziale
         self._load_robots_txt()
-        selenium_available = self._setup_selenium()
+        selenium_available = self._setup_selenium() if self.render_policy.enabled else False
+        self._setup_page_processing()
         
-        # Aggiungi URL di partenza
-        self.to_visit.put(self.start_url)
+        # Aggiungi URL di partenza (già presente se il crawling è stato ripreso)
+        self.to_visit.push(self.start_url)
         
-        try:
-            with tqdm(total=CRAWL_CONFIG['max_pages'], desc="Crawling pagine") as pbar:
-                while (not self.to_visit.empty() and 
-                       len(self.visited_urls) < CRAWL_CONFIG['max_pages'] and
-                       self.is_running):
-                    
-                    current_url = self.to_visit.get()
+        if CHECKS_CONFIG['check_sitemap']:
+            if self.callback:
+                self.callback("Lettura sitemap...")
+            self._load_sitemaps()
+            # La pagina iniziale resta la prima da visitare anche rispetto agli URL della sitemap
+            self.to_visit.set_sitemap_priority(self.start_url, 1.0)
+        
+        if self.checkpoint:
+            self.checkpoint.set_meta('status', 'running')
+            self.checkpoint.commit()
+        
+    def _setup_page_processing(self):
+        """Cache delle risposte e pool di parsing, se non già forniti da chi ha creato il crawler"""
+        if self.cache is None and HTTP_CACHE_CONFIG['enabled']:
+            self.cache = ResponseCache(HTTP_CACHE_CONFIG['path'])
+            self._owns_cache = True
+        
+        # Parsing nei processi del pool (solo l'estrattore single-pass: quello BeautifulSoup resta qui)
+        if self.parse_pool is None and PARSE_CONFIG['enabled'] and CRAWL_CONFIG['extraction_engine'] == 'lxml':
+            self.parse_pool = ParsePool(PARSE_CONFIG['workers'], PARSE_CONFIG['max_pending'])
+            self._owns_parse_pool = True
+        
+    def _finish_fetching(self) -> str:
+        """Chiude il ciclo di crawling (verifica dei link) e restituisce lo stato per il checkpoint"""
+        if self.retries.abandoned:
+            self.logger.warning(
+                f"{len(self.retries.abandoned)} URL non scaricati perché il loro host non risponde"
+            )
+            
+        if self.is_running and LINK_CHECK_CONFIG['enabled']:
+            self.check_links()
+            
+        return 'completed' if self.is_running else 'interrupted'
+            
+    def _end_crawl(self, status: str):
+        """Rilascia browser, checkpoint e cache al termine (o all'interruzione) del crawling"""
+        if self.webdriver_pool:
+            self.webdriver_pool.close()
+            self.webdriver_pool = None
                     
-                    if current_url in self.visited_urls:
+        if self.checkpoint:
+            self.checkpoint.set_meta('status', status)
+            self.checkpoint.close()
+        
+        if self.parse_pool and self._owns_parse_pool:
+            self.parse_pool.close()
+            self.parse_pool = None
+            self._owns_parse_pool = False
+        
+        if self.cache and self._owns_cache:
+            self.cache.close()
+            self.cache = None
+            self._owns_cache = False
+            
+        self.is_running = False
+            
+    def _report_completion(self):
+        self.logger.info(f"Crawling completato. Analizzate {len(self.pages_data)} pagine")
+        
+        if self.callback:
+            self.callback(f"Crawling completato! Analizzate {len(self.pages_data)} pagine")
+    
+    def iter_pages(self) -> Iterator[Dict]:
+        """
+        Esegue il crawling in un thread e restituisce le pagine man mano che
+        vengono registrate, così l'analisi procede mentre si attende la rete.
+        
+        Se il generatore viene chiuso prima della fine il crawling viene
+        fermato; le eccezioni del crawling vengono rilanciate qui.
+        """
+        pages: queue.Queue = queue.Queue()
+        finished = object()
+        errors = []
+        
+        def run():
+            try:
+                self.crawl(on_page=pages.put)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                pages.put(finished)
+        
+        thread = threading.Thread(target=run, name='crawler', daemon=True)
+        thread.start()
+        try:
+            while True:
+                page = pages.get()
+                if page is finished:
+                    break
+                yield page
+        finally:
+            if thread.is_alive():
+                self.stop_crawling()
+            thread.join()
+            self.on_page = None
+        
+        if errors:
+            raise errors[0]
+    
+    def _crawl_sync(self, pbar: tqdm):
+        """Ciclo di crawling sequenziale: una pagina alla volta"""
+        # Pagine in attesa del parsing o del rendering: processi e browser lavorano mentre si scaricano le successive
+        pending = deque()  # [URL, pagina o PendingPage, rendering in corso]
+        
+        try:
+            while (len(self.visited_urls) + len(pending) < CRAWL_CONFIG['max_pages'] and
+                   self.is_running):
+                
+                current_url = self._next_url()
+                if current_url is None:
+                    if pending:
+                        # I link delle pagine ancora in lavorazione possono riempire la frontiera
+                        self._record_pending(pending, pbar, wait=True)
                         continue
+                    # Restano solo URL da riprovare più tardi: attende il primo pronto
+                    wait = self.retries.next_due()
+                    if wait is None:
+                        # Con la coda condivisa gli altri shard possono ancora accodare URL
+                        if self.to_visit.empty():
+                            break
+                        wait = SHARD_CONFIG['poll_interval']
+                    time.sleep(min(wait, 1.0))
+                    continue
+                
+                if self.callback:
+                    self.callback(f"Analizzando: {current_url}")
+                
+                # Fetch della pagina (il ritmo per host è gestito da self.scheduler)
+                entry = [current_url, self._fetch_page(current_url), None]
+                pending.append(entry)
+                if not isinstance(entry[1], PendingPage):
+                    self._submit_pending_render(entry)
+                
+                # Registra in ordine le pagine pronte; attende se parsing e browser sono tutti occupati
+                self._record_pending(pending, pbar)
+        finally:
+            if not self.is_running:
+                for _, _, render in pending:
+                    if render is not None:
+                        render.cancel()
+            while pending:
+                self._record_pending(pending, pbar, wait=True)
+    
+    def _submit_pending_render(self, entry: List):
+        """Avvia il rendering di una pagina in sospeso, se richiesto"""
+        page_data = entry[1]
+        if page_data and page_data.get('render_reason') and self.is_running:
+            entry[2] = self._submit_render(entry[0])
+    
+    def _record_pending(self, pending: deque, pbar: tqdm, wait: bool = False):
+        """
+        Completa le pagine il cui parsing è terminato (accodandone i link e
+        avviandone il rendering) e registra in ordine quelle pronte. Attende
+        la prima pagina se wait è vero o se le pagine in sospeso hanno
+        raggiunto la capacità di pool di parsing e browser.
+        """
+        for entry in pending:
+            if isinstance(entry[1], PendingPage) and entry[1].future.done():
+                entry[1] = self._complete_page(entry[1])
+                self._submit_pending_render(entry)
+        
+        capacity = max(1, (self.parse_pool.max_pending if self.parse_pool else 0) +
+                       (self.webdriver_pool.size if self.webdriver_pool else 0))
+        while pending:
+            url, page_data, render = pending[0]
+            ready = not isinstance(page_data, PendingPage) and (render is None or render.done())
+            if not (ready or wait or len(pending) >= capacity):
+                break
+            
+            if isinstance(page_data, PendingPage):
+                pending[0][1] = self._complete_page(page_data)
+                self._submit_pending_render(pending[0])
+                url, page_data, render = pending[0]
+            
+            pending.popleft()
+            if render is not None:
+                self._record_rendered_page(url, page_data, render, pbar)
+            else:
+                self._record_page(url, page_data, pbar)
+            wait = False
+    
+    def _record_rendered_page(self, url: str, page_data: Dict, future: Future, pbar: tqdm):
+        """Aggiunge le metriche Selenium alla pagina e la registra"""
+        try:
+            page_data.update(future.result())
+        except Exception as e:
+            self.logger.warning(f"Rendering non completato per {url}: {e!r}")
+        self._record_page(url, page_data, pbar)
+    
+    async def _crawl_async(self, pbar: tqdm, session: Optional[aiohttp.ClientSession] = None):
+        """
+        Ciclo di crawling asincrono con al più CRAWL_CONFIG['concurrency']
+        richieste in volo; senza una sessione condivisa ne apre una propria.
+        """
+        if session is None:
+            timeout = aiohttp.ClientTimeout(total=CRAWL_CONFIG['timeout'])
+            connector = aiohttp.TCPConnector(limit=max(1, CRAWL_CONFIG['concurrency']))
+            async with aiohttp.ClientSession(headers=HTTP_HEADERS, timeout=timeout, connector=connector) as session:
+                await self._crawl_async(pbar, session)
+            return
+        
+        concurrency = max(1, CRAWL_CONFIG['concurrency'])
+        in_flight: Dict[asyncio.Task, str] = {}
+        
+        # concurrency resta il tetto complessivo; per host il limite si adatta a latenza ed errori
+        if CRAWL_CONFIG['adaptive_concurrency']:
+            self.host_concurrency = AdaptiveConcurrency(
+                CRAWL_CONFIG['initial_host_concurrency'],
+                concurrency,
+                latency_threshold=CRAWL_CONFIG['latency_threshold'],
+                congestion_errors=(asyncio.TimeoutError, aiohttp.ClientConnectionError)
+            )
+        
+        try:
+            while self.is_running:
+                # Riempie gli slot liberi senza superare max_pages (contando anche le richieste in volo)
+                while (len(in_flight) < concurrency and
+                       len(self.visited_urls) + len(in_flight) < CRAWL_CONFIG['max_pages']):
+                    current_url = self._next_url()
+                    if current_url is None:
+                        break
                     
                     if self.callback:
                         self.callback(f"Analizzando: {current_url}")
                     
-                    # Fetch della pagina
-                    page_data = self._fetch_page(current_url)
-                    
-                    if page_data:
-                        self.pages_data.append(page_data)
-                        self.visited_urls.add(current_url)
-                        pbar.update(1)
-                        
-                        if self.callback:
-                            self.callback(f"Completate {len(self.visited_urls)} pagine su {CRAWL_CONFIG['max_pages']}")
-                    
-                    # Delay tra le richieste
-                    time.sleep(CRAWL_CONFIG['delay'])
-                    
-        except KeyboardInterrupt:
-            self.logger.info("Crawling interrotto dall'utente")
-        
+                    task = asyncio.create_task(self._fetch_page_async(session, current_url))
+                    in_flight[task] = current_url
+                
+                # Attende una risposta, o il primo URL da riprovare se arriva prima
+                wait = self.retries.next_due()
+                if not in_flight:
+                    if len(self.visited_urls) >= CRAWL_CONFIG['max_pages']:
+                        break
+                    if wait is None:
+                        # Con la coda condivisa gli altri shard possono ancora accodare URL
+                        if self.to_visit.empty():
+                            break
+                        wait = SHARD_CONFIG['poll_interval']
+                    await asyncio.sleep(min(wait, 1.0))
+                    continue
+                
+                done, _ = await asyncio.wait(in_flight.keys(), timeout=wait, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    current_url = in_flight.pop(task)
+                    self._record_page(current_url, task.result(), pbar)
         finally:
-            if self.driver:
-                self.driver.quit()
-            
-            self.is_running = False
-            
-        self.logger.info(f"Crawling completato. Analizzate {len(self.pages_data)} pagine")
+            # Crawling fermato: annulla le richieste ancora in corso
+            for task in in_flight:
+                task.cancel()
+            if in_flight:
+                await asyncio.gather(*in_flight, return_exceptions=True)
+        
+        if self.host_concurrency:
+            limits = ', '.join(f"{host}: {limit:.1f}" for host, limit in self.host_concurrency.limits.items())
+            self.logger.info(f"Richieste contemporanee per host al termine: {limits}")
+
+    def _next_url(self) -> Optional[str]:
+        """
+        Prossimo URL da scaricare: prima i nuovi tentativi già pronti, poi la
+        frontiera; gli URL degli host sospesi restano nella RetryQueue.
+        """
+        url = self.retries.pop_ready()
+        if url is not None:
+            return url
+        
+        while True:
+            url = self.to_visit.pop()
+            if url is None or self.retries.admit(url):
+                return url
+    
+    def _record_page(self, url: str, page_data: Optional[Dict], pbar: tqdm):
+        """Registra il risultato del fetch di una pagina"""
+        # Un URL da riprovare resta in sospeso nel checkpoint (alla ripresa torna in coda)
+        if url not in self.retries:
+            self.to_visit.complete(url)
+        
+        if not page_data:
+            return
+        
+        # Dopo un redirect: prima l'URL di partenza, poi la pagina di destinazione
+        redirect = page_data.pop('redirected_from', None)
+        if redirect:
+            self._store_page(redirect, pbar)
+        self._store_page(page_data, pbar)
+    
+    def _store_page(self, page_data: Dict, pbar: tqdm):
+        """Aggiunge un record alle pagine raccolte (e al checkpoint)"""
+        self.links.add_page(page_data)
+        page = self._compact_page(page_data)
+        self.pages_data.append(page)
+        self.visited_urls.add(page_data['url'])
+        pbar.update(1)
+        
+        if self.on_page:
+            self.on_page(page)
+        
+        if self.checkpoint:
+            self.checkpoint.save_page(page_data)
+            if len(self.pages_data) % CRAWL_CONFIG['checkpoint_interval'] == 0:
+                self.checkpoint.commit()
         
         if self.callback:
-            self.callback(f"Crawling completato! Analizzate {len(self.pages_data)} pagine")
+            self.callback(f"Completate {len(self.visited_urls)} pagine su {CRAWL_CONFIG['max_pages']}")
+    
+    def _compact_page(self, page_data: Dict) -> Dict:
+        """Record compatto della pagina (stessa interfaccia del dizionario)"""
+        if CRAWL_CONFIG['compact_records']:
+            return PageRecord(self.url_table, page_data)
+        return page_data
+    
+    def check_links(self):
+        """
+        Verifica una volta ogni destinazione dei link non ancora scaricata dal
+        crawler; gli esiti finiscono in self.links.statuses.
+        """
+        targets = []
+        for url in self.links.unchecked():
+            is_external = urlsplit(url).netloc != self.domain
+            if is_external and not LINK_CHECK_CONFIG['check_external']:
+                continue
+            # Gli URL interni esclusi da robots.txt non vengono richiesti
+            if not is_external and CRAWL_CONFIG['respect_robots'] and not self.robots.can_fetch(url):
+                continue
+            targets.append(url)
         
-        return self.pages_data
+        if len(targets) > LINK_CHECK_CONFIG['max_links']:
+            self.logger.warning(
+                f"{len(targets)} link da verificare: controllati solo i primi {LINK_CHECK_CONFIG['max_links']}"
+            )
+            targets = targets[:LINK_CHECK_CONFIG['max_links']]
+        if not targets:
+            return
+        
+        if self.callback:
+            self.callback(f"Verifica di {len(targets)} link...")
+        
+        cache = LinkCheckCache(LINK_CHECK_CONFIG['cache_path'], LINK_CHECK_CONFIG['cache_ttl_hours'] * 3600)
+        checker = LinkChecker(
+            HTTP_HEADERS,
+            LINK_CHECK_CONFIG['timeout'],
+            LINK_CHECK_CONFIG['concurrency'],
+            LINK_CHECK_CONFIG['per_host'],
+            cache=cache,
+            before_fetch=self.scheduler.wait_async
+        )
+        try:
+            self.links.statuses.update(checker.check(targets))
+        finally:
+            cache.close()
+        
+        self.logger.info(
+            f"Link verificati: {len(targets)} destinazioni uniche su {len(self.links)}, "
+            f"{checker.requests} richieste, {checker.cache_hits} esiti dalla cache"
+        )
     
     def stop_crawling(self):
         """Ferma il crawling"""
         self.is_running = False
-        if self.driver:
-            self.driver.quit()
     
     def get_crawl_summary(self) -> Dict:
         """Restituisce un riassunto del crawling"""
@@ -0,0 +1,129 @@
+"""
+Risoluzione del percorso di chromedriver con cache locale e modalità offline
+"""
+
+import json
+import logging
+import re
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+from webdriver_manager.chrome import ChromeDriverManager
+from webdriver_manager.core.os_manager import OperationSystemManager, ChromeType
+
+VERSION_RE = re.compile(r'(\d+)\.[\d.]+')
+
+
+def _major(version: Optional[str]) -> Optional[str]:
+    match = VERSION_RE.search(version or '')
+    return match.group(1) if match else None
+
+
+class DriverResolver:
+    """
+    Restituisce il percorso di chromedriver senza interrogare la rete a ogni crawling.
+
+    In ordine: percorso configurato (driver_path), percorso salvato nella cache
+    su disco se il file esiste ancora e la versione principale di Chrome non è
+    cambiata, altrimenti ChromeDriverManager().install() (richiede rete) e
+    aggiornamento della cache. In modalità offline la rete non viene mai usata.
+    """
+
+    def __init__(self, cache_path: Union[str, Path], driver_path: Optional[str] = None, offline: bool = False):
+        self.cache_path = Path(cache_path)
+        self.driver_path = driver_path
+        self.offline = offline
+        self._resolved: Optional[str] = None
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    @property
+    def can_refresh(self) -> bool:
+        """True se un driver incompatibile può essere sostituito scaricandone uno nuovo"""
+        return not self.driver_path and not self.offline
+
+    def resolve(self, force: bool = False) -> str:
+        """Percorso di chromedriver (risolto una sola volta per istanza)"""
+        with self._lock:
+            if self._resolved and not force:
+                return self._resolved
+
+            if self.driver_path:
+                if not Path(self.driver_path).exists():
+                    raise FileNotFoundError(f"chromedriver configurato non trovato: {self.driver_path}")
+                self._resolved = self.driver_path
+                return self._resolved
+
+            cached = None if force else self._load_cache()
+            if cached:
+                self._resolved = cached['path']
+                return self._resolved
+
+            if self.offline:
+                raise RuntimeError(
+                    "Modalità offline: configura SELENIUM_CONFIG['driver_path'] "
+                    "oppure esegui un crawling online per salvare chromedriver in cache"
+                )
+
+            started = time.monotonic()
+            path = ChromeDriverManager().install()
+            self._save_cache(path)
+            self.logger.info(f"chromedriver risolto in {time.monotonic() - started:.1f}s: {path}")
+            self._resolved = path
+            return self._resolved
+
+    def _browser_version(self) -> Optional[str]:
+        """Versione di Chrome installata (comando locale, senza rete)"""
+        try:
+            return OperationSystemManager().get_browser_version_from_os(ChromeType.GOOGLE)
+        except Exception:
+            return None
+
+    def _driver_version(self, path: str) -> Optional[str]:
+        try:
+            output = subprocess.run([path, '--version'], capture_output=True, text=True, timeout=10).stdout
+        except (OSError, subprocess.SubprocessError):
+            return None
+        match = VERSION_RE.search(output)
+        return match.group(0) if match else None
+
+    def _load_cache(self) -> Optional[Dict]:
+        """Voce in cache ancora valida, o None"""
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if not cached.get('path') or not Path(cached['path']).exists():
+            return None
+
+        # Chrome aggiornato a una nuova versione principale: serve un driver diverso
+        browser_major = _major(self._browser_version())
+        if browser_major and browser_major != _major(cached.get('browser_version')):
+            if self.offline:
+                self.logger.warning(
+                    f"chromedriver in cache ({cached.get('driver_version')}) non allineato a Chrome "
+                    f"{browser_major}: in modalità offline viene usato comunque"
+                )
+                return cached
+            return None
+
+        return cached
+
+    def _save_cache(self, path: str):
+        entry = {
+            'path': path,
+            'driver_version': self._driver_version(path),
+            'browser_version': self._browser_version(),
+            'resolved_at': time.time(),
+        }
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.cache_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+        except OSError as e:
+            self.logger.warning(f"Impossibile salvare la cache di chromedriver: {e}")
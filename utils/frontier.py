@@ -0,0 +1,243 @@
+"""
+Frontiera del crawler: coda degli URL da visitare con deduplicazione
+"""
+
+import heapq
+import itertools
+import math
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+# Dopo quanti giorni dal lastmod il segnale di freschezza si dimezza
+FRESHNESS_HALF_LIFE_DAYS = 30
+
+
+def canonicalize_url(url: str, tracking_params: Iterable[str] = ()) -> str:
+    """
+    Restituisce la forma canonica di un URL, usata come chiave di deduplicazione.
+
+    Rimuove frammento, porta di default e parametri di tracciamento
+    ('utm_*' indica un prefisso), porta schema e host in minuscolo, ordina
+    la query e toglie lo slash finale dai path diversi dalla radice.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+
+    netloc = (parts.hostname or '').rstrip('.')
+    if ':' in netloc:
+        netloc = f'[{netloc}]'  # IPv6
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    if port and port != DEFAULT_PORTS.get(scheme):
+        netloc = f'{netloc}:{port}'
+    if parts.username:
+        userinfo = parts.username + (f':{parts.password}' if parts.password else '')
+        netloc = f'{userinfo}@{netloc}'
+
+    path = parts.path or '/'
+    if len(path) > 1 and path.endswith('/'):
+        path = path.rstrip('/') or '/'
+
+    query = ''
+    if parts.query:
+        params = [
+            (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+            if not _is_tracking_param(key, tracking_params)
+        ]
+        query = urlencode(sorted(params))
+
+    return urlunsplit((scheme, netloc, path, query, ''))
+
+
+def _is_tracking_param(name: str, tracking_params: Iterable[str]) -> bool:
+    name = name.lower()
+    for pattern in tracking_params:
+        if pattern.endswith('*'):
+            if name.startswith(pattern[:-1]):
+                return True
+        elif name == pattern:
+            return True
+    return False
+
+
+class FrontierEntry:
+    """Stato di un URL noto alla frontiera"""
+
+    __slots__ = ('url', 'depth', 'inlinks', 'sitemap_priority', 'lastmod', 'version', 'done')
+
+    def __init__(self, url: str, depth: int):
+        self.url = url
+        self.depth = depth
+        self.inlinks = 0
+        self.sitemap_priority: Optional[float] = None
+        self.lastmod: Optional[float] = None
+        self.version = 0
+        self.done = False
+
+
+def sitemap_priority_signal(entry: FrontierEntry) -> float:
+    """Priorità dichiarata nella sitemap (0.0-1.0), 0 se l'URL non è in sitemap"""
+    return entry.sitemap_priority or 0.0
+
+
+def freshness_signal(entry: FrontierEntry) -> float:
+    """Freschezza del lastmod dichiarato in sitemap: 1.0 se appena modificato, 0 se assente"""
+    if entry.lastmod is None:
+        return 0.0
+    age_days = max(0.0, time.time() - entry.lastmod) / 86400
+    return 0.5 ** (age_days / FRESHNESS_HALF_LIFE_DAYS)
+
+
+def inlink_signal(entry: FrontierEntry) -> float:
+    """Numero di link in ingresso scoperti finora (scala logaritmica)"""
+    return math.log1p(entry.inlinks)
+
+
+class URLFrontier:
+    """
+    Coda di priorità degli URL da visitare, con insieme dei già visti
+    indicizzato sull'URL canonico.
+
+    Ogni URL canonico entra in coda una sola volta: memoria e fetch
+    crescono con gli URL unici, non con il numero totale di link. L'ordine
+    dipende dalla profondità di scoperta e dai segnali di priorità
+    registrati (sitemap, link in ingresso, ...): punteggio più basso = prima.
+    Gli URL oltre max_depth vengono scartati.
+    """
+
+    def __init__(self, tracking_params: Iterable[str] = (), max_depth: Optional[int] = None,
+                 depth_weight: float = 1.0):
+        self.tracking_params = tuple(p.lower() for p in tracking_params)
+        self.max_depth = max_depth
+        self.depth_weight = depth_weight
+        self._signals: List[Tuple[Callable[[FrontierEntry], float], float]] = []
+        self._entries: Dict[str, FrontierEntry] = {}
+        self._heap: List[Tuple[float, int, int, str]] = []
+        self._counter = itertools.count()
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def add_signal(self, signal: Callable[[FrontierEntry], float], weight: float = 1.0):
+        """Registra un segnale di priorità: valori più alti anticipano l'URL"""
+        self._signals.append((signal, weight))
+
+    def canonicalize(self, url: str) -> str:
+        return canonicalize_url(url, self.tracking_params)
+
+    def _score(self, entry: FrontierEntry) -> float:
+        score = entry.depth * self.depth_weight
+        for signal, weight in self._signals:
+            score -= weight * signal(entry)
+        return score
+
+    def _schedule(self, key: str, entry: FrontierEntry):
+        entry.version += 1
+        heapq.heappush(self._heap, (self._score(entry), next(self._counter), entry.version, key))
+
+    def push(self, url: str, depth: int = 0) -> bool:
+        """
+        Accoda l'URL se non è mai stato visto; restituisce True se è stato accodato.
+
+        Se l'URL è già in attesa aggiorna link in ingresso e profondità minima
+        e lo riposiziona nella coda.
+        """
+        if self.max_depth is not None and depth > self.max_depth:
+            return False
+
+        key = self.canonicalize(url)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = FrontierEntry(url.split('#', 1)[0], depth)
+                self._entries[key] = entry
+                self._pending += 1
+                self._schedule(key, entry)
+                return True
+
+            if not entry.done:
+                entry.inlinks += 1
+                # Riposiziona solo quando la priorità cambia in modo apprezzabile
+                # (profondità minore o inlink a potenze di 2): l'heap resta O(URL unici)
+                if depth < entry.depth or entry.inlinks & (entry.inlinks - 1) == 0:
+                    entry.depth = min(entry.depth, depth)
+                    self._schedule(key, entry)
+            return False
+
+    def requeue(self, url: str):
+        """Rimette in coda un URL già estratto (es. dopo un 429)"""
+        key = self.canonicalize(url)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or not entry.done:
+                return
+            entry.done = False
+            self._pending += 1
+            self._schedule(key, entry)
+
+    def set_sitemap_priority(self, url: str, priority: float, lastmod: Optional[float] = None):
+        """Registra priorità e lastmod dichiarati in sitemap per un URL in attesa"""
+        key = self.canonicalize(url)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not entry.done:
+                entry.sitemap_priority = priority
+                entry.lastmod = lastmod
+                self._schedule(key, entry)
+
+    def pop(self) -> Optional[str]:
+        """Estrae l'URL con priorità più alta, o None se la coda è vuota"""
+        with self._lock:
+            while self._heap:
+                _, _, version, key = heapq.heappop(self._heap)
+                entry = self._entries[key]
+                if entry.done or entry.version != version:
+                    continue  # voce superata da un riposizionamento
+                entry.done = True
+                self._pending -= 1
+                return entry.url
+            return None
+
+    def complete(self, url: str):
+        """Segna un URL estratto come visitato (già implicito in pop per la frontiera in memoria)"""
+
+    def mark_visited(self, url: str, depth: int = 0) -> bool:
+        """
+        Segna come visitato un URL raggiunto senza passare dalla coda (es. la
+        destinazione di un redirect); restituisce False se era già stato estratto.
+        """
+        key = self.canonicalize(url)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = FrontierEntry(url.split('#', 1)[0], depth)
+                self._entries[key] = entry
+            elif entry.done:
+                return False
+            else:
+                self._pending -= 1
+            entry.done = True
+            return True
+
+    def depth_of(self, url: str) -> int:
+        """Profondità di scoperta di un URL noto (0 se sconosciuto)"""
+        entry = self._entries.get(self.canonicalize(url))
+        return entry.depth if entry else 0
+
+    def is_seen(self, url: str) -> bool:
+        return self.canonicalize(url) in self._entries
+
+    def empty(self) -> bool:
+        return self._pending == 0
+
+    def __len__(self) -> int:
+        return self._pending
+
+    @property
+    def seen_count(self) -> int:
+        return len(self._entries)
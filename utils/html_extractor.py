@@ -0,0 +1,332 @@
+"""
+Estrazione single-pass dei dati SEO dall'HTML (lxml)
+
+Un unico passaggio del parser lxml, senza costruire l'albero, raccoglie tutti
+i campi che gli estrattori BeautifulSoup di WebCrawler ottengono con una
+visita separata ciascuno. Su HTML ben formato il risultato replica quello del
+percorso BeautifulSoup ('html.parser'), incluse le sue particolarità:
+
+- il testo di script, style, template, rt e rp è escluso da get_text();
+- script e style sono rimossi prima di calcolare testo e rapporto testo/HTML;
+- per questo il JSON-LD non compare in schema_markup (gli script sono già
+  stati rimossi quando viene estratto lo schema);
+- le stringhe di soli spazi (fuori da pre e textarea) valgono un solo a
+  capo o spazio. I ritorni a capo CRLF e CR diventano LF prima di entrambi
+  i percorsi (normalize_newlines), come fanno libxml2 e i browser.
+
+Restano diversi i casi in cui libxml2 corregge il markup prima di passarlo
+al target, mentre html.parser lo prende alla lettera:
+
+- un <a> aperto dentro un altro <a> (o non chiuso prima del successivo)
+  chiude il precedente, il cui testo non comprende quindi quello dei link
+  seguenti;
+- i tag di chiusura senza apertura sono ignorati senza separare il testo
+  attorno, e gli elementi fuori posto (es. <p> in un heading, testo dentro
+  <table>) vengono chiusi o spostati;
+- il contenuto di title e textarea è testo: eventuali tag al loro interno
+  compaiono nel testo invece di essere analizzati (le versioni recenti di
+  html.parser si comportano allo stesso modo).
+"""
+
+import re
+from typing import Dict, List, Optional
+from urllib.parse import urljoin
+
+from lxml import etree
+
+# Elementi il cui testo non è una NavigableString semplice per BeautifulSoup
+STRING_CONTAINERS = {'script', 'style', 'template', 'rt', 'rp'}
+
+# Elementi rimossi (decompose) prima dell'estrazione del contenuto
+REMOVED_ELEMENTS = {'script', 'style'}
+
+# Elementi in cui BeautifulSoup conserva le stringhe di soli spazi
+PRESERVE_WHITESPACE_ELEMENTS = {'pre', 'textarea'}
+
+# Spazi ASCII: una stringa composta solo da questi è ridotta da BeautifulSoup a '\n' o ' '
+ASCII_SPACES = ' \n\t\x0c\r'
+
+# Elementi vuoti serializzati come <tag/> da BeautifulSoup
+VOID_ELEMENTS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'keygen',
+    'link', 'menuitem', 'meta', 'param', 'source', 'track', 'wbr',
+    'basefont', 'bgsound', 'command', 'frame', 'image', 'isindex', 'nextid', 'spacer',
+}
+
+# Attributi multi-valore (normalizzati come liste da BeautifulSoup)
+MULTI_VALUED_ATTRIBUTES = {
+    '*': {'class', 'accesskey', 'dropzone'},
+    'a': {'rel', 'rev'},
+    'link': {'rel', 'rev'},
+    'td': {'headers'},
+    'th': {'headers'},
+    'form': {'accept-charset'},
+    'object': {'archive'},
+    'area': {'rel'},
+    'icon': {'sizes'},
+    'iframe': {'sandbox'},
+    'output': {'for'},
+}
+
+HEADING_TAGS = {f'h{i}' for i in range(1, 7)}
+
+# Versione dei campi estratti: cambia quando lo stesso HTML produce campi diversi
+EXTRACTION_VERSION = 2
+
+# Elementi che libxml2 aggiunge se mancano nel sorgente (html.parser no)
+IMPLIED_ELEMENTS = {
+    tag: re.compile(rf'<{tag}[\s>/]', re.IGNORECASE) for tag in ('html', 'head', 'body')
+}
+
+# Spazi iniziali e attorno al doctype, scartati da libxml2 ma conservati da html.parser
+LEADING_WHITESPACE_RE = re.compile(r'([ \n\t\f\r]*)(?:<!doctype[^>]*>([ \n\t\f\r]*))?', re.IGNORECASE)
+
+
+def normalize_newlines(html: str) -> str:
+    """Ritorni a capo \\r\\n e \\r convertiti in \\n, come nel preprocessing dell'HTML"""
+    if '\r' not in html:
+        return html
+    return html.replace('\r\n', '\n').replace('\r', '\n')
+
+
+def _escaped_length(text: str) -> int:
+    """Lunghezza del testo dopo l'escape minimale di BeautifulSoup (&, <, >)"""
+    return len(text) + 4 * text.count('&') + 3 * (text.count('<') + text.count('>'))
+
+
+def _attribute_length(tag: str, name: str, value: str) -> int:
+    """Lunghezza di ' name="value"' come serializzato da BeautifulSoup"""
+    if name in MULTI_VALUED_ATTRIBUTES['*'] or name in MULTI_VALUED_ATTRIBUTES.get(tag, ()):
+        value = ' '.join(value.split())
+
+    length = _escaped_length(value)
+    if '"' in value and "'" in value:
+        length += 5 * value.count('"')  # " -> &quot;
+
+    return len(name) + length + 4
+
+
+class _ExtractionTarget:
+    """Target del parser lxml: riceve gli eventi SAX e accumula i campi"""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+
+        self.title: Optional[List[str]] = None
+        self.meta_description: Optional[str] = None
+        self.canonical_url: Optional[str] = None
+        self.lang: Optional[str] = None
+        self.headings: Dict[str, List] = {f'h{i}': [] for i in range(1, 7)}
+        self.images: List[Dict] = []
+        self.links: List[Dict] = []
+        self.microdata: List[Dict] = []
+
+        self.text_parts: List[str] = []
+        self.html_length = 0
+        self.started_tags: Dict[str, int] = {}
+
+        # Pila degli elementi aperti: (tag, buffer di testo catturato o None)
+        self._stack: List[tuple] = []
+        # Buffer che ricevono il testo (title, heading, link aperti)
+        self._captures: List[List[str]] = []
+        self._containers = 0  # STRING_CONTAINERS aperti
+        self._removed = 0     # script/style aperti
+        self._preserved = 0   # pre/textarea aperti
+        # Testo ricevuto dall'ultimo tag: libxml2 può spezzarlo in più eventi
+        self._pending: List[str] = []
+
+    def start(self, tag: str, attrib):
+        self._flush_text()
+        capture = None
+        self.started_tags[tag] = self.started_tags.get(tag, 0) + 1
+
+        if tag == 'title' and self.title is None:
+            capture = self.title = []
+        elif tag in HEADING_TAGS:
+            capture = []
+            self.headings[tag].append(capture)
+        elif tag == 'a' and 'href' in attrib:
+            capture = []
+            self.links.append({
+                'href': attrib['href'],
+                'text': capture,
+                'title': attrib.get('title', ''),
+                'rel': attrib.get('rel', '').split() if 'rel' in attrib else [],
+            })
+        elif tag == 'img':
+            src = attrib.get('src', '')
+            if src:
+                self.images.append({
+                    'src': urljoin(self.base_url, src),
+                    'alt': attrib.get('alt', ''),
+                    'title': attrib.get('title', ''),
+                    'width': attrib.get('width', ''),
+                    'height': attrib.get('height', ''),
+                })
+        elif tag == 'meta':
+            if self.meta_description is None and attrib.get('name') == 'description':
+                self.meta_description = attrib.get('content', '').strip()
+        elif tag == 'link':
+            rel = attrib.get('rel')
+            if (self.canonical_url is None and rel is not None and
+                    (rel == 'canonical' or 'canonical' in rel.split())):
+                self.canonical_url = attrib.get('href', '')
+        elif tag == 'html':
+            if self.lang is None:
+                self.lang = attrib.get('lang', '')
+
+        if tag in STRING_CONTAINERS:
+            self._containers += 1
+        if tag in PRESERVE_WHITESPACE_ELEMENTS:
+            self._preserved += 1
+
+        if tag in REMOVED_ELEMENTS:
+            self._removed += 1
+        elif not self._removed:
+            if 'itemscope' in attrib:
+                self.microdata.append({
+                    'type': 'microdata',
+                    'itemtype': attrib.get('itemtype', ''),
+                    'properties': {}
+                })
+
+            self.html_length += len(tag) + 2 + sum(
+                _attribute_length(tag, name, value) for name, value in attrib.items()
+            )
+            if tag in VOID_ELEMENTS:
+                self.html_length += 1
+
+        if capture is not None:
+            self._captures.append(capture)
+        self._stack.append((tag, capture))
+
+    def end(self, tag: str):
+        self._flush_text()
+        tag, capture = self._stack.pop()
+
+        if capture is not None:
+            self._captures.pop()
+
+        if tag in STRING_CONTAINERS:
+            self._containers -= 1
+        if tag in PRESERVE_WHITESPACE_ELEMENTS:
+            self._preserved -= 1
+
+        if tag in REMOVED_ELEMENTS:
+            self._removed -= 1
+        elif not self._removed and tag not in VOID_ELEMENTS:
+            self.html_length += len(tag) + 3
+
+    def data(self, data: str):
+        self._pending.append(data)
+
+    def _collapse(self, text: str) -> str:
+        """Stringa di soli spazi ridotta come in BeautifulSoup.endData (tranne in pre/textarea)"""
+        if self._preserved or text.strip(ASCII_SPACES):
+            return text
+        return '\n' if '\n' in text else ' '
+
+    def _flush_text(self):
+        """Registra il testo accumulato fino al tag corrente"""
+        if not self._pending:
+            return
+        data = self._collapse(''.join(self._pending))
+        self._pending = []
+
+        if self._containers:
+            # Testo di script/style/template/rt/rp: escluso da get_text()
+            if not self._removed:
+                self.html_length += _escaped_length(data)
+            return
+
+        for capture in self._captures:
+            capture.append(data)
+
+        self.text_parts.append(data)
+        self.html_length += _escaped_length(data)
+
+    def comment(self, text: str):
+        self._flush_text()
+        if self._removed:
+            return
+        text = self._collapse(text)
+
+        if text.startswith('?'):
+            self.html_length += len(text) + 2  # processing instruction
+        elif text.startswith('[CDATA['):
+            self.html_length += len(text) + 3
+        else:
+            self.html_length += len(text) + 7
+
+    def doctype(self, name: str, public_id: Optional[str], system_url: Optional[str]):
+        self._flush_text()
+        declaration = name or ''
+        if public_id:
+            declaration += f' PUBLIC "{public_id}"'
+            if system_url:
+                declaration += f' "{system_url}"'
+        elif system_url:
+            declaration += f' SYSTEM "{system_url}"'
+        self.html_length += len(declaration) + 12  # '<!DOCTYPE ' ... '>\n'
+
+    def close(self):
+        self._flush_text()
+        return self
+
+
+def _normalize_text(text: str) -> str:
+    """Normalizza gli spazi come WebCrawler._extract_content"""
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    return ' '.join(chunk for chunk in chunks if chunk)
+
+
+def extract_page_fields(html: str, base_url: str) -> Dict:
+    """
+    Estrae in un solo passaggio tutti i campi SEO della pagina.
+
+    I link sono restituiti grezzi ('raw_links': href non risolto, testo, title,
+    rel): la risoluzione e l'accodamento restano compito del crawler.
+    """
+    html = normalize_newlines(html)
+    target = _ExtractionTarget(base_url)
+    parser = etree.HTMLParser(target=target)
+    parser.feed(html)
+    parser.close()
+
+    text = _normalize_text(''.join(target.text_parts))
+    # Ogni gruppo di spazi vale un carattere, come le altre stringhe di soli spazi
+    html_length = target.html_length + sum(1 for space in LEADING_WHITESPACE_RE.match(html).groups('') if space)
+    for tag, tag_re in IMPLIED_ELEMENTS.items():
+        # Anche più volte, es. <html> riaperto per il testo dopo </html>
+        implied = target.started_tags.get(tag, 0) - len(tag_re.findall(html))
+        if implied > 0:
+            html_length -= implied * (2 * len(tag) + 5)
+
+    return {
+        'title': ''.join(target.title).strip() if target.title is not None else "",
+        'meta_description': target.meta_description or "",
+        'headings': {
+            level: [''.join(parts).strip() for parts in captures]
+            for level, captures in target.headings.items()
+        },
+        'images': target.images,
+        'raw_links': [
+            {
+                'href': link['href'],
+                'text': ''.join(link['text']).strip(),
+                'title': link['title'],
+                'rel': link['rel'],
+            }
+            for link in target.links
+        ],
+        'content': {
+            'text': text,
+            'word_count': len(text.split()),
+            'character_count': len(text),
+            'text_html_ratio': len(text) / html_length if html_length > 0 else 0
+        },
+        'canonical_url': target.canonical_url or "",
+        'lang': target.lang or "",
+        'schema_markup': target.microdata,
+    }
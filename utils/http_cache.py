@@ -0,0 +1,128 @@
+"""
+Cache su disco delle risposte HTTP con rivalidazione condizionale
+"""
+
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    content_type TEXT,
+    body BLOB NOT NULL,
+    stored_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS extractions (
+    url TEXT PRIMARY KEY,
+    digest TEXT NOT NULL,
+    fields BLOB NOT NULL
+);
+"""
+
+
+class ResponseCache:
+    """
+    Cache delle pagine indicizzata sull'URL canonico.
+
+    Conserva corpo (compresso), ETag e Last-Modified: ai crawling successivi
+    le richieste diventano condizionali e su 304 si riusa il corpo salvato.
+    Vengono salvate solo le risposte con almeno un validatore.
+
+    Conserva inoltre i campi estratti da ogni pagina insieme all'hash del
+    contenuto, così una pagina invariata non viene analizzata di nuovo.
+    """
+
+    def __init__(self, path: Union[str, Path], commit_every: int = 50):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.commit_every = commit_every
+
+        self._lock = threading.Lock()
+        self._pending_writes = 0
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Restituisce la voce in cache per la chiave, o None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, etag, last_modified, content_type, body FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        return {
+            'url': row[0],
+            'etag': row[1] or '',
+            'last_modified': row[2] or '',
+            'content_type': row[3] or '',
+            'body': zlib.decompress(row[4]),
+        }
+
+    @staticmethod
+    def conditional_headers(entry: Optional[Dict]) -> Dict[str, str]:
+        """Header If-None-Match / If-Modified-Since per rivalidare una voce"""
+        headers = {}
+        if entry:
+            if entry['etag']:
+                headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def put(self, key: str, url: str, body: bytes, headers) -> bool:
+        """Salva una risposta 200; restituisce False se non ha validatori"""
+        etag = headers.get('etag', '')
+        last_modified = headers.get('last-modified', '')
+        if not etag and not last_modified:
+            return False
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, url, etag, last_modified, content_type, body, stored_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, url, etag, last_modified, headers.get('content-type', ''), zlib.compress(body), time.time())
+            )
+            self._pending_writes += 1
+            if self._pending_writes >= self.commit_every:
+                self._conn.commit()
+                self._pending_writes = 0
+        return True
+
+    def get_fields(self, url: str, digest: str) -> Optional[Dict]:
+        """Campi estratti in precedenza dall'URL, se il contenuto ha lo stesso hash"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fields FROM extractions WHERE url = ? AND digest = ?", (url, digest)
+            ).fetchone()
+        return json.loads(zlib.decompress(row[0])) if row else None
+
+    def put_fields(self, url: str, digest: str, fields: Dict):
+        """Salva i campi estratti da una pagina con l'hash del suo contenuto"""
+        data = zlib.compress(json.dumps(fields, ensure_ascii=False, default=str).encode('utf-8'))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO extractions (url, digest, fields) VALUES (?, ?, ?)",
+                (url, digest, data)
+            )
+            self._pending_writes += 1
+            if self._pending_writes >= self.commit_every:
+                self._conn.commit()
+                self._pending_writes = 0
+
+    def close(self):
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
@@ -0,0 +1,248 @@
+"""
+Verifica dei link: ogni destinazione unica viene controllata una sola volta (HEAD, poi GET parziale)
+"""
+
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Iterable, List, NamedTuple, Optional, Union
+from urllib.parse import urldefrag, urlsplit
+
+import aiohttp
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS links (
+    url TEXT PRIMARY KEY,
+    status_code INTEGER,
+    error TEXT NOT NULL,
+    checked_at REAL NOT NULL
+);
+"""
+
+# Risposte a HEAD che spesso indicano solo il metodo non supportato: si riprova con GET
+HEAD_FALLBACK_STATUSES = {400, 403, 405, 501}
+
+
+class LinkStatus(NamedTuple):
+    """Esito della verifica di una destinazione"""
+    url: str
+    status_code: Optional[int]  # None se la richiesta non ha avuto risposta
+    error: str = ''
+
+    @property
+    def broken(self) -> bool:
+        return self.status_code is None or self.status_code >= 400
+
+    @property
+    def transient(self) -> bool:
+        """Esito da non conservare in cache (errore di rete, 429, 5xx)"""
+        return self.status_code is None or self.status_code == 429 or self.status_code >= 500
+
+    @property
+    def issue(self) -> str:
+        return f"HTTP {self.status_code}" if self.status_code is not None else f"Non raggiungibile: {self.error}"
+
+
+def link_target(url: str) -> Optional[str]:
+    """URL da verificare per un link (senza frammento); None se non è http(s)"""
+    if not url.startswith(('http://', 'https://')):
+        return None
+    return urldefrag(url)[0]
+
+
+class LinkCheckCache:
+    """Esiti delle verifiche su disco, validi per ttl secondi tra un crawling e l'altro"""
+
+    def __init__(self, path: Union[str, Path], ttl: float = 24 * 3600):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def get_many(self, urls: Iterable[str]) -> Dict[str, LinkStatus]:
+        """Esiti ancora validi per gli URL indicati"""
+        oldest = time.time() - self.ttl
+        found = {}
+        urls = list(urls)
+        with self._lock:
+            # Interrogazioni a blocchi: SQLite limita il numero di parametri
+            for start in range(0, len(urls), 500):
+                chunk = urls[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT url, status_code, error FROM links "
+                    f"WHERE checked_at >= ? AND url IN ({','.join('?' * len(chunk))})",
+                    [oldest] + chunk
+                ).fetchall()
+                for url, status_code, error in rows:
+                    found[url] = LinkStatus(url, status_code, error)
+        return found
+
+    def put_many(self, statuses: Iterable[LinkStatus]):
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO links (url, status_code, error, checked_at) VALUES (?, ?, ?, ?)",
+                [(status.url, status.status_code, status.error, now) for status in statuses if not status.transient]
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class LinkInventory:
+    """
+    Destinazioni dei link trovati durante il crawling.
+
+    Per ogni destinazione unica conserva il numero di occorrenze e le prime
+    sample_size pagine che la contengono; gli esiti delle verifiche (e lo
+    status delle pagine già scaricate dal crawler) sono in statuses.
+    """
+
+    def __init__(self, sample_size: int = 5):
+        self.sample_size = sample_size
+        self.targets: Dict[str, List] = {}  # url -> [occorrenze, pagine di esempio]
+        self.statuses: Dict[str, LinkStatus] = {}
+        self.redirects: Dict[str, str] = {}  # URL reindirizzati dal crawler -> destinazione
+
+    def add_page(self, page: Dict):
+        """Registra i link di una pagina e il suo status (già noto, non va verificato)"""
+        source = page.get('url', '')
+        if source and page.get('redirect_target'):
+            # L'esito di un link reindirizzato è quello della destinazione
+            self.redirects[source] = page['redirect_target']
+        elif source and page.get('redirect_loop'):
+            self.statuses[source] = LinkStatus(source, None, 'troppi redirect')
+        elif source:
+            self.statuses[source] = LinkStatus(source, page.get('status_code', 200))
+
+        for link in page.get('links', []):
+            target = link_target(link.get('url', ''))
+            if target is None or target == source:
+                continue
+            entry = self.targets.get(target)
+            if entry is None:
+                self.targets[target] = [1, [source]]
+            else:
+                entry[0] += 1
+                if len(entry[1]) < self.sample_size and entry[1][-1] != source:
+                    entry[1].append(source)
+
+    def status_of(self, url: str) -> Optional[LinkStatus]:
+        """Esito noto per l'URL, seguendo i redirect registrati dal crawler"""
+        for _ in range(10):
+            status = self.statuses.get(url)
+            if status is not None or url not in self.redirects:
+                return status
+            url = self.redirects[url]
+        return None
+
+    def unchecked(self) -> List[str]:
+        """Destinazioni senza esito, nell'ordine in cui sono state trovate"""
+        return [url for url in self.targets if self.status_of(url) is None]
+
+    def broken_links(self) -> List[Dict]:
+        """Destinazioni interrotte con le pagine che le contengono, per il report"""
+        broken = []
+        for url, (occurrences, sources) in self.targets.items():
+            status = self.status_of(url)
+            if status is not None and status.broken:
+                broken.append({
+                    'url': url,
+                    'type': status.issue,
+                    'status_code': status.status_code,
+                    'occurrences': occurrences,
+                    'source_pages': list(sources),
+                })
+        return broken
+
+    def __len__(self) -> int:
+        return len(self.targets)
+
+
+class LinkChecker:
+    """
+    Verifica in parallelo un insieme di URL con aiohttp.
+
+    Ogni URL riceve una HEAD (seguendo i redirect); se il server la rifiuta
+    (HEAD_FALLBACK_STATUSES) si ripete con una GET del solo primo byte
+    (Range: bytes=0-0). Le richieste contemporanee sono al più concurrency
+    in tutto e per_host verso lo stesso host; before_fetch(host), se
+    indicato, viene atteso prima di ogni richiesta (es. il PolitenessScheduler).
+    Gli esiti definitivi vengono conservati nella cache.
+    """
+
+    def __init__(self, headers: Optional[Dict[str, str]] = None, timeout: float = 10, concurrency: int = 20,
+                 per_host: int = 2, cache: Optional[LinkCheckCache] = None,
+                 before_fetch: Optional[Callable[[str], Awaitable[None]]] = None):
+        self.headers = dict(headers or {})
+        self.timeout = timeout
+        self.concurrency = max(1, concurrency)
+        self.per_host = max(1, per_host)
+        self.cache = cache
+        self.before_fetch = before_fetch
+        self.requests = 0
+        self.cache_hits = 0
+        self.logger = logging.getLogger(__name__)
+
+    def check(self, urls: Iterable[str]) -> Dict[str, LinkStatus]:
+        """Esiti per gli URL (duplicati verificati una volta); blocca fino al termine"""
+        unique = list(dict.fromkeys(urls))
+        results = self.cache.get_many(unique) if self.cache else {}
+        self.cache_hits += len(results)
+
+        pending = [url for url in unique if url not in results]
+        if pending:
+            checked = asyncio.run(self._check_all(pending))
+            if self.cache:
+                self.cache.put_many(checked.values())
+            results.update(checked)
+        return results
+
+    async def _check_all(self, urls: List[str]) -> Dict[str, LinkStatus]:
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+        slots = asyncio.Semaphore(self.concurrency)
+        host_slots: Dict[str, asyncio.Semaphore] = defaultdict(lambda: asyncio.Semaphore(self.per_host))
+
+        async with aiohttp.ClientSession(headers=self.headers, timeout=timeout, connector=connector) as session:
+            async def check(url: str) -> LinkStatus:
+                # Prima lo slot dell'host: le richieste in attesa su un host lento non bloccano gli altri
+                async with host_slots[urlsplit(url).netloc]:
+                    async with slots:
+                        return await self._check_one(session, url)
+
+            statuses = await asyncio.gather(*(check(url) for url in urls))
+        return {status.url: status for status in statuses}
+
+    async def _check_one(self, session: aiohttp.ClientSession, url: str) -> LinkStatus:
+        host = urlsplit(url).netloc
+        try:
+            if self.before_fetch:
+                await self.before_fetch(host)
+            self.requests += 1
+            async with session.head(url, allow_redirects=True) as response:
+                status_code = response.status
+            if status_code in HEAD_FALLBACK_STATUSES:
+                if self.before_fetch:
+                    await self.before_fetch(host)
+                self.requests += 1
+                async with session.get(url, allow_redirects=True, headers={'Range': 'bytes=0-0'}) as response:
+                    status_code = response.status
+                # 416: la risorsa esiste ma è vuota
+                if status_code == 416:
+                    status_code = 200
+            return LinkStatus(url, status_code)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            return LinkStatus(url, None, str(e) or type(e).__name__)
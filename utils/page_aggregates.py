@@ -0,0 +1,94 @@
+"""
+Totali del sito costruiti dai risultati delle pagine, aggiornabili per differenza
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class PageAggregates:
+    """
+    Totali per sezione dei risultati delle singole pagine.
+
+    add() somma i contatori di una pagina, ne registra le liste (indicizzate
+    per chiave, di solito l'URL) e ne aggiunge i valori raggruppati (es. i
+    title) alle mappe valore -> URL da cui si ricavano i duplicati;
+    restituisce il record con cui remove() toglie di nuovo la pagina dai
+    totali. Così una pagina
+    cambiata o scomparsa costa un'operazione sulla sola pagina, e con
+    to_state() i totali si conservano da un'analisi all'altra.
+
+    group_keys indica le coppie (sezione, chiave) i cui valori vanno
+    raggruppati invece che elencati.
+    """
+
+    def __init__(self, group_keys: Iterable[Tuple[str, str]] = (), state: Optional[Dict] = None):
+        self.group_keys = {f'{section}.{key}' for section, key in group_keys}
+        state = state or {}
+        self.totals: Dict[str, Dict[str, float]] = state.get('totals', {})
+        self.lists: Dict[str, Dict[str, Dict[str, list]]] = state.get('lists', {})
+        self.groups: Dict[str, Dict[str, List[str]]] = state.get('groups', {})
+
+    def add(self, key: str, url: str, partials: Dict[str, Dict]) -> Dict:
+        """Aggiunge ai totali i risultati per sezione di una pagina e restituisce il suo record"""
+        record = {'url': url, 'counters': {}, 'lists': [], 'groups': {}}
+        for section, partial in partials.items():
+            counters = None
+            for name, value in partial.items():
+                if not isinstance(value, list):
+                    if counters is None:
+                        counters = record['counters'][section] = {}
+                        totals = self.totals.setdefault(section, {})
+                    totals[name] = totals.get(name, 0) + value
+                    counters[name] = value
+                    continue
+                group = f'{section}.{name}'
+                if group in self.group_keys:
+                    for item in value:
+                        self._group_add(group, item, url)
+                    record['groups'][group] = list(value)
+                else:
+                    self.lists.setdefault(section, {}).setdefault(name, {})[key] = value
+                    record['lists'].append([section, name])
+        return record
+
+    def remove(self, key: str, record: Dict):
+        """Toglie dai totali una pagina aggiunta con add() (record: il valore restituito)"""
+        for section, counters in record['counters'].items():
+            totals = self.totals[section]
+            for name, value in counters.items():
+                totals[name] -= value
+        for section, name in record['lists']:
+            self.lists[section][name].pop(key, None)
+        for group, items in record['groups'].items():
+            for item in items:
+                self._group_remove(group, item, record['url'])
+
+    def _group_add(self, group: str, value: str, url: str):
+        self.groups.setdefault(group, {}).setdefault(value, []).append(url)
+
+    def _group_remove(self, group: str, value: str, url: str):
+        values = self.groups[group]
+        urls = values[value]
+        urls.remove(url)
+        if not urls:
+            del values[value]
+
+    def section(self, section: str) -> Dict:
+        """Contatori e liste (concatenate nell'ordine delle pagine) di una sezione"""
+        merged = dict(self.totals.get(section, {}))
+        for key, by_page in self.lists.get(section, {}).items():
+            merged[key] = [item for items in by_page.values() for item in items]
+        return merged
+
+    def by_page(self, section: str, key: str) -> Dict[str, list]:
+        """Elementi di una lista di sezione, per chiave di pagina"""
+        return self.lists.get(section, {}).get(key, {})
+
+    def duplicates(self, section: str, key: str) -> List[Tuple[str, List[str]]]:
+        """Valori raggruppati presenti in più pagine, con i rispettivi URL (nell'ordine in cui compaiono)"""
+        values = self.groups.get(f'{section}.{key}', {})
+        return [(value, list(urls)) for value, urls in values.items() if len(urls) > 1]
+
+    def to_state(self) -> Dict:
+        """Totali serializzabili in JSON, da ripassare come state"""
+        return {'totals': self.totals, 'lists': self.lists, 'groups': self.groups}
@@ -0,0 +1,287 @@
+"""
+Rappresentazione compatta delle pagine raccolte dal crawler
+"""
+
+import pickle
+import sys
+import zlib
+from array import array
+from collections.abc import Mapping, MutableMapping
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+_MISSING = object()
+
+# Campi del record, nell'ordine del dizionario costruito da WebCrawler._build_page_data
+PAGE_FIELDS = (
+    'url', 'status_code', 'title', 'meta_description', 'headings', 'images', 'links',
+    'content', 'html_size', 'response_time', 'content_type', 'last_modified',
+    'canonical_url', 'lang', 'schema_markup', 'content_hash', 'truncated',
+)
+
+IMAGE_FIELDS = ('src', 'alt', 'title', 'width', 'height')
+LINK_FIELDS = ('url', 'text', 'title', 'rel', 'is_external')
+
+# Stringhe brevi e ripetute tra le pagine, memorizzate una sola volta
+INTERNED_FIELDS = {'content_type', 'last_modified', 'lang'}
+
+# Campi voluminosi che possono essere spostati su disco (vedi PageStore); il testo di 'content' si aggiunge a questi
+SPILLABLE_FIELDS = ('headings', 'images', 'links', 'schema_markup')
+
+
+def _intern(value: Any) -> Any:
+    return sys.intern(value) if type(value) is str else value
+
+
+class URLTable:
+    """
+    URL ed etichette dei link di un crawling, memorizzati una sola volta.
+
+    I record conservano solo indici interi: un link di menu presente su
+    100.000 pagine occupa 8 byte per pagina (URL + etichetta) invece di
+    un dizionario con cinque stringhe.
+    """
+
+    def __init__(self):
+        self._url_ids: Dict[str, int] = {}
+        self.urls: List[str] = []
+        self._label_ids: Dict[Tuple, int] = {}
+        self.labels: List[Tuple] = []
+
+    def url_id(self, url: str) -> int:
+        url_id = self._url_ids.get(url)
+        if url_id is None:
+            url_id = self._url_ids[url] = len(self.urls)
+            self.urls.append(url)
+        return url_id
+
+    def label_id(self, label: Tuple) -> int:
+        label_id = self._label_ids.get(label)
+        if label_id is None:
+            label_id = self._label_ids[label] = len(self.labels)
+            self.labels.append(label)
+        return label_id
+
+    def __len__(self) -> int:
+        return len(self.urls)
+
+
+class SpilledValue:
+    """Campo di un record salvato in un file di segmento: viene riletto a ogni accesso"""
+
+    __slots__ = ('segment', 'offset', 'length', 'pickled')
+
+    def __init__(self, segment, data: bytes, pickled: bool):
+        self.segment = segment
+        self.offset = segment.append(data)
+        self.length = len(data)
+        self.pickled = pickled
+
+    def load(self) -> Any:
+        data = self.segment.read(self.offset, self.length)
+        return pickle.loads(data) if self.pickled else data
+
+
+def _size_of(value: Any) -> int:
+    """Stima della memoria occupata da un campo codificato (contenitore e primo livello)"""
+    size = sys.getsizeof(value)
+    if type(value) is tuple or type(value) is list:
+        size += sum(sys.getsizeof(item) for item in value if type(item) is not str or not item)
+    return size
+
+
+class ContentView(Mapping):
+    """Campo 'content' di un record: il testo resta compresso finché non viene letto"""
+
+    __slots__ = ('_compressed', '_fields')
+
+    def __init__(self, compressed: bytes, fields: Tuple[Tuple[str, Any], ...]):
+        self._compressed = compressed
+        self._fields = fields
+
+    def __getitem__(self, key: str) -> Any:
+        if key == 'text':
+            compressed = self._compressed
+            if type(compressed) is SpilledValue:
+                compressed = compressed.load()
+            return zlib.decompress(compressed).decode('utf-8', 'surrogatepass')
+        for name, value in self._fields:
+            if name == key:
+                return value
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        yield 'text'
+        for name, _ in self._fields:
+            yield name
+
+    def __len__(self) -> int:
+        return len(self._fields) + 1
+
+
+class PageRecord(MutableMapping):
+    """
+    Pagina raccolta dal crawler, con la stessa interfaccia di un dizionario.
+
+    Rispetto al dizionario di _build_page_data: URL e etichette dei link
+    sono indici in una URLTable condivisa (array di interi), le immagini
+    un'unica tupla piatta, il testo della pagina è compresso con zlib e le
+    stringhe ripetute (content_type, lang, ...) sono internate. Le letture
+    (page['links'], page.get('images', [])) ricostruiscono liste e
+    dizionari identici agli originali; i campi non previsti finiscono in un
+    dizionario a parte.
+    """
+
+    __slots__ = ('_table', '_extra') + tuple(f'_{name}' for name in PAGE_FIELDS)
+
+    def __init__(self, table: URLTable, data: Optional[Dict] = None):
+        self._table = table
+        self._extra: Optional[Dict] = None
+        for name in PAGE_FIELDS:
+            setattr(self, f'_{name}', _MISSING)
+        if data:
+            for key, value in data.items():
+                self[key] = value
+
+    # --- codifica dei campi ---
+
+    def _encode(self, key: str, value: Any) -> Any:
+        table = self._table
+        if key == 'url':
+            return table.url_id(value) if type(value) is str else value
+        if key == 'links':
+            if all(type(link) is dict and tuple(link) == LINK_FIELDS for link in value):
+                urls = array('I', (table.url_id(link['url']) for link in value))
+                labels = array('I', (
+                    table.label_id((
+                        _intern(link['text']), _intern(link['title']),
+                        tuple(link['rel']) if isinstance(link['rel'], list) else link['rel'],
+                        link['is_external']
+                    ))
+                    for link in value
+                ))
+                return urls, labels
+            return list(value)
+        if key == 'images':
+            if all(type(image) is dict and tuple(image) == IMAGE_FIELDS for image in value):
+                # Una sola tupla piatta: len(IMAGE_FIELDS) valori per immagine
+                flat = []
+                for image in value:
+                    flat.append(table.url_id(image['src']))
+                    flat.extend(_intern(image[name]) for name in IMAGE_FIELDS[1:])
+                return tuple(flat)
+            return list(value)
+        if key == 'headings':
+            if type(value) is dict:
+                return tuple((level, tuple(_intern(text) for text in texts)) for level, texts in value.items())
+            return value
+        if key == 'content':
+            if isinstance(value, Mapping) and isinstance(value.get('text'), str):
+                compressed = zlib.compress(value['text'].encode('utf-8', 'surrogatepass'), 1)
+                return ContentView(compressed, tuple((name, item) for name, item in value.items() if name != 'text'))
+            return value
+        if key in INTERNED_FIELDS:
+            return _intern(value)
+        return value
+
+    def _decode(self, key: str, value: Any) -> Any:
+        table = self._table
+        if type(value) is SpilledValue:
+            value = value.load()
+        if key == 'url':
+            return table.urls[value] if type(value) is int else value
+        if key == 'links' and type(value) is tuple:
+            urls, labels = value
+            return [
+                {'url': table.urls[url_id], 'text': text, 'title': title,
+                 'rel': list(rel) if type(rel) is tuple else rel, 'is_external': is_external}
+                for url_id, (text, title, rel, is_external) in zip(urls, (table.labels[i] for i in labels))
+            ]
+        if key == 'images' and type(value) is tuple:
+            size = len(IMAGE_FIELDS)
+            return [
+                dict(zip(IMAGE_FIELDS, (table.urls[value[i]],) + value[i + 1:i + size]))
+                for i in range(0, len(value), size)
+            ]
+        if key == 'headings' and type(value) is tuple:
+            return {level: list(texts) for level, texts in value}
+        return value
+
+    # --- interfaccia di dizionario ---
+
+    def __getitem__(self, key: str) -> Any:
+        if key in PAGE_FIELDS:
+            value = getattr(self, f'_{key}')
+            if value is not _MISSING:
+                return self._decode(key, value)
+        elif self._extra and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any):
+        if key in PAGE_FIELDS:
+            setattr(self, f'_{key}', self._encode(key, value))
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key: str):
+        if key in PAGE_FIELDS and getattr(self, f'_{key}') is not _MISSING:
+            setattr(self, f'_{key}', _MISSING)
+        elif self._extra and key in self._extra:
+            del self._extra[key]
+        else:
+            raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        for name in PAGE_FIELDS:
+            if getattr(self, f'_{name}') is not _MISSING:
+                yield name
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __contains__(self, key: object) -> bool:
+        if key in PAGE_FIELDS:
+            return getattr(self, f'_{key}') is not _MISSING
+        return bool(self._extra) and key in self._extra
+
+    def to_dict(self) -> Dict:
+        """Dizionario equivalente, come prodotto dal crawler (anche 'content' torna un dict)"""
+        data = {key: self[key] for key in self}
+        if isinstance(data.get('content'), ContentView):
+            data['content'] = dict(data['content'])
+        return data
+
+    # --- spostamento su disco ---
+
+    def memory_size(self) -> int:
+        """Byte (stimati) dei campi che spill() può liberare"""
+        size = 0
+        for name in SPILLABLE_FIELDS:
+            value = getattr(self, f'_{name}')
+            if value is not _MISSING and type(value) is not SpilledValue:
+                size += _size_of(value)
+        content = self._content
+        if type(content) is ContentView and type(content._compressed) is bytes:
+            size += sys.getsizeof(content._compressed)
+        return size
+
+    def spill(self, segment):
+        """
+        Scrive su segment (vedi PageStore) i campi voluminosi e il testo della
+        pagina; in memoria restano i campi scalari e i conteggi di 'content'.
+        """
+        for name in SPILLABLE_FIELDS:
+            value = getattr(self, f'_{name}')
+            if value is not _MISSING and type(value) is not SpilledValue:
+                setattr(self, f'_{name}', SpilledValue(segment, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), True))
+
+        content = self._content
+        if type(content) is ContentView and type(content._compressed) is bytes:
+            content._compressed = SpilledValue(segment, content._compressed, False)
+
+    def __repr__(self) -> str:
+        return f"PageRecord({self.get('url')!r})"
@@ -0,0 +1,150 @@
+"""
+Archivio delle pagine raccolte con budget di memoria e spostamento su disco
+"""
+
+import logging
+import mmap
+import tempfile
+import threading
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+from utils.page_record import PageRecord
+
+
+class SegmentFile:
+    """
+    File temporaneo in sola aggiunta, letto tramite mmap.
+
+    Il file viene rimappato solo quando una lettura cade oltre la parte già
+    mappata; viene cancellato dal sistema operativo alla chiusura (o alla
+    terminazione del processo).
+    """
+
+    def __init__(self, directory: Optional[Union[str, Path]] = None):
+        if directory is not None:
+            Path(directory).mkdir(parents=True, exist_ok=True)
+        self._file = tempfile.TemporaryFile(prefix='pages-', suffix='.seg', dir=directory)
+        self._size = 0
+        self._map: Optional[mmap.mmap] = None
+        self._lock = threading.Lock()
+
+    def append(self, data: bytes) -> int:
+        """Aggiunge data in coda e ne restituisce l'offset"""
+        with self._lock:
+            offset = self._size
+            self._file.write(data)
+            self._size += len(data)
+        return offset
+
+    def read(self, offset: int, length: int) -> bytes:
+        # Sotto il lock anche la copia: un'altra lettura può rimappare il file e chiudere la mappa corrente
+        with self._lock:
+            if self._map is None or offset + length > len(self._map):
+                self._file.flush()
+                if self._map is not None:
+                    self._map.close()
+                self._map = mmap.mmap(self._file.fileno(), self._size, access=mmap.ACCESS_READ)
+            return self._map[offset:offset + length]
+
+    def __len__(self) -> int:
+        return self._size
+
+    def close(self):
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            self._file.close()
+
+
+class PageStore(Sequence):
+    """
+    Lista delle pagine di un crawling con un budget di memoria.
+
+    Si usa come la lista pages_data (append, indice, len, iterazione).
+    Finché la stima della memoria occupata dai campi voluminosi dei record
+    (link, immagini, headings, dati strutturati, testo compresso) resta
+    entro memory_budget byte tutto rimane in RAM; oltre il budget i record
+    più vecchi vengono scritti in un file di segmento (PageRecord.spill) e
+    riletti da lì a ogni accesso. In memoria restano i campi scalari usati
+    dai conteggi dell'analisi (URL, titolo, status, dimensioni, ...).
+
+    Solo i PageRecord possono essere spostati: i dizionari semplici
+    (compact_records disattivato) restano sempre in memoria.
+    """
+
+    def __init__(self, memory_budget: int = 512 * 1024 * 1024, spill_dir: Optional[Union[str, Path]] = None,
+                 pages: Iterable[Dict] = ()):
+        self.memory_budget = memory_budget
+        self.spill_dir = spill_dir
+        self._pages: List[Any] = []
+        self._sizes: Dict[int, int] = {}  # indice -> memoria stimata dei record non ancora spostati
+        self._next_spill = 0
+        self.memory_size = 0
+        self.spilled_pages = 0
+        self._segment: Optional[SegmentFile] = None
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+        self.extend(pages)
+
+    def append(self, page: Dict):
+        with self._lock:
+            index = len(self._pages)
+            self._pages.append(page)
+            if isinstance(page, PageRecord):
+                size = page.memory_size()
+                self._sizes[index] = size
+                self.memory_size += size
+                if self.memory_size > self.memory_budget:
+                    self._spill()
+
+    def extend(self, pages: Iterable[Dict]):
+        for page in pages:
+            self.append(page)
+
+    def _spill(self):
+        """Sposta su disco i record più vecchi finché la memoria non rientra nel budget"""
+        if self._segment is None:
+            self._segment = SegmentFile(self.spill_dir)
+            self.logger.info(
+                f"Pagine oltre il budget di {self.memory_budget // (1024 * 1024)}MB: "
+                f"i contenuti vengono spostati su disco"
+            )
+
+        while self.memory_size > self.memory_budget and self._next_spill < len(self._pages):
+            index = self._next_spill
+            self._next_spill += 1
+            size = self._sizes.pop(index, None)
+            if size is None:
+                continue
+            self._pages[index].spill(self._segment)
+            self.memory_size -= size
+            self.spilled_pages += 1
+
+    @property
+    def disk_size(self) -> int:
+        """Byte scritti nel file di segmento"""
+        return len(self._segment) if self._segment is not None else 0
+
+    def __getitem__(self, index):
+        return self._pages[index]
+
+    def __len__(self) -> int:
+        return len(self._pages)
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(self._pages)
+
+    def __bool__(self) -> bool:
+        return bool(self._pages)
+
+    def close(self):
+        """Rimuove il file di segmento: i record spostati non sono più leggibili"""
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
+
+    def __repr__(self) -> str:
+        return f"PageStore({len(self._pages)} pagine, {self.spilled_pages} su disco)"
@@ -0,0 +1,112 @@
+"""
+Fase di parsing in processi separati: i fetcher scaricano l'HTML, un pool di processi ne estrae i campi
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, NamedTuple, Optional
+
+from utils.html_extractor import extract_page_fields
+
+# Riavvii del pool dopo la terminazione anomala di un processo, poi il parsing torna nel crawler
+MAX_RESTARTS = 2
+
+
+class PendingPage(NamedTuple):
+    """Pagina scaricata in attesa dei campi estratti dal pool (vedi WebCrawler._complete_page)"""
+    url: str
+    html: str
+    status_code: int
+    response_time: float
+    headers: Any
+    truncated: bool
+    redirect: Optional[Dict]
+    future: Future
+
+
+class ParsePool:
+    """
+    Estrazione dei campi delle pagine su un ProcessPoolExecutor.
+
+    Nel processo del crawler il GIL serializza il parsing dell'HTML; qui
+    ogni pagina viene analizzata (extract_page_fields) da uno dei processi
+    del pool mentre il crawler continua a scaricare, quindi rete e CPU
+    lavorano in parallelo su tutti i core. Al più max_pending pagine alla
+    volta sono in coda o in lavorazione: oltre il limite submit() e
+    parse_async() attendono, così i corpi scaricati non si accumulano in
+    memoria quando la rete è più veloce del parsing.
+
+    I processi partono alla prima pagina, con 'spawn': il crawler usa
+    thread (browser, GUI) e un fork li copierebbe in uno stato incoerente.
+    Se un processo termina in modo anomalo il pool viene ricreato, al più
+    MAX_RESTARTS volte; poi available diventa False e submit() solleva
+    BrokenProcessPool (il crawler analizza allora le pagine da sé).
+    """
+
+    def __init__(self, workers: int = 0, max_pending: int = 0):
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.max_pending = max(1, max_pending or self.workers * 2)
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._async_slots: Optional[asyncio.Semaphore] = None
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.restarts = 0
+        self.logger = logging.getLogger(__name__)
+
+    @property
+    def available(self) -> bool:
+        return self.restarts <= MAX_RESTARTS
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+
+    def _submit(self, html: str, url: str) -> Future:
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._create_executor()
+            try:
+                return self._executor.submit(extract_page_fields, html, url)
+            except BrokenProcessPool:
+                # Un processo è terminato in modo anomalo (es. memoria esaurita)
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+                self.restarts += 1
+                if not self.available:
+                    self.logger.error("Pool di parsing interrotto più volte: il parsing prosegue nel crawler")
+                    raise
+                self.logger.warning("Pool di parsing interrotto: viene riavviato")
+                self._executor = self._create_executor()
+                return self._executor.submit(extract_page_fields, html, url)
+
+    def submit(self, html: str, url: str) -> Future:
+        """Accoda il parsing di una pagina; blocca finché le pagine in coda sono max_pending"""
+        self._slots.acquire()
+        try:
+            future = self._submit(html, url)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    async def parse_async(self, html: str, url: str) -> Dict:
+        """Campi della pagina, attesi senza bloccare l'event loop"""
+        loop = asyncio.get_running_loop()
+        if self._async_loop is not loop:
+            self._async_loop = loop
+            self._async_slots = asyncio.Semaphore(self.max_pending)
+        async with self._async_slots:
+            return await asyncio.wrap_future(self._submit(html, url))
+
+    def close(self):
+        """Termina i processi; le pagine ancora in coda vengono scartate"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
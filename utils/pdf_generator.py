@@ -405,13 +405,13 @@ class PDFGenerator:
         # Link
         self.story.append(Paragraph("Link", self.styles['SectionHeading']))
         links_analysis = self.analysis_results.get('links_analysis', {})
-        self.story.append(Paragraph(f"• Link interni interrotti: {len(detailed_issues.get('broken_links', []))}", self.styles['ListItem']))
+        self.story.append(Paragraph(f"• Link interrotti: {len(detailed_issues.get('broken_links', []))}", self.styles['ListItem']))
         self.story.append(Paragraph(f"• Loop e catene di reindirizzamenti: {len(detailed_issues.get('redirect_chains', []))}", self.styles['ListItem']))
         self.story.append(Paragraph(f"• Pagine con link canonico interrotto: {len(detailed_issues.get('broken_canonical_links', []))}", self.styles['ListItem']))
         self.story.append(Paragraph(f"• Pagine con più URL canonici: {len(detailed_issues.get('multiple_canonical_urls', []))}", self.styles['ListItem']))
         self.story.append(Paragraph(f"• Punteggio: {links_analysis.get('score', 'N/A')}/100", self.styles['ListItem']))
         self.story.append(Spacer(1, 0.1 * inch))
-        add_issue_table_subsection("Link Interni Interrotti", detailed_issues.get('broken_links', []))
+        add_issue_table_subsection("Link Interrotti", detailed_issues.get('broken_links', []))
         add_issue_table_subsection("Loop e Catene di Reindirizzamenti", detailed_issues.get('redirect_chains', []))
         add_issue_table_subsection("Pagine con Link Canonico Interrotto", detailed_issues.get('broken_canonical_links', []))
         add_issue_table_subsection("Pagine con Più URL Canonici", detailed_issues.get('multiple_canonical_urls', []))
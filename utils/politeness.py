@@ -0,0 +1,125 @@
+"""
+Scheduler di cortesia per host: limita la frequenza delle richieste verso ogni server
+"""
+
+import asyncio
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+
+class _TokenBucket:
+    """Token bucket di un singolo host"""
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated', 'blocked_until')
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def reserve(self, now: float) -> float:
+        """Prenota un token e restituisce i secondi da attendere prima di usarlo"""
+        if self.rate <= 0:
+            return max(0.0, self.blocked_until - now)
+
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        # I token possono andare in negativo: ogni prenotazione successiva attende il proprio turno
+        self.tokens -= 1
+        wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+        return max(wait, self.blocked_until - now)
+
+
+class PolitenessScheduler:
+    """
+    Applica un budget di richieste per host (token bucket).
+
+    Le richieste verso host diversi, o entro il budget, partono senza attese;
+    Crawl-delay di robots.txt e Retry-After delle risposte 429/503 rallentano
+    solo l'host interessato.
+    """
+
+    def __init__(self, delay: float, burst: int = 1, max_retry_after: float = 300):
+        self.default_rate = 1.0 / delay if delay > 0 else 0.0
+        self.default_burst = max(1, burst)
+        self.max_retry_after = max_retry_after
+        self._buckets: Dict[str, _TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, host: str) -> _TokenBucket:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = _TokenBucket(self.default_rate, self.default_burst)
+            self._buckets[host] = bucket
+        return bucket
+
+    def set_crawl_delay(self, host: str, crawl_delay: Optional[float]):
+        """Applica il Crawl-delay di robots.txt se più restrittivo del budget configurato"""
+        if not crawl_delay or crawl_delay <= 0:
+            return
+
+        with self._lock:
+            bucket = self._bucket(host)
+            rate = 1.0 / crawl_delay
+            if bucket.rate <= 0 or rate < bucket.rate:
+                bucket.rate = rate
+                bucket.capacity = 1
+                bucket.tokens = min(bucket.tokens, 1)
+
+    def defer(self, host: str, seconds: float):
+        """Sospende le richieste verso un host (es. Retry-After)"""
+        seconds = min(max(0.0, seconds), self.max_retry_after)
+        with self._lock:
+            bucket = self._bucket(host)
+            bucket.blocked_until = max(bucket.blocked_until, time.monotonic() + seconds)
+
+    def defer_from_header(self, host: str, retry_after: Optional[str], default: float = 0) -> float:
+        """Interpreta l'header Retry-After (secondi o data HTTP) e sospende l'host"""
+        seconds = self.parse_retry_after(retry_after)
+        if seconds is None:
+            seconds = default
+        self.defer(host, seconds)
+        return seconds
+
+    @staticmethod
+    def parse_retry_after(value: Optional[str]) -> Optional[float]:
+        """Converte un valore Retry-After in secondi"""
+        if not value:
+            return None
+
+        value = value.strip()
+        if value.isdigit():
+            return float(value)
+
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+    def reserve(self, host: str) -> float:
+        """Prenota uno slot per l'host e restituisce l'attesa necessaria in secondi"""
+        with self._lock:
+            return self._bucket(host).reserve(time.monotonic())
+
+    def wait(self, host: str):
+        """Attende (bloccando) il proprio turno per l'host"""
+        delay = self.reserve(host)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def wait_async(self, host: str):
+        """Attende il proprio turno per l'host senza bloccare l'event loop"""
+        delay = self.reserve(host)
+        if delay > 0:
+            await asyncio.sleep(delay)
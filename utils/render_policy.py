@@ -0,0 +1,78 @@
+"""
+Scelta delle pagine da renderizzare con il browser (Selenium)
+"""
+
+import re
+import zlib
+from typing import Optional
+
+# Contenitore radice di una SPA lasciato vuoto dal server (React, Vue, Next, Nuxt, Angular, Svelte)
+SPA_ROOT_RE = re.compile(
+    r'<(div|main|section)\b[^>]*\bid=["\']?(?:root|app|__next|__nuxt|svelte)(?=["\'\s>])[^>]*>\s*</\1>'
+    r'|<app-root\b[^>]*>\s*</app-root>',
+    re.IGNORECASE
+)
+
+# Avviso <noscript> che chiede di abilitare JavaScript
+NOSCRIPT_RE = re.compile(r'<noscript\b[^>]*>(?:(?!</noscript).){0,500}?javascript', re.IGNORECASE | re.DOTALL)
+
+SCRIPT_RE = re.compile(r'<script\b', re.IGNORECASE)
+
+RENDER_MODES = ('always', 'auto', 'never')
+
+
+def javascript_reason(html: str, word_count: int, min_words: int = 20) -> Optional[str]:
+    """
+    Motivo per cui la pagina sembra richiedere JavaScript ('spa_root',
+    'noscript', 'empty_body'), o None se l'HTML del server è già completo.
+    """
+    if SPA_ROOT_RE.search(html):
+        return 'spa_root'
+    if NOSCRIPT_RE.search(html):
+        return 'noscript'
+    if word_count < min_words and SCRIPT_RE.search(html):
+        return 'empty_body'
+    return None
+
+
+class RenderPolicy:
+    """
+    Decide quali pagine passano dal browser.
+
+    - 'always': tutte le pagine (comportamento storico);
+    - 'auto': solo quelle che sembrano richiedere JavaScript, più un campione
+      (timing_sample_rate) per le metriche di caricamento;
+    - 'never': nessuna.
+
+    Il campione dipende solo dall'URL, quindi è lo stesso a ogni crawling.
+    """
+
+    def __init__(self, mode: str = 'auto', timing_sample_rate: float = 0.0, min_words: int = 20):
+        if mode not in RENDER_MODES:
+            raise ValueError(f"Modalità di rendering non valida: {mode}")
+        self.mode = mode
+        self.timing_sample_rate = timing_sample_rate
+        self.min_words = min_words
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != 'never'
+
+    def reason(self, url: str, html: str, word_count: int) -> Optional[str]:
+        """Motivo del rendering della pagina, None se va saltato"""
+        if self.mode == 'never':
+            return None
+        if self.mode == 'always':
+            return 'always'
+
+        reason = javascript_reason(html, word_count, self.min_words)
+        if reason:
+            return reason
+        if self._sampled(url):
+            return 'timing_sample'
+        return None
+
+    def _sampled(self, url: str) -> bool:
+        if self.timing_sample_rate <= 0:
+            return False
+        return zlib.crc32(url.encode('utf-8')) % 10000 < self.timing_sample_rate * 10000
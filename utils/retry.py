@@ -0,0 +1,260 @@
+"""
+Nuovi tentativi con backoff esponenziale e circuit breaker per host
+"""
+
+import heapq
+import itertools
+import random
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urlsplit
+
+# Status temporanei: la stessa GET può riuscire a un nuovo tentativo
+RETRY_STATUSES = {500, 502, 503, 504}
+
+# Stati del circuit breaker di un host
+CLOSED, OPEN, HALF_OPEN, ABANDONED = 'closed', 'open', 'half_open', 'abandoned'
+
+
+class RetryPolicy:
+    """
+    Numero di tentativi e attese tra un tentativo e l'altro.
+
+    L'attesa prima del tentativo n (da 1) è scelta a caso tra 0 e
+    base * 2^(n-1), al più max_delay ("full jitter"): gli URL falliti
+    insieme non tornano sul server tutti nello stesso istante.
+    """
+
+    def __init__(self, max_retries: int = 2, base: float = 1.0, max_delay: float = 60.0):
+        self.max_retries = max(0, max_retries)
+        self.base = max(0.0, base)
+        self.max_delay = max(self.base, max_delay)
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base * 2 ** (attempt - 1)))
+
+
+class _HostCircuit:
+    """Stato del circuit breaker di un singolo host"""
+
+    __slots__ = ('state', 'failures', 'trips', 'probe_at')
+
+    def __init__(self):
+        self.state = CLOSED
+        self.failures = 0   # fallimenti consecutivi
+        self.trips = 0      # aperture dall'ultimo successo
+        self.probe_at = 0.0
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker per host.
+
+    Dopo failure_threshold fallimenti consecutivi il circuito si apre: per
+    reset_timeout secondi l'host non riceve richieste, poi una sola richiesta
+    di prova (half-open) decide se richiuderlo o riaprirlo con un'attesa
+    doppia. Dopo max_trips aperture senza successi l'host viene abbandonato.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, max_trips: int = 3):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.max_trips = max(1, max_trips)
+        self._hosts: Dict[str, _HostCircuit] = {}
+
+    def _circuit(self, host: str) -> _HostCircuit:
+        circuit = self._hosts.get(host)
+        if circuit is None:
+            circuit = self._hosts[host] = _HostCircuit()
+        return circuit
+
+    def state(self, host: str) -> str:
+        circuit = self._hosts.get(host)
+        return circuit.state if circuit else CLOSED
+
+    def allow(self, host: str, now: Optional[float] = None) -> bool:
+        """True se una richiesta verso l'host può partire (con il circuito aperto, solo la prova)"""
+        circuit = self._hosts.get(host)
+        if circuit is None or circuit.state == CLOSED:
+            return True
+        if circuit.state == ABANDONED:
+            return False
+
+        now = time.monotonic() if now is None else now
+        if now < circuit.probe_at:
+            return False
+        # Una prova alla volta; se il suo esito non arriva entro reset_timeout se ne concede un'altra
+        circuit.state = HALF_OPEN
+        circuit.probe_at = now + self.reset_timeout
+        return True
+
+    def probe_at(self, host: str) -> Optional[float]:
+        """Istante (time.monotonic) della prossima prova per un host sospeso; None se non sospeso"""
+        circuit = self._hosts.get(host)
+        if circuit is None or circuit.state in (CLOSED, ABANDONED):
+            return None
+        return circuit.probe_at
+
+    def record_success(self, host: str):
+        circuit = self._hosts.get(host)
+        if circuit is not None:
+            circuit.state = CLOSED
+            circuit.failures = 0
+            circuit.trips = 0
+
+    def record_failure(self, host: str, now: Optional[float] = None) -> str:
+        """Registra un fallimento e restituisce il nuovo stato dell'host"""
+        circuit = self._circuit(host)
+        if circuit.state == ABANDONED:
+            return ABANDONED
+
+        circuit.failures += 1
+        if circuit.state == HALF_OPEN or (circuit.state == CLOSED and circuit.failures >= self.failure_threshold):
+            circuit.trips += 1
+            if circuit.trips > self.max_trips:
+                circuit.state = ABANDONED
+            else:
+                now = time.monotonic() if now is None else now
+                circuit.state = OPEN
+                circuit.probe_at = now + self.reset_timeout * 2 ** (circuit.trips - 1)
+        return circuit.state
+
+
+class RetryQueue:
+    """
+    URL da riprovare più tardi, fuori dalla frontiera.
+
+    failed() pianifica un nuovo tentativo secondo la RetryPolicy e conta il
+    fallimento per il circuit breaker dell'host; gli URL di un host con il
+    circuito aperto vengono parcheggiati (admit/pop_ready) invece di essere
+    scaricati, così il crawling prosegue sugli host sani senza attese. Alla
+    prova dell'host ne esce un solo URL; se va a buon fine escono tutti.
+    Gli URL di un host abbandonato finiscono in abandoned (e, se indicato,
+    vengono passati a on_abandon).
+    """
+
+    def __init__(self, policy: RetryPolicy, breaker: CircuitBreaker,
+                 on_abandon: Optional[Callable[[str], None]] = None):
+        self.policy = policy
+        self.breaker = breaker
+        self.on_abandon = on_abandon
+        self.attempts: Dict[str, int] = {}
+        self.abandoned: List[str] = []
+        self._delayed: List[Tuple[float, int, str]] = []
+        self._scheduled: Set[str] = set()  # URL con un nuovo tentativo pianificato e non ancora estratto
+        self._parked: Dict[str, Deque[str]] = {}
+        self._probes: Dict[str, str] = {}  # host sospeso -> URL della richiesta di prova
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _host(url: str) -> str:
+        return urlsplit(url).netloc
+
+    def _allow(self, url: str, host: str, now: Optional[float] = None) -> bool:
+        was_closed = self.breaker.state(host) == CLOSED
+        if not self.breaker.allow(host, now):
+            return False
+        if not was_closed:
+            self._probes[host] = url
+        return True
+
+    def _abandon(self, urls: Iterable[str]):
+        for url in urls:
+            self.abandoned.append(url)
+            if self.on_abandon:
+                self.on_abandon(url)
+
+    def _park(self, url: str, host: str):
+        if self.breaker.state(host) == ABANDONED:
+            self._abandon([url])
+        else:
+            self._parked.setdefault(host, deque()).append(url)
+
+    def admit(self, url: str) -> bool:
+        """True se l'URL può essere scaricato ora; altrimenti resta in attesa del proprio host"""
+        host = self._host(url)
+        with self._lock:
+            if self._allow(url, host):
+                return True
+            self._park(url, host)
+            return False
+
+    def failed(self, url: str, min_delay: float = 0.0, count_failure: bool = True) -> Optional[float]:
+        """
+        Pianifica un nuovo tentativo per l'URL e restituisce l'attesa in
+        secondi, o None se i tentativi sono esauriti. count_failure=False per
+        gli errori che non indicano un host in difficoltà (es. 429).
+        """
+        host = self._host(url)
+        with self._lock:
+            # Con il circuito in prova conta solo l'esito della prova, non delle richieste partite prima
+            if self.breaker.state(host) == HALF_OPEN and self._probes.get(host) != url:
+                count_failure = False
+            if count_failure and self.breaker.record_failure(host) == ABANDONED:
+                # Anche gli URL già parcheggiati non verranno più scaricati
+                self._abandon(self._parked.pop(host, ()))
+
+            attempt = self.attempts.get(url, 0) + 1
+            if attempt > self.policy.max_retries:
+                self.attempts.pop(url, None)
+                return None
+
+            self.attempts[url] = attempt
+            delay = max(min_delay, self.policy.backoff(attempt))
+            heapq.heappush(self._delayed, (time.monotonic() + delay, next(self._counter), url))
+            self._scheduled.add(url)
+            return delay
+
+    def succeeded(self, url: str):
+        """L'host ha risposto: chiude il circuito e dimentica i tentativi dell'URL"""
+        with self._lock:
+            host = self._host(url)
+            self.breaker.record_success(host)
+            self._probes.pop(host, None)
+            self.attempts.pop(url, None)
+
+    def pop_ready(self) -> Optional[str]:
+        """URL da riprovare ora (attesa scaduta e host disponibile), o None"""
+        now = time.monotonic()
+        with self._lock:
+            for host in list(self._parked):
+                if self.breaker.state(host) == ABANDONED:
+                    self._abandon(self._parked.pop(host))
+                    continue
+                urls = self._parked[host]
+                if self._allow(urls[0], host, now):
+                    url = urls.popleft()
+                    if not urls:
+                        del self._parked[host]
+                    return url
+
+            while self._delayed and self._delayed[0][0] <= now:
+                _, _, url = heapq.heappop(self._delayed)
+                self._scheduled.discard(url)
+                host = self._host(url)
+                if self._allow(url, host, now):
+                    return url
+                self._park(url, host)
+            return None
+
+    def next_due(self) -> Optional[float]:
+        """Secondi al prossimo URL pronto; None se non ci sono URL in attesa di un istante preciso"""
+        with self._lock:
+            times = [self._delayed[0][0]] if self._delayed else []
+            for host in self._parked:
+                probe_at = self.breaker.probe_at(host)
+                if probe_at is not None:
+                    times.append(probe_at)
+        if not times:
+            return None
+        return max(0.0, min(times) - time.monotonic())
+
+    def __contains__(self, url: str) -> bool:
+        """True se per l'URL è pianificato un nuovo tentativo"""
+        return url in self._scheduled
+
+    def __len__(self) -> int:
+        return len(self._delayed) + sum(len(urls) for urls in self._parked.values())
@@ -0,0 +1,216 @@
+"""
+robots.txt: download tramite la sessione del crawler e regole compilate in un'unica regex
+"""
+
+import logging
+import re
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote, unquote, urlsplit
+
+import requests
+
+# Byte di robots.txt letti al massimo (RFC 9309 richiede di leggerne almeno 500 KiB)
+ROBOTS_MAX_BYTES = 512 * 1024
+
+# Caratteri lasciati invariati nel confronto tra percorsi e regole
+_SAFE_CHARS = "/?=&:@!$'()*+,;~-._"
+_NEEDS_QUOTING = re.compile(r"[^A-Za-z0-9/?=&:@!$'()*+,;~\-._]")
+
+
+def _normalize_path(path: str) -> str:
+    """Uniforma la percent-encoding, così '/caf%C3%A9' e '/café' coincidono"""
+    if not _NEEDS_QUOTING.search(path):
+        return path
+    return quote(unquote(path), safe=_SAFE_CHARS)
+
+
+class _Rule:
+    """Regola Allow/Disallow compilata"""
+
+    __slots__ = ('allow', 'length', 'prefix', 'regex')
+
+    def __init__(self, allow: bool, pattern: str):
+        self.allow = allow
+        self.length = len(pattern)
+
+        anchored = pattern.endswith('$')
+        if anchored:
+            pattern = pattern[:-1]
+        parts = _normalize_path(pattern).split('*')
+        # Parte letterale iniziale: basta un confronto di stringhe se non ci sono caratteri jolly
+        self.prefix = parts[0]
+        self.regex = None
+        if len(parts) > 1 or anchored:
+            self.regex = re.compile('.*'.join(re.escape(part) for part in parts) + (r'\Z' if anchored else ''))
+
+    def matches(self, path: str) -> bool:
+        return self.regex.match(path) is not None if self.regex else True
+
+
+class RobotsRules:
+    """
+    Regole di robots.txt applicabili a un user agent.
+
+    Le regole Allow/Disallow sono indicizzate sulla loro parte letterale
+    iniziale: per ogni URL si considerano solo le regole il cui prefisso
+    coincide con l'inizio del percorso (una ricerca in dizionario per
+    lunghezza di prefisso), e solo quelle con '*' o '$' passano da una
+    regex. Vince la regola più lunga, Allow a parità (RFC 9309).
+    """
+
+    def __init__(self, rules: List[Tuple[bool, str]] = (), crawl_delay: Optional[float] = None,
+                 sitemaps: List[str] = (), disallow_all: bool = False):
+        self.crawl_delay = crawl_delay
+        self.sitemaps = list(sitemaps)
+        self.disallow_all = disallow_all
+
+        self._by_prefix: Dict[str, List[_Rule]] = {}
+        for allow, pattern in rules:
+            if pattern:
+                rule = _Rule(allow, pattern)
+                self._by_prefix.setdefault(rule.prefix, []).append(rule)
+        self._prefix_lengths = sorted({len(prefix) for prefix in self._by_prefix})
+
+    def can_fetch(self, url: str) -> bool:
+        if self.disallow_all:
+            return False
+        if not self._by_prefix:
+            return True
+
+        parts = urlsplit(url)
+        path = parts.path or '/'
+        if path == '/robots.txt':
+            return True
+        if parts.query:
+            path += '?' + parts.query
+        path = _normalize_path(path)
+
+        best: Optional[_Rule] = None
+        for length in self._prefix_lengths:
+            if length > len(path):
+                break
+            for rule in self._by_prefix.get(path[:length], ()):
+                if (best is None or (rule.length, rule.allow) > (best.length, best.allow)) and rule.matches(path):
+                    best = rule
+        return best is None or best.allow
+
+
+def parse_robots(text: str, user_agent: str = '*') -> RobotsRules:
+    """
+    Analizza robots.txt e restituisce le regole del gruppo più specifico per
+    user_agent (altrimenti quelle di '*'). I gruppi con lo stesso user agent
+    vengono uniti; le righe Sitemap valgono per tutto il file.
+    """
+    agent = user_agent.lower()
+    groups: Dict[str, Dict] = {}
+    sitemaps: List[str] = []
+    current: List[Dict] = []
+    in_agents = False
+
+    for line in text.splitlines():
+        line = line.split('#', 1)[0].strip()
+        if ':' not in line:
+            continue
+        field, value = line.split(':', 1)
+        field, value = field.strip().lower(), value.strip()
+
+        if field == 'user-agent':
+            # Righe User-agent consecutive condividono le regole che seguono
+            if not in_agents:
+                current = []
+                in_agents = True
+            group = groups.setdefault(value.lower(), {'rules': [], 'crawl_delay': None})
+            current.append(group)
+            continue
+
+        if field == 'sitemap':
+            if value:
+                sitemaps.append(value)
+            continue
+
+        in_agents = False
+        for group in current:
+            if field in ('allow', 'disallow'):
+                group['rules'].append((field == 'allow', value))
+            elif field == 'crawl-delay':
+                try:
+                    group['crawl_delay'] = float(value)
+                except ValueError:
+                    pass
+
+    # Gruppo più specifico: il nome più lungo contenuto nello user agent
+    names = [name for name in groups if name != '*' and name in agent]
+    selected = groups.get(max(names, key=len)) if names else groups.get('*')
+    if selected is None:
+        return RobotsRules(sitemaps=sitemaps)
+    return RobotsRules(selected['rules'], selected['crawl_delay'], sitemaps)
+
+
+class RobotsCache:
+    """
+    robots.txt per host, scaricato una sola volta con la sessione HTTP del
+    crawler (stessi header e timeout).
+
+    Come da RFC 9309: con un 4xx tutto è consentito, con un 5xx o un errore
+    di rete nulla lo è, finché il file non torna raggiungibile al crawling
+    successivo.
+    """
+
+    def __init__(self, session: requests.Session, timeout: float = 30, user_agent: str = '*',
+                 on_load: Optional[Callable[[str, RobotsRules], None]] = None):
+        self.session = session
+        self.timeout = timeout
+        self.user_agent = user_agent
+        self.on_load = on_load
+        self._rules: Dict[str, RobotsRules] = {}
+        self._lock = threading.Lock()
+        self.errors: List[Dict] = []
+        self.logger = logging.getLogger(__name__)
+
+    def get(self, url: str) -> RobotsRules:
+        """Regole dell'host dell'URL (scaricate al primo utilizzo)"""
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        rules = self._rules.get(origin)
+        if rules is not None:
+            return rules
+
+        with self._lock:
+            rules = self._rules.get(origin)
+            if rules is None:
+                rules = self._fetch(origin)
+                self._rules[origin] = rules
+                if self.on_load:
+                    self.on_load(parts.netloc, rules)
+        return rules
+
+    def can_fetch(self, url: str) -> bool:
+        return self.get(url).can_fetch(url)
+
+    def _fetch(self, origin: str) -> RobotsRules:
+        robots_url = f"{origin}/robots.txt"
+        try:
+            with self.session.get(robots_url, timeout=self.timeout, stream=True) as response:
+                if 400 <= response.status_code < 500:
+                    return RobotsRules()
+                if response.status_code != 200:
+                    self._record_error(robots_url, f"HTTP {response.status_code}")
+                    return RobotsRules(disallow_all=True)
+
+                body = b''
+                for chunk in response.iter_content(64 * 1024):
+                    body += chunk
+                    if len(body) >= ROBOTS_MAX_BYTES:
+                        body = body[:ROBOTS_MAX_BYTES]
+                        break
+                text = body.decode('utf-8', errors='replace')
+        except requests.RequestException as e:
+            self._record_error(robots_url, f"Non raggiungibile: {e}")
+            return RobotsRules(disallow_all=True)
+
+        return parse_robots(text, self.user_agent)
+
+    def _record_error(self, robots_url: str, issue: str):
+        self.logger.warning(f"Impossibile caricare {robots_url} ({issue}): crawling dell'host non consentito")
+        self.errors.append({'url': robots_url, 'type': issue})
@@ -0,0 +1,323 @@
+"""
+Coda condivisa del crawling ripartito: frontiera divisa in shard per hash dell'URL e pagine raccolte
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from utils.checkpoint import DONE, IN_PROGRESS, PENDING, SQLiteFrontier
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS frontier (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    depth INTEGER NOT NULL,
+    inlinks INTEGER NOT NULL DEFAULT 0,
+    sitemap_priority REAL,
+    lastmod REAL,
+    score REAL NOT NULL,
+    seq INTEGER NOT NULL,
+    state INTEGER NOT NULL DEFAULT 0,
+    shard INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS frontier_shard_queue ON frontier (shard, state, score, seq);
+CREATE INDEX IF NOT EXISTS frontier_state ON frontier (state);
+CREATE TABLE IF NOT EXISTS pages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    shard INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS workers (
+    shard INTEGER PRIMARY KEY,
+    finished INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def shard_of(key: str, shards: int) -> int:
+    """Shard di un URL canonico; stabile tra processi e macchine (a differenza di hash())"""
+    digest = hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') % shards
+
+
+class ShardQueue(ABC):
+    """
+    Interfaccia dei backend della coda condivisa.
+
+    Il coordinatore chiama setup() e poi legge le pagine con load_pages();
+    ogni worker apre la propria frontiera con frontier(shard), salva le
+    pagine con save_page() e al termine chiama finish(). Un backend diverso
+    (es. un server condiviso tra più macchine) implementa gli stessi metodi
+    e si registra in QUEUE_BACKENDS.
+    """
+
+    @abstractmethod
+    def setup(self, start_url: str, shards: int, crawl_config: Dict[str, Any]):
+        """Prepara un nuovo crawling: parametri per i worker e shard ancora da completare"""
+
+    @property
+    @abstractmethod
+    def start_url(self) -> str:
+        pass
+
+    @property
+    @abstractmethod
+    def shards(self) -> int:
+        pass
+
+    @property
+    @abstractmethod
+    def crawl_config(self) -> Dict[str, Any]:
+        pass
+
+    @abstractmethod
+    def frontier(self, shard: Optional[int], tracking_params: Iterable[str] = (), max_depth: Optional[int] = None,
+                 depth_weight: float = 1.0):
+        """
+        Frontiera di uno shard (None: solo accodamento, per il coordinatore).
+        pop() non restituisce URL oltre CRAWL_CONFIG['max_pages'] del
+        coordinatore, contando le pagine salvate e gli URL in corso di tutti
+        gli shard.
+        """
+
+    @abstractmethod
+    def save_page(self, shard: int, page_data: Dict):
+        pass
+
+    @abstractmethod
+    def load_pages(self, after_id: int = 0, limit: int = 500) -> List[Tuple[int, Dict]]:
+        """Pagine salvate dai worker dopo after_id, come (id, pagina) in ordine di arrivo"""
+
+    @abstractmethod
+    def finish(self, shard: int):
+        """Lo shard ha terminato: i suoi URL non bloccano più la fine degli altri"""
+
+    @abstractmethod
+    def finished(self) -> bool:
+        """True se tutti gli shard hanno terminato"""
+
+    @abstractmethod
+    def stop(self):
+        """Chiede a tutti i worker di fermarsi"""
+
+    @abstractmethod
+    def stopped(self) -> bool:
+        pass
+
+    def close(self):
+        pass
+
+
+class ShardFrontier(SQLiteFrontier):
+    """
+    Frontiera di uno shard su una coda SQLite condivisa tra processi.
+
+    push() assegna ogni URL allo shard del suo hash, quindi i link scoperti
+    da un worker finiscono nella coda del worker che li deve scaricare;
+    pop() estrae solo dallo shard del worker, finché le pagine salvate e gli
+    URL in corso di tutti gli shard restano sotto max_pages: il budget di
+    pagine è comune e ogni worker ne prende una parte a ogni URL. La
+    frontiera è vuota quando lo shard non ha URL in attesa e nessun worker
+    ancora attivo ha URL in attesa o in corso (da cui potrebbero arrivare
+    nuovi link), oppure quando il crawling è stato fermato.
+    """
+
+    def __init__(self, queue: 'SQLiteShardQueue', shard: Optional[int], tracking_params: Iterable[str] = (),
+                 max_depth: Optional[int] = None, depth_weight: float = 1.0):
+        self.queue = queue
+        self.shard = shard
+        self.shards = queue.shards
+        self.max_pages = queue.crawl_config.get('max_pages')
+        super().__init__(queue.connection, queue.lock, tracking_params, max_depth, depth_weight)
+
+    def _insert(self, key: str, url: str, depth: int, score: float, state: int):
+        # OR IGNORE: un altro processo può aver inserito la stessa chiave dopo il SELECT
+        self._conn.execute(
+            "INSERT OR IGNORE INTO frontier (key, url, depth, score, seq, state, shard) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, url, depth, score, self._next_seq(), state, shard_of(key, self.shards))
+        )
+
+    def pop(self) -> Optional[str]:
+        """Estrae l'URL con priorità più alta dello shard, o None"""
+        if self.shard is None or self.queue.stopped():
+            return None
+        with self._lock:
+            # Controllo del budget ed estrazione in un'unica transazione rispetto agli altri worker
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = None
+                if self._within_budget():
+                    row = self._conn.execute(
+                        "SELECT key, url FROM frontier WHERE shard = ? AND state = ? ORDER BY score, seq LIMIT 1",
+                        (self.shard, PENDING)
+                    ).fetchone()
+                    if row is not None:
+                        self._conn.execute("UPDATE frontier SET state = ? WHERE key = ?", (IN_PROGRESS, row[0]))
+            finally:
+                self._conn.execute("COMMIT")
+        return row[1] if row else None
+
+    def _within_budget(self) -> bool:
+        """True se pagine salvate e URL in corso, in tutti gli shard, sono meno di max_pages"""
+        if not self.max_pages:
+            return True
+        saved = self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+        in_progress = self._conn.execute(
+            "SELECT COUNT(*) FROM frontier WHERE state = ?", (IN_PROGRESS,)
+        ).fetchone()[0]
+        return saved + in_progress < self.max_pages
+
+    def empty(self) -> bool:
+        return self.queue.stopped() or self.queue.idle(self.shard)
+
+    def __len__(self) -> int:
+        return self.queue.pending_count(self.shard)
+
+
+class SQLiteShardQueue(ShardQueue):
+    """
+    Coda condivisa su un file SQLite (WAL, autocommit).
+
+    Solo per processi sulla stessa macchina, ognuno con la propria
+    connessione: il WAL di SQLite non funziona su file system di rete, quindi
+    il file non va condiviso tra macchine (serve un altro backend).
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.lock = threading.RLock()
+        # Autocommit: URL e pagine sono subito visibili agli altri processi
+        self.connection = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None,
+                                          timeout=60)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        self._meta: Dict[str, str] = {}
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        if key not in self._meta:
+            with self.lock:
+                row = self.connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._meta[key] = row[0]
+        return self._meta[key]
+
+    def _set_meta(self, key: str, value: str):
+        with self.lock:
+            self.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+        self._meta[key] = value
+
+    def setup(self, start_url: str, shards: int, crawl_config: Dict[str, Any]):
+        with self.lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            for table in ('frontier', 'pages', 'workers', 'meta'):
+                self.connection.execute(f"DELETE FROM {table}")
+            self.connection.executemany("INSERT INTO workers (shard) VALUES (?)", [(shard,) for shard in range(shards)])
+            self.connection.execute("COMMIT")
+        self._meta.clear()
+        self._set_meta('start_url', start_url)
+        self._set_meta('shards', str(shards))
+        self._set_meta('crawl_config', json.dumps(crawl_config, default=str))
+
+    @property
+    def start_url(self) -> str:
+        return self._get_meta('start_url')
+
+    @property
+    def shards(self) -> int:
+        return int(self._get_meta('shards') or 1)
+
+    @property
+    def crawl_config(self) -> Dict[str, Any]:
+        return json.loads(self._get_meta('crawl_config') or '{}')
+
+    def frontier(self, shard: Optional[int], tracking_params: Iterable[str] = (), max_depth: Optional[int] = None,
+                 depth_weight: float = 1.0) -> ShardFrontier:
+        return ShardFrontier(self, shard, tracking_params, max_depth, depth_weight)
+
+    def idle(self, shard: Optional[int]) -> bool:
+        """Nessun URL in attesa nello shard e nessun altro worker attivo con URL in attesa o in corso"""
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT 1 FROM frontier WHERE (shard = ? AND state = ?) OR "
+                "(shard != ? AND state IN (?, ?) AND shard IN (SELECT shard FROM workers WHERE finished = 0)) "
+                "LIMIT 1",
+                (shard, PENDING, shard, PENDING, IN_PROGRESS)
+            ).fetchone()
+        return row is None
+
+    def pending_count(self, shard: Optional[int] = None) -> int:
+        """URL in attesa in uno shard (None: in tutti)"""
+        with self.lock:
+            if shard is None:
+                return self.connection.execute(
+                    "SELECT COUNT(*) FROM frontier WHERE state = ?", (PENDING,)
+                ).fetchone()[0]
+            return self.connection.execute(
+                "SELECT COUNT(*) FROM frontier WHERE shard = ? AND state = ?", (shard, PENDING)
+            ).fetchone()[0]
+
+    def visited_count(self) -> int:
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM frontier WHERE state = ?", (DONE,)).fetchone()[0]
+
+    def save_page(self, shard: int, page_data: Dict):
+        with self.lock:
+            self.connection.execute(
+                "INSERT INTO pages (shard, data) VALUES (?, ?)",
+                (shard, json.dumps(page_data, ensure_ascii=False, default=str))
+            )
+
+    def load_pages(self, after_id: int = 0, limit: int = 500) -> List[Tuple[int, Dict]]:
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT id, data FROM pages WHERE id > ? ORDER BY id LIMIT ?", (after_id, limit)
+            ).fetchall()
+        return [(page_id, json.loads(data)) for page_id, data in rows]
+
+    def finish(self, shard: int):
+        with self.lock:
+            self.connection.execute("UPDATE workers SET finished = 1 WHERE shard = ?", (shard,))
+
+    def finished(self) -> bool:
+        with self.lock:
+            return self.connection.execute("SELECT 1 FROM workers WHERE finished = 0 LIMIT 1").fetchone() is None
+
+    def stop(self):
+        self._set_meta('stopped', '1')
+
+    def stopped(self) -> bool:
+        # Letto ogni volta dal database: lo imposta un altro processo
+        with self.lock:
+            row = self.connection.execute("SELECT value FROM meta WHERE key = 'stopped'").fetchone()
+        return row is not None and row[0] == '1'
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
+# Backend disponibili per SHARD_CONFIG['backend']
+QUEUE_BACKENDS = {
+    'sqlite': SQLiteShardQueue,
+}
+
+
+def open_shard_queue(backend: str, location: Union[str, Path]) -> ShardQueue:
+    """Apre la coda condivisa con il backend indicato (location: percorso o indirizzo)"""
+    if backend not in QUEUE_BACKENDS:
+        raise ValueError(f"Backend della coda non supportato: {backend}")
+    return QUEUE_BACKENDS[backend](location)
+
@@ -0,0 +1,190 @@
+"""
+Crawling ripartito su più processi (o macchine): frontiera divisa per hash dell'URL
+"""
+
+import multiprocessing
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+from tqdm import tqdm
+
+from config import *
+from utils.checkpoint import remove_checkpoint
+from utils.crawler import WebCrawler
+from utils.shard_queue import ShardQueue, open_shard_queue
+
+
+def _configure_worker(shard_queue: ShardQueue, shard: int):
+    """Configurazione del coordinatore, adattata a un singolo shard"""
+    shards = shard_queue.shards
+    CRAWL_CONFIG.update(shard_queue.crawl_config)
+    # Tutti gli shard visitano gli stessi host: il ritmo di richieste per host viene diviso tra loro
+    CRAWL_CONFIG['delay'] = CRAWL_CONFIG['delay'] * shards
+    CRAWL_CONFIG['checkpoints'] = False
+    # max_pages resta quello del coordinatore: il budget di pagine è comune a tutti gli shard (vedi ShardFrontier)
+    # Il parallelismo viene già dagli shard (e un processo daemon non può avviarne altri)
+    PARSE_CONFIG['enabled'] = False
+    # Sitemap e verifica dei link sono compito del coordinatore
+    CHECKS_CONFIG['check_sitemap'] = False
+    LINK_CHECK_CONFIG['enabled'] = False
+    # Una cache HTTP per shard (un URL finisce sempre nello stesso shard): nessuna contesa sul file
+    path = Path(HTTP_CACHE_CONFIG['path'])
+    HTTP_CACHE_CONFIG['path'] = path.with_name(f"{path.stem}.shard{shard}of{shards}{path.suffix}")
+
+
+def run_shard_worker(backend: str, location: Union[str, Path], shard: int) -> int:
+    """
+    Esegue uno shard di un crawling ripartito finché la coda condivisa non
+    si esaurisce (o il coordinatore non lo ferma) e restituisce le pagine
+    scaricate. Usato dai processi di ShardedCrawler e, per gli shard esclusi
+    da local_shards, con `python main.py --shard-worker CODA SHARD`.
+    """
+    shard_queue = open_shard_queue(backend, location)
+    try:
+        _configure_worker(shard_queue, shard)
+        crawler = WebCrawler(shard_queue.start_url, shard_queue=shard_queue, shard=shard)
+
+        def save_page(page: Dict):
+            shard_queue.save_page(shard, page.to_dict() if hasattr(page, 'to_dict') else page)
+
+        pages = crawler.crawl(on_page=save_page)
+        count = len(pages)
+        pages.close()
+        return count
+    finally:
+        shard_queue.finish(shard)
+        shard_queue.close()
+
+
+class ShardedCrawler(WebCrawler):
+    """
+    Crawling di un sito ripartito su più processi worker.
+
+    La frontiera sta in una coda condivisa (ShardQueue) divisa in shard per
+    hash dell'URL canonico: ogni worker scarica e analizza solo gli URL del
+    proprio shard e accoda i link trovati nello shard di destinazione, quindi
+    l'estrazione dell'HTML scala con i core. Il coordinatore legge robots.txt
+    e sitemap, avvia i worker locali (local_shards, di default
+    SHARD_CONFIG['local_shards'] o tutti; gli altri vanno avviati a parte con
+    run_shard_worker, sulla stessa macchina con il backend SQLite) e
+    raccoglie le pagine salvate nella coda in pages_data, passandole a
+    on_page come il crawler a processo singolo; a fine crawling verifica i
+    link. Il coordinatore non scarica pagine: niente cache HTTP né pool di
+    parsing.
+    """
+
+    def __init__(self, start_url: str, callback=None, shards: Optional[int] = None,
+                 queue_location: Optional[Union[str, Path]] = None, backend: Optional[str] = None,
+                 local_shards: Optional[Iterable[int]] = None):
+        self.shard_count = max(1, shards or SHARD_CONFIG['shards'] or os.cpu_count() or 1)
+        if local_shards is None:
+            local_shards = SHARD_CONFIG['local_shards']
+        self.local_shards = list(range(self.shard_count)) if local_shards is None else list(local_shards)
+        self.backend = backend or SHARD_CONFIG['backend']
+
+        # Senza una posizione indicata la coda è un file temporaneo, rimosso a fine crawling
+        self.temporary_queue = queue_location is None
+        if self.temporary_queue:
+            queue_dir = Path(SHARD_CONFIG['queue_dir'])
+            queue_dir.mkdir(parents=True, exist_ok=True)
+            fd, queue_location = tempfile.mkstemp(prefix='shards-', suffix='.sqlite', dir=queue_dir)
+            os.close(fd)
+        self.queue_location = str(queue_location)
+
+        self.shard_queue = open_shard_queue(self.backend, self.queue_location)
+        self.shard_queue.setup(start_url, self.shard_count, dict(CRAWL_CONFIG))
+        super().__init__(start_url, callback=callback, shard_queue=self.shard_queue, shard=None)
+
+    def _setup_selenium(self):
+        # Il rendering avviene nei worker
+        return False
+
+    def _setup_page_processing(self):
+        # Fetch e parsing avvengono nei worker
+        pass
+
+    def crawl(self, on_page: Optional[Callable[[Dict], None]] = None) -> List[Dict]:
+        """Crawling completo con i worker; restituisce le pagine di tutti gli shard"""
+        self._start_crawl(on_page)
+
+        workers = {}
+        status = 'interrupted'
+        try:
+            workers = self._start_workers()
+            with tqdm(total=CRAWL_CONFIG['max_pages'], desc=f"Crawling pagine ({self.shard_count} shard)") as pbar:
+                self._collect_pages(workers, pbar)
+
+            status = self._finish_fetching()
+
+        except KeyboardInterrupt:
+            self.logger.info("Crawling interrotto dall'utente")
+
+        finally:
+            self._stop_workers(workers)
+            self._end_crawl(status)
+
+        self._report_completion()
+        return self.pages_data
+
+    def _start_workers(self) -> Dict[int, multiprocessing.Process]:
+        workers = {}
+        for shard in self.local_shards:
+            process = multiprocessing.Process(
+                target=run_shard_worker,
+                args=(self.backend, self.queue_location, shard),
+                name=f'shard-{shard}',
+                daemon=True
+            )
+            process.start()
+            workers[shard] = process
+        self.logger.info(
+            f"Crawling ripartito su {self.shard_count} shard ({len(workers)} worker locali, coda {self.queue_location})"
+        )
+        return workers
+
+    def _collect_pages(self, workers: Dict[int, multiprocessing.Process], pbar: tqdm):
+        """Raccoglie le pagine dei worker finché tutti gli shard non hanno terminato"""
+        last_id = 0
+        while True:
+            if not self.is_running or len(self.visited_urls) >= CRAWL_CONFIG['max_pages']:
+                self.shard_queue.stop()
+
+            local_running = False
+            for shard, process in workers.items():
+                if process.is_alive():
+                    local_running = True
+                elif process.exitcode:
+                    # Worker terminato con un errore: i suoi URL non devono bloccare gli altri
+                    self.shard_queue.finish(shard)
+
+            # Letto prima delle pagine: i worker salvano tutte le pagine prima di terminare
+            done = not local_running and (self.shard_queue.finished() or self.shard_queue.stopped())
+
+            pages = self.shard_queue.load_pages(last_id)
+            for last_id, page_data in pages:
+                if len(self.visited_urls) < CRAWL_CONFIG['max_pages']:
+                    self._store_page(page_data, pbar)
+
+            if pages:
+                continue
+            if done:
+                break
+            time.sleep(SHARD_CONFIG['poll_interval'])
+
+    def _stop_workers(self, workers: Dict[int, multiprocessing.Process]):
+        self.shard_queue.stop()
+        for shard, process in workers.items():
+            process.join(timeout=CRAWL_CONFIG['timeout'])
+            if process.is_alive():
+                self.logger.warning(f"Il worker dello shard {shard} non si è fermato: terminato")
+                process.terminate()
+                process.join()
+
+    def _end_crawl(self, status: str):
+        super()._end_crawl(status)
+        self.shard_queue.close()
+        if self.temporary_queue:
+            remove_checkpoint(self.queue_location)
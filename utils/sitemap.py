@@ -0,0 +1,299 @@
+"""
+Lettura in streaming delle sitemap XML (indici, sitemap figlie, .xml.gz)
+"""
+
+import gzip
+import hashlib
+import io
+import logging
+from array import array
+from bisect import bisect_left
+from collections import deque
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+from lxml import etree
+
+from utils.frontier import canonicalize_url
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+# Limiti del protocollo sitemaps.org per un singolo file
+SITEMAP_MAX_URLS = 50000
+SITEMAP_MAX_BYTES = 50 * 1024 * 1024
+
+
+class SitemapEntry(NamedTuple):
+    """URL dichiarato in una sitemap"""
+    loc: str
+    lastmod: Optional[float]  # timestamp Unix, None se assente o non valido
+    priority: Optional[float]
+
+
+class SitemapTooLarge(Exception):
+    """Il file supera la dimensione massima consentita"""
+
+
+class _LimitedReader(io.RawIOBase):
+    """Lettura da un file-like che si interrompe oltre max_bytes"""
+
+    def __init__(self, stream, max_bytes: int):
+        self._stream = stream
+        self._remaining = max_bytes
+        self._leftover = b''
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        # La decompressione può restituire più byte di quelli richiesti
+        data = self._leftover or self._stream.read(len(buffer))
+        if not data:
+            return 0
+        data, self._leftover = data[:len(buffer)], data[len(buffer):]
+        self._remaining -= len(data)
+        if self._remaining < 0:
+            raise SitemapTooLarge()
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def parse_lastmod(value: Optional[str]) -> Optional[float]:
+    """Converte un <lastmod> in formato W3C Datetime in timestamp Unix"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.endswith(('Z', 'z')):
+        value = value[:-1] + '+00:00'
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def _parse_priority(value: Optional[str]) -> Optional[float]:
+    try:
+        priority = float(value)
+    except (TypeError, ValueError):
+        return None
+    return min(max(priority, 0.0), 1.0)
+
+
+def _local_name(tag) -> str:
+    return tag.rsplit('}', 1)[-1] if isinstance(tag, str) else ''
+
+
+def iter_sitemap(stream) -> Iterator[Tuple[str, object]]:
+    """
+    Legge una sitemap da un file-like senza caricarla tutta in memoria.
+
+    Restituisce ('url', SitemapEntry) per ogni <url> di un urlset e
+    ('sitemap', loc) per ogni <sitemap> di un indice. Ogni elemento viene
+    liberato appena letto, quindi la memoria resta costante anche con
+    50.000 URL. Il contenuto compresso con gzip viene riconosciuto dai
+    primi byte.
+    """
+    buffered = stream if hasattr(stream, 'peek') else io.BufferedReader(stream)
+    if buffered.peek(2)[:2] == GZIP_MAGIC:
+        buffered = gzip.GzipFile(fileobj=buffered)
+
+    parser = etree.iterparse(buffered, events=('end',), resolve_entities=False, no_network=True, huge_tree=True)
+    for _, element in parser:
+        name = _local_name(element.tag)
+        if name not in ('url', 'sitemap'):
+            continue
+
+        fields = {_local_name(child.tag): (child.text or '').strip() for child in element}
+        loc = fields.get('loc')
+        if loc:
+            if name == 'url':
+                yield 'url', SitemapEntry(loc, parse_lastmod(fields.get('lastmod')), _parse_priority(fields.get('priority')))
+            else:
+                yield 'sitemap', loc
+
+        # Libera l'elemento e i fratelli già letti
+        element.clear()
+        parent = element.getparent()
+        if parent is not None:
+            while element.getprevious() is not None:
+                del parent[0]
+
+
+class URLHashSet:
+    """
+    Insieme compatto di URL: hash a 64 bit dell'URL canonico in un array ordinato.
+
+    Occupa 8 byte per URL (contro le centinaia di un set di stringhe) e
+    supporta le operazioni insiemistiche con una fusione lineare di array
+    ordinati, quindi scala a milioni di URL. La probabilità di collisione
+    resta trascurabile fino a centinaia di milioni di URL.
+    """
+
+    def __init__(self, tracking_params: Iterable[str] = ()):
+        self.tracking_params = tuple(p.lower() for p in tracking_params)
+        self._hashes = array('Q')
+        self._sorted = True
+
+    def _hash(self, url: str) -> int:
+        canonical = canonicalize_url(url, self.tracking_params)
+        digest = hashlib.blake2b(canonical.encode('utf-8', errors='replace'), digest_size=8).digest()
+        return int.from_bytes(digest, 'big')
+
+    def add(self, url: str):
+        self._hashes.append(self._hash(url))
+        self._sorted = False
+
+    def update(self, urls: Iterable[str]):
+        for url in urls:
+            self.add(url)
+
+    def _values(self) -> array:
+        """Hash ordinati e senza duplicati"""
+        if not self._sorted:
+            values = array('Q')
+            previous = None
+            for value in sorted(self._hashes):
+                if value != previous:
+                    values.append(value)
+                    previous = value
+            self._hashes = values
+            self._sorted = True
+        return self._hashes
+
+    def __len__(self) -> int:
+        return len(self._values())
+
+    def __contains__(self, url: str) -> bool:
+        values = self._values()
+        value = self._hash(url)
+        index = bisect_left(values, value)
+        return index < len(values) and values[index] == value
+
+    def intersection_count(self, other: 'URLHashSet') -> int:
+        """Numero di URL presenti in entrambi gli insiemi"""
+        left, right = self._values(), other._values()
+        i = j = count = 0
+        while i < len(left) and j < len(right):
+            if left[i] == right[j]:
+                count += 1
+                i += 1
+                j += 1
+            elif left[i] < right[j]:
+                i += 1
+            else:
+                j += 1
+        return count
+
+
+class SitemapInventory:
+    """
+    URL dichiarati nelle sitemap di un sito, per il confronto con il crawling.
+
+    Conserva tutti gli URL come hash (URLHashSet) e solo i primi
+    sample_size in chiaro, da mostrare nel report; registra inoltre le
+    sitemap illeggibili e quelle oltre i limiti del protocollo.
+    """
+
+    def __init__(self, tracking_params: Iterable[str] = (), sample_size: int = 1000):
+        self.urls = URLHashSet(tracking_params)
+        self.sample: List[str] = []
+        self.sample_size = sample_size
+        self.sitemaps: List[str] = []
+        self.errors: List[Dict] = []
+        self.oversized: List[Dict] = []
+
+    def add(self, url: str):
+        self.urls.add(url)
+        if len(self.sample) < self.sample_size:
+            self.sample.append(url)
+
+    def __len__(self) -> int:
+        return len(self.urls)
+
+
+class SitemapReader:
+    """
+    Scarica le sitemap di un sito seguendo gli indici in ampiezza.
+
+    Ogni file viene letto in streaming dalla risposta HTTP (anche .xml.gz) e
+    gli URL vengono restituiti man mano, senza accumularli. Al più
+    max_sitemaps file vengono letti, ognuno entro SITEMAP_MAX_BYTES
+    decompressi.
+    """
+
+    def __init__(self, session: requests.Session, timeout: float = 30, max_sitemaps: int = 100,
+                 inventory: Optional[SitemapInventory] = None,
+                 before_fetch: Optional[Callable[[str], None]] = None):
+        self.session = session
+        self.timeout = timeout
+        self.max_sitemaps = max_sitemaps
+        self.inventory = inventory
+        self.before_fetch = before_fetch
+        self.logger = logging.getLogger(__name__)
+
+    def iter_entries(self, sitemap_urls: Iterable[str]) -> Iterator[SitemapEntry]:
+        queue = deque(sitemap_urls)
+        seen = set()
+
+        while queue and len(seen) < self.max_sitemaps:
+            sitemap_url = queue.popleft()
+            if sitemap_url in seen:
+                continue
+            seen.add(sitemap_url)
+
+            for kind, value in self._read(sitemap_url):
+                if kind == 'sitemap':
+                    queue.append(value)
+                else:
+                    yield value
+
+        if queue:
+            self.logger.warning(f"Limite di {self.max_sitemaps} sitemap raggiunto: {len(queue)} non lette")
+
+    def _read(self, sitemap_url: str) -> Iterator[Tuple[str, object]]:
+        """Voci di una singola sitemap; gli errori vengono registrati, non sollevati"""
+        if self.before_fetch:
+            self.before_fetch(urlparse(sitemap_url).netloc)
+
+        urls = 0
+        try:
+            with self.session.get(sitemap_url, timeout=self.timeout, stream=True) as response:
+                if response.status_code != 200:
+                    self._record_error(sitemap_url, f"HTTP {response.status_code}")
+                    return
+
+                # decode_content gestisce il Content-Encoding, iter_sitemap i file .gz
+                response.raw.decode_content = True
+                stream = io.BufferedReader(_LimitedReader(response.raw, SITEMAP_MAX_BYTES))
+                for kind, value in iter_sitemap(stream):
+                    if kind == 'url':
+                        urls += 1
+                        if urls > SITEMAP_MAX_URLS:
+                            self._record_oversized(sitemap_url, f"Oltre {SITEMAP_MAX_URLS} URL")
+                            return
+                    yield kind, value
+        except SitemapTooLarge:
+            self._record_oversized(sitemap_url, f"Oltre {SITEMAP_MAX_BYTES // (1024 * 1024)}MB")
+            return
+        except (requests.RequestException, etree.XMLSyntaxError, OSError, EOFError) as e:
+            self._record_error(sitemap_url, f"Sitemap non valida: {e}")
+            return
+
+        if self.inventory is not None:
+            self.inventory.sitemaps.append(sitemap_url)
+        self.logger.info(f"Sitemap {sitemap_url}: {urls} URL")
+
+    def _record_error(self, sitemap_url: str, issue: str):
+        self.logger.warning(f"Errore sitemap {sitemap_url}: {issue}")
+        if self.inventory is not None:
+            self.inventory.errors.append({'url': sitemap_url, 'type': issue})
+
+    def _record_oversized(self, sitemap_url: str, issue: str):
+        self.logger.warning(f"Sitemap {sitemap_url} troppo grande ({issue}): letta solo in parte")
+        if self.inventory is not None:
+            self.inventory.oversized.append({'url': sitemap_url, 'type': issue})
@@ -0,0 +1,93 @@
+"""
+Classificazione memoizzata dei link: URL assoluto, interno/esterno, da visitare
+"""
+
+import re
+from collections import OrderedDict
+from typing import Callable, Iterable, List, NamedTuple, Tuple
+from urllib.parse import urljoin, urlsplit
+
+# href che urljoin restituisce invariati qualunque sia la pagina (URL completi, mailto:, tel:, ...)
+ABSOLUTE_RE = re.compile(r'^(?:[a-z][a-z0-9+.-]*://|(?:mailto|tel|javascript|data):)', re.IGNORECASE)
+
+# Percorsi assoluti che urljoin lascerebbe invariati (nessun segmento '.' o '..')
+_PLAIN_PATH_RE = re.compile(
+    r"^/(?!/)(?:[A-Za-z0-9_~!$&'()*+,=:@%-]|\.(?![./?#]|$)|/(?![./]))*(?:\?[^#\s]+)?(?:#\S+)?$"
+)
+
+
+def file_extension(path: str) -> str:
+    """Estensione dell'ultimo segmento del percorso ('.pdf'), in minuscolo; '' se assente"""
+    dot = path.rfind('.')
+    if dot == -1 or path.find('/', dot) != -1:
+        return ''
+    return path[dot:].lower()
+
+
+class ClassifiedURL(NamedTuple):
+    url: str
+    is_external: bool
+    crawlable: bool
+
+
+class URLClassifier:
+    """
+    Risolve e classifica gli href delle pagine con una cache LRU limitata.
+
+    Menu e footer ripetono gli stessi link su ogni pagina: la chiave della
+    cache è (origine, href) per i percorsi assoluti ('/contatti'), ('', href)
+    per gli URL completi e (pagina, href) solo per i percorsi relativi, così
+    un link di navigazione viene risolto una volta per sito e non una per
+    pagina. URL della pagina, join e controllo di crawlability vengono
+    calcolati solo alla prima occorrenza.
+    """
+
+    def __init__(self, domain: str, is_crawlable: Callable[[str], bool], max_size: int = 100000):
+        self.domain = domain
+        self.is_crawlable = is_crawlable
+        self.max_size = max(1, max_size)
+        self._cache: 'OrderedDict[Tuple[str, str], ClassifiedURL]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def classify_all(self, base_url: str, hrefs: Iterable[str]) -> List[ClassifiedURL]:
+        """Classifica gli href di una pagina (l'URL della pagina viene analizzato una volta)"""
+        base = urlsplit(base_url)
+        origin = f"{base.scheme}://{base.netloc}"
+        cache = self._cache
+
+        results = []
+        for href in hrefs:
+            if href.startswith('/'):
+                key = (origin, href)
+            elif ABSOLUTE_RE.match(href):
+                key = ('', href)
+            else:
+                key = (base_url, href)
+
+            result = cache.get(key)
+            if result is None:
+                self.misses += 1
+                result = self._classify(base_url, origin, href)
+                cache[key] = result
+                if len(cache) > self.max_size:
+                    cache.popitem(last=False)
+            else:
+                self.hits += 1
+                cache.move_to_end(key)
+            results.append(result)
+        return results
+
+    def classify(self, base_url: str, href: str) -> ClassifiedURL:
+        return self.classify_all(base_url, (href,))[0]
+
+    def _classify(self, base_url: str, origin: str, href: str) -> ClassifiedURL:
+        # Percorso assoluto senza segmenti da risolvere: basta concatenarlo all'origine
+        if _PLAIN_PATH_RE.match(href):
+            url = origin + href
+        else:
+            url = urljoin(base_url, href)
+        return ClassifiedURL(url, urlsplit(url).netloc != self.domain, self.is_crawlable(url))
+
+    def clear(self):
+        self._cache.clear()
@@ -0,0 +1,124 @@
+"""
+Pool di browser (WebDriver) per il rendering delle pagine in parallelo
+"""
+
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, TypeVar
+
+T = TypeVar('T')
+
+
+class _PooledDriver:
+    """Browser del pool con il numero di pagine già navigate"""
+
+    __slots__ = ('driver', 'pages')
+
+    def __init__(self, driver: Any):
+        self.driver = driver
+        self.pages = 0
+
+
+class WebDriverPool:
+    """
+    Pool di al più `size` browser, avviati solo quando servono.
+
+    Ogni rendering usa in esclusiva un browser libero (o attende che se ne
+    liberi uno); dopo max_pages_per_driver navigazioni il browser viene chiuso
+    e al rendering successivo ne viene avviato uno nuovo, per contenere la
+    crescita di memoria di Chrome.
+
+    Se l'avvio di un browser fallisce il pool smette di avviarne altri:
+    i rendering successivi falliscono subito invece di ritentare a ogni pagina.
+    """
+
+    def __init__(self, driver_factory: Callable[[], Any], size: int = 2, max_pages_per_driver: int = 50):
+        self.driver_factory = driver_factory
+        self.size = max(1, size)
+        self.max_pages_per_driver = max(1, max_pages_per_driver)
+
+        self._idle: List[_PooledDriver] = []
+        self._created = 0
+        self._closed = False
+        self.startup_error: Optional[Exception] = None
+        self._condition = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix='webdriver')
+        self.logger = logging.getLogger(__name__)
+
+    def _acquire(self) -> _PooledDriver:
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Pool WebDriver chiuso")
+                if self.startup_error:
+                    raise RuntimeError(f"Avvio del browser fallito: {self.startup_error}")
+                if self._idle:
+                    return self._idle.pop()
+                if self._created < self.size:
+                    self._created += 1
+                    break
+                self._condition.wait()
+
+        # Avvio del browser fuori dal lock: può richiedere alcuni secondi
+        try:
+            return _PooledDriver(self.driver_factory())
+        except Exception as e:
+            with self._condition:
+                self._created -= 1
+                self.startup_error = e
+                self._condition.notify_all()
+            raise
+
+    def _release(self, pooled: _PooledDriver, discard: bool = False):
+        with self._condition:
+            recycle = discard or self._closed or pooled.pages >= self.max_pages_per_driver
+            if not recycle:
+                self._idle.append(pooled)
+                self._condition.notify()
+                return
+
+        self._quit(pooled)
+        with self._condition:
+            self._created -= 1
+            self._condition.notify()
+
+    def _quit(self, pooled: _PooledDriver):
+        try:
+            pooled.driver.quit()
+        except Exception as e:
+            self.logger.warning(f"Errore chiusura WebDriver: {e}")
+
+    @property
+    def available(self) -> bool:
+        """False se il pool è chiuso o se non è stato possibile avviare un browser"""
+        return not self._closed and self.startup_error is None
+
+    def run(self, task: Callable[[Any], T]) -> T:
+        """Esegue task(driver) su un browser del pool, bloccando fino al risultato"""
+        pooled = self._acquire()
+        pooled.pages += 1
+        try:
+            result = task(pooled.driver)
+        except Exception:
+            # Browser in stato incerto: meglio sostituirlo
+            self._release(pooled, discard=True)
+            raise
+        self._release(pooled)
+        return result
+
+    def submit(self, task: Callable[[Any], T]) -> Future:
+        """Esegue task(driver) in background; al più `size` rendering in parallelo"""
+        return self._executor.submit(self.run, task)
+
+    def close(self):
+        """Chiude i browser liberi; quelli in uso vengono chiusi appena rilasciati"""
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._created -= len(idle)
+            self._condition.notify_all()
+
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        for pooled in idle:
+            self._quit(pooled)